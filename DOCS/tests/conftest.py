@@ -0,0 +1,6 @@
+"""Rendre le paquet vapi_scraper importable depuis DOCS/tests (pytest DOCS/tests)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
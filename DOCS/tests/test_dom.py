@@ -0,0 +1,92 @@
+"""Mini DOM html.parser, selecteurs CSS et extraction statique (sans navigateur)"""
+
+from vapi_scraper.dom import closest, matches, parse_html, select, select_one, text_content
+from vapi_scraper.extraction import assemble_page_data, extract_raw_static
+
+PAGE = '''<html><head><title> Guide  Vapi </title><script>var hidden = 1</script></head><body>
+<nav class="pagination"><a href="/docs/prev">Previous</a><a href="/docs/next" rel="NEXT">Next page</a></nav>
+<main id="content"><section class="doc intro"><h2 id="cfg">Configuration</h2>
+<pre class="language-json"><code>{"voice": {"provider": "11labs"}}</code></pre>
+<code>x = 1</code>
+<ul><li>un</li><li class="last">deux</li></ul>
+<p>Un <b>texte</b> court</p></section></main></body></html>'''
+
+
+def tags(nodes):
+    return [node.tag for node in nodes]
+
+
+def test_tag_class_and_id_selectors():
+    dom = parse_html(PAGE)
+    assert select_one(dom, 'main').attrs['id'] == 'content'
+    assert select_one(dom, '#content').tag == 'main'
+    assert select_one(dom, 'section.doc.intro h2').attrs['id'] == 'cfg'
+    assert select_one(dom, 'section.missing') is None
+
+
+def test_selector_list_keeps_document_order():
+    dom = parse_html(PAGE)
+    assert tags(select(dom, 'p, h2')) == ['h2', 'p']
+
+
+def test_attribute_operators_and_case_flag():
+    dom = parse_html(PAGE)
+    assert select_one(dom, 'a[href^="/docs"]').attrs['href'] == '/docs/prev'
+    assert select_one(dom, 'a[href$="next"]').attrs['href'] == '/docs/next'
+    assert select_one(dom, 'a[href*="ex"]').attrs['href'] == '/docs/next'
+    assert select_one(dom, 'pre[class~="language-json"]') is not None
+    assert select_one(dom, 'a[rel="next"]') is None
+    assert select_one(dom, 'a[rel="next" i]').attrs['href'] == '/docs/next'
+
+
+def test_combinators_and_structural_pseudo_classes():
+    dom = parse_html(PAGE)
+    assert tags(select(dom, 'ul > li')) == ['li', 'li']
+    assert select_one(dom, 'main > h2') is None
+    assert select_one(dom, 'main h2') is not None
+    assert select_one(dom, 'li:last-child').attrs == {'class': 'last'}
+    assert text_content(select_one(dom, 'li:first-child')) == 'un'
+
+
+def test_matches_closest_and_href():
+    dom = parse_html(PAGE)
+    link = select_one(dom, '.pagination a:last-child')
+    assert matches(link, 'nav a') and not matches(link, 'main a')
+    assert closest(link, 'nav').tag == 'nav'
+    assert closest(link, 'main') is None
+    assert link.href('https://docs.vapi.ai/docs/current') == 'https://docs.vapi.ai/docs/next'
+
+
+def test_text_content_and_malformed_html():
+    dom = parse_html(PAGE)
+    assert text_content(select_one(dom, 'p')) == 'Un texte court'
+    # Balise fermante orpheline ignoree, </div> ferme les elements restes ouverts
+    dom = parse_html('<div><p>a<span>b</div><em>c</em></b>')
+    assert tags(dom.children) == ['div', 'em']
+    assert text_content(dom) == 'abc'
+
+
+def test_extract_raw_static_follows_spec():
+    raw = extract_raw_static(parse_html(PAGE), 'https://docs.vapi.ai/docs/current')
+    assert raw['title'] == {'text': 'Guide  Vapi'}
+    assert raw['headings'] == [{'level': 'h2', 'text': 'Configuration', 'id': 'cfg'}]
+    # Filtre de longueur : 'x = 1' est trop court pour un exemple
+    assert [example['type'] for example in raw['examples']] == ['pre', 'code']
+    assert raw['examples'][0]['language'] == 'language-json'
+    assert raw['examples'][0]['context'] == 'Configuration'
+    assert all(schema['content'].startswith('{') for schema in raw['schemas'])
+    assert [link['href'] for link in raw['links']] == ['https://docs.vapi.ai/docs/prev', 'https://docs.vapi.ai/docs/next']
+    assert raw['links'][1]['in_page_nav'] and 0 in raw['links'][1]['next_hints']
+    assert 'hidden' not in raw['visible_text']
+
+
+def test_main_text_is_truncated_but_full_text_kept():
+    page = PAGE.replace('court', 'mot ' * 2000)
+    raw = extract_raw_static(parse_html(page), 'https://docs.vapi.ai/docs/current')
+    assert len(raw['main']['text']) == 5000
+    assert len(raw['main']['full_text']) > 5000
+    page_data = assemble_page_data(raw, 'https://docs.vapi.ai/docs/current', deep=False)
+    assert page_data['content']['fullText'] == raw['main']['full_text']
+    assert page_data['navigation']['next'] == 'https://docs.vapi.ai/docs/next'
+    assert page_data['navigation']['previous'] == 'https://docs.vapi.ai/docs/prev'
+    assert page_data['title'] == 'Guide Vapi'
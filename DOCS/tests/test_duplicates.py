@@ -0,0 +1,104 @@
+"""Esquisses MinHash, seuils de similarite et detection des pages et blocs en double"""
+
+from vapi_scraper.duplicates import (
+    MINHASH_SIZE,
+    DuplicateDetector,
+    NearDuplicateIndex,
+    decode_signature,
+    duplicate_counts,
+    encode_signature,
+    fingerprint_tokens,
+    minhash,
+    sketch_similarity,
+)
+
+WORDS = [f'mot{i}' for i in range(200)]
+
+TEXT = ' '.join(WORDS)
+
+BLOCK = '{"voice": {"provider": "11labs", "voiceId": "burt"}, "model": {"provider": "openai", "model": "gpt-4o"}}'
+
+
+def variant(changed):
+    """TEXT avec 'changed' mots remplaces, repartis sur tout le texte"""
+    words = list(WORDS)
+    for index in range(changed):
+        words[index * len(WORDS) // changed] = f'autre{index}'
+    return ' '.join(words)
+
+
+def sketch(text):
+    return minhash(fingerprint_tokens(text))
+
+
+def page(text, *blocks):
+    return {'content': {'text': text}, 'examples': [{'content': block} for block in blocks], 'schemas': []}
+
+
+def test_sketch_is_stable_and_bounded():
+    signature = sketch(TEXT)
+    assert signature == sketch(TEXT.upper())
+    assert len(signature) == MINHASH_SIZE
+    assert list(signature) == sorted(signature)
+    assert decode_signature(encode_signature(signature)) == signature
+    assert len(sketch('deux mots')) == 1
+
+
+def test_similarity_tracks_jaccard():
+    signature = sketch(TEXT)
+    assert sketch_similarity(signature, signature) == 1.0
+    assert sketch_similarity(signature, sketch(' '.join(f'x{i}' for i in range(200)))) == 0.0
+    # Jaccard reel des triplets : 0.99, 0.877, 0.547 ; l'estimation sur 64 empreintes reste proche
+    assert sketch_similarity(signature, sketch(variant(1))) > 0.95
+    assert 0.8 < sketch_similarity(signature, sketch(variant(5))) < 0.95
+    assert 0.45 < sketch_similarity(signature, sketch(variant(20))) < 0.65
+
+
+def test_index_threshold():
+    index = NearDuplicateIndex(0.8)
+    index.add(sketch(TEXT), 'https://docs.vapi.ai/a')
+    key, similarity = index.find(sketch(variant(1)))
+    assert key == 'https://docs.vapi.ai/a' and similarity > 0.95
+    assert index.find(sketch(variant(20))) is None
+    assert NearDuplicateIndex(0.99).find(sketch(variant(1))) is None
+
+
+def test_index_exact_mode_and_first_key_wins():
+    index = NearDuplicateIndex(0.8)
+    index.add(sketch(TEXT), 'https://docs.vapi.ai/a')
+    index.add(sketch(TEXT), 'https://docs.vapi.ai/b')
+    assert index.find(sketch(TEXT), exact=True) == ('https://docs.vapi.ai/a', 1.0)
+    assert index.find(sketch(variant(1)), exact=True) is None
+
+
+def test_detector_marks_near_duplicate_pages_and_blocks():
+    detector = DuplicateDetector(0.8)
+    first = detector.process('https://docs.vapi.ai/a', page(TEXT, BLOCK))
+    assert 'duplicate_of' not in first and first['fingerprint']
+    assert first['examples'] == [{'content': BLOCK}]
+
+    second = detector.process('https://docs.vapi.ai/b', page(variant(1), BLOCK))
+    assert second['duplicate_of']['url'] == 'https://docs.vapi.ai/a'
+    assert second['duplicate_of']['similarity'] > 0.95
+    # Bloc identique : reference vers le premier, sans son contenu
+    assert second['examples'] == [{'duplicate_of': {'url': 'https://docs.vapi.ai/a', 'position': 0, 'similarity': 1.0}}]
+    assert duplicate_counts(second) == {'pages': 1, 'duplicate_pages': 1, 'examples': 1, 'duplicate_examples': 1,
+                                        'schemas': 0, 'duplicate_schemas': 0}
+
+    third = detector.process('https://docs.vapi.ai/c', page(variant(20)))
+    assert 'duplicate_of' not in third
+
+
+def test_short_pages_only_match_exactly():
+    detector = DuplicateDetector(0.8)
+    detector.process('https://docs.vapi.ai/a', page('Configurer la voix de l assistant'))
+    assert 'duplicate_of' not in detector.process('https://docs.vapi.ai/b', page('Configurer la voix du assistant'))
+    assert detector.process('https://docs.vapi.ai/c', page('Configurer la voix de l assistant'))['duplicate_of'] == {
+        'url': 'https://docs.vapi.ai/a', 'similarity': 1.0}
+
+
+def test_registered_page_stays_canonical():
+    detector = DuplicateDetector(0.8)
+    detector.register('https://docs.vapi.ai/a', fingerprint=encode_signature(sketch(TEXT)))
+    assert detector.match_page(page(variant(1))) == 'https://docs.vapi.ai/a'
+    assert detector.match_page(page(variant(20))) is None
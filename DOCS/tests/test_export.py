@@ -0,0 +1,162 @@
+"""Passages bornes en tokens et export Supabase
+
+Les tests Postgres tournent seulement avec psycopg2 et une base jetable :
+VAPI_TEST_DATABASE_URL=postgresql://... pytest DOCS/tests/test_export.py
+Les tables manquantes sont creees (sans RLS ni auth) ; seules les lignes
+de la base de connaissances du test sont supprimees a la fin.
+"""
+
+import os
+import uuid
+
+import pytest
+
+from vapi_scraper.export import SupabaseChunkExporter, chunk_text, estimate_tokens, knowledge_base_chunks
+
+TEST_DATABASE_URL = os.environ.get('VAPI_TEST_DATABASE_URL')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS public.knowledge_bases (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    vapi_knowledge_base_id TEXT UNIQUE,
+    name TEXT NOT NULL,
+    description TEXT,
+    file_count INTEGER DEFAULT 0,
+    chunks_count INTEGER DEFAULT 0,
+    metadata JSONB
+);
+CREATE TABLE IF NOT EXISTS public.knowledge_base_chunks (
+    id UUID PRIMARY KEY,
+    knowledge_base_id UUID NOT NULL REFERENCES public.knowledge_bases(id) ON DELETE CASCADE,
+    url TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT,
+    content TEXT NOT NULL,
+    token_count INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    metadata JSONB,
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    UNIQUE (knowledge_base_id, url, position) DEFERRABLE INITIALLY DEFERRED
+);
+'''
+
+
+def page(text, title='Page', **extra):
+    return dict({'title': title, 'content': {'text': text}, 'navigation': {'breadcrumb': []}, 'parameters': []}, **extra)
+
+
+def test_chunks_are_bounded():
+    text = '\n'.join(f'Ligne {i} ' + 'mot ' * 30 for i in range(20))
+    chunks = chunk_text(text, 50)
+    assert all(tokens <= 50 for _, tokens in chunks)
+    assert [tokens for _, tokens in chunks] == [estimate_tokens(content) for content, _ in chunks]
+    assert ' '.join(' '.join(content.split()) for content, _ in chunks) == ' '.join(text.split())
+
+
+def test_oversized_line_and_word_are_split():
+    line = 'a' * 16 * 40 + ' ' + 'mot ' * 100
+    chunks = chunk_text(line, 32)
+    assert all(tokens <= 32 for _, tokens in chunks)
+    assert ''.join(content.replace(' ', '') for content, _ in chunks) == line.replace(' ', '')
+
+
+def test_exact_duplicates_and_error_pages_are_skipped():
+    pages = [
+        ('https://docs.vapi.ai/a', page('Configurer la voix')),
+        ('https://docs.vapi.ai/b', page('Configurer la voix')),
+        ('https://docs.vapi.ai/c', page('Configurer la voix.')),
+        ('https://docs.vapi.ai/d', {'url': 'https://docs.vapi.ai/d', 'error': 'timeout'}),
+    ]
+    assert [chunk['url'] for chunk in knowledge_base_chunks(pages, 100)] == [
+        'https://docs.vapi.ai/a', 'https://docs.vapi.ai/c']
+
+
+def test_full_text_is_exported():
+    data = page('debut tronque', content={'text': 'debut tronque', 'fullText': 'debut tronque puis la suite'})
+    chunks = list(knowledge_base_chunks([('https://docs.vapi.ai/a', data)], 100))
+    assert chunks[0]['content'] == 'debut tronque puis la suite'
+
+
+def test_identical_chunks_are_numbered():
+    line = 'Configurer la voix ' + 'mot ' * 30
+    chunks = list(knowledge_base_chunks([('https://docs.vapi.ai/a', page('\n'.join([line, 'Autre ' + 'mot ' * 30, line])))], 40))
+    assert [(chunk['position'], chunk['occurrence']) for chunk in chunks] == [(0, 0), (1, 0), (2, 1)]
+
+
+@pytest.fixture
+def database():
+    """DSN d'une base jetable et identifiant de base de connaissances propre au test"""
+    psycopg2 = pytest.importorskip('psycopg2')
+    if not TEST_DATABASE_URL:
+        pytest.skip('VAPI_TEST_DATABASE_URL absent')
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    with conn, conn.cursor() as cursor:
+        cursor.execute(SCHEMA)
+    knowledge_base = f'vapi-test-{uuid.uuid4()}'
+    yield conn, knowledge_base
+    with conn, conn.cursor() as cursor:
+        cursor.execute('DELETE FROM public.knowledge_bases WHERE vapi_knowledge_base_id = %s', (knowledge_base,))
+    conn.close()
+
+
+def stored_chunks(conn, knowledge_base, columns='c.url, c.position, c.content'):
+    with conn, conn.cursor() as cursor:
+        cursor.execute(f'''
+            SELECT {columns} FROM public.knowledge_base_chunks c
+            JOIN public.knowledge_bases k ON k.id = c.knowledge_base_id
+            WHERE k.vapi_knowledge_base_id = %s ORDER BY c.url, c.position
+        ''', (knowledge_base,))
+        return cursor.fetchall()
+
+
+def stored_ids(conn, knowledge_base, url):
+    return {chunk_id for chunk_id, chunk_url in stored_chunks(conn, knowledge_base, 'c.id::text, c.url')
+            if chunk_url == url}
+
+
+@pytest.mark.parametrize('use_copy', [True, False], ids=['copy', 'values'])
+def test_export_round_trip(database, use_copy):
+    conn, knowledge_base = database
+    long_text = '\n'.join(f'Section {i} ' + 'parametre ' * 20 for i in range(10))
+    pages = [
+        ('https://docs.vapi.ai/a', page('Configurer la voix de l assistant')),
+        ('https://docs.vapi.ai/b', page(long_text)),
+    ]
+    exporter = SupabaseChunkExporter(TEST_DATABASE_URL, knowledge_base, batch_size=3, use_copy=use_copy)
+    try:
+        chunks = list(knowledge_base_chunks(pages, 40))
+        stats = exporter.export(chunks)
+        assert (stats['chunks'], stats['upserted'], stats['unchanged'], stats['deleted']) == (len(chunks), len(chunks), 0, 0)
+        assert stored_chunks(conn, knowledge_base) == [(c['url'], c['position'], c['content']) for c in chunks]
+
+        # Rien de change : aucune ligne envoyee
+        stats = exporter.export(list(knowledge_base_chunks(pages, 40)))
+        assert (stats['upserted'], stats['unchanged'], stats['deleted']) == (0, len(chunks), 0)
+
+        # Page a modifiee, section inseree en tete de la page b : les passages decales gardent leur
+        # identifiant (renvoyes pour leur nouveau rang), seul l'ancien passage de a est supprime
+        previous = stored_ids(conn, knowledge_base, 'https://docs.vapi.ai/b')
+        introduction = 'Introduction ' + 'parametre ' * 20
+        pages = [
+            ('https://docs.vapi.ai/a', page('Configurer la voix du nouvel assistant')),
+            ('https://docs.vapi.ai/b', page(introduction + '\n' + long_text)),
+        ]
+        updated = list(knowledge_base_chunks(pages, 40))
+        stats = exporter.export(updated)
+        assert (stats['upserted'], stats['unchanged'], stats['deleted']) == (len(updated), 0, 1)
+        assert previous < stored_ids(conn, knowledge_base, 'https://docs.vapi.ai/b')
+        assert stored_chunks(conn, knowledge_base) == [(c['url'], c['position'], c['content']) for c in updated]
+
+        # Page b raccourcie : passages en trop supprimes, rien d'autre n'est renvoye
+        pages[1] = ('https://docs.vapi.ai/b', page(introduction + '\n' + long_text.split('\n', 1)[0]))
+        shortened = list(knowledge_base_chunks(pages, 40))
+        stats = exporter.export(shortened)
+        assert (stats['upserted'], stats['unchanged'], stats['deleted']) == (0, len(shortened), len(updated) - len(shortened))
+        assert stored_chunks(conn, knowledge_base) == [(c['url'], c['position'], c['content']) for c in shortened]
+        with conn, conn.cursor() as cursor:
+            cursor.execute('SELECT chunks_count, file_count FROM public.knowledge_bases WHERE vapi_knowledge_base_id = %s',
+                           (knowledge_base,))
+            assert cursor.fetchone() == (len(shortened), 2)
+    finally:
+        exporter.close()
@@ -0,0 +1,64 @@
+"""Recherche des mots-cles en un passage (Aho-Corasick)"""
+
+import os
+
+import pytest
+
+from vapi_scraper.config import SCRAPER_CONFIG
+from vapi_scraper.keywords import KeywordMatcher, find_keywords, load_keywords
+
+
+def test_overlapping_matches_are_all_reported():
+    hits = KeywordMatcher(['he', 'she', 'his', 'hers']).scan('ushers')
+    assert hits == {
+        'he': {'count': 1, 'offsets': [2]},
+        'she': {'count': 1, 'offsets': [1]},
+        'hers': {'count': 1, 'offsets': [2]},
+    }
+
+
+def test_keyword_inside_longer_keyword():
+    hits = KeywordMatcher(['voice', 'voiceId', 'Id']).scan('voiceId voice')
+    assert hits['voice'] == {'count': 2, 'offsets': [0, 8]}
+    assert hits['voiceId'] == {'count': 1, 'offsets': [0]}
+    assert hits['Id'] == {'count': 1, 'offsets': [5]}
+
+
+def test_case_insensitive_with_original_positions():
+    hits = KeywordMatcher(['assistant', 'İstanbul']).scan('ASSISTANT İSTANBUL assistant')
+    assert hits['assistant'] == {'count': 2, 'offsets': [0, 19]}
+    # 'İ'.lower() fait deux caracteres : les positions restent celles du texte d'origine
+    assert hits['İstanbul'] == {'count': 1, 'offsets': [10]}
+
+
+def test_results_follow_keyword_list_order_and_offset_limit():
+    matcher = KeywordMatcher(['model', 'voice', 'model'])
+    assert matcher.keywords == ['model', 'voice']
+    hits = matcher.scan('voice model voice voice', max_offsets=2)
+    assert list(hits) == ['model', 'voice']
+    assert hits['voice'] == {'count': 3, 'offsets': [0, 12]}
+
+
+def test_no_keywords_or_no_match():
+    assert KeywordMatcher([]).scan('assistant') == {}
+    assert KeywordMatcher(['voice']).scan('') == {}
+
+
+def test_keywords_file_is_passed_explicitly(tmp_path):
+    path = tmp_path / 'keywords.txt'
+    path.write_text('# commentaire\nvoice\n\nmodel\n', encoding='utf-8')
+    assert load_keywords(str(path)) == ['voice', 'model']
+    hits = find_keywords('model voice model', keywords_file=str(path), max_offsets=1)
+    assert hits == {'voice': {'count': 1, 'offsets': [6]}, 'model': {'count': 2, 'offsets': [0]}}
+
+
+def test_default_keywords_file_does_not_depend_on_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert os.path.isabs(SCRAPER_CONFIG['keywords_file'])
+    assert 'assistant' in [keyword.lower() for keyword in load_keywords(SCRAPER_CONFIG['keywords_file'])]
+
+
+def test_missing_keywords_file_is_reported(tmp_path):
+    with pytest.raises(FileNotFoundError, match='Fichier de mots-cles introuvable'):
+        load_keywords(str(tmp_path / 'absent.txt'))
+
@@ -0,0 +1,104 @@
+"""JSON tolerant des blocs de code et arbre des chemins de parametres"""
+
+import copy
+import json
+
+from vapi_scraper.parameters import (
+    build_parameter_tree,
+    extract_parameter_paths,
+    parse_json_blocks,
+    update_parameter_tree,
+)
+
+EXAMPLE = '{"voice": {"provider": "11labs", "speed": 1.2}, "tools": [{"type": "function", "async": false}]}'
+
+SCHEMA = '''{"type": "object", "properties": {
+    "model": {"type": "string", "enum": ["gpt-4o"], "description": "Modele"},
+    "messages": {"type": "array", "items": {"type": "object", "properties": {"role": {"type": "string"}}}}
+}}'''
+
+
+def test_comments_and_trailing_commas():
+    assert parse_json_blocks('{"a": 1, // commentaire\n "b": [1, 2,], /* bloc */}') == [{'a': 1, 'b': [1, 2]}]
+
+
+def test_javascript_literals():
+    text = "{model: 'gpt-4o', stream: true, tools: None}"
+    assert parse_json_blocks(text) == [{'model': 'gpt-4o', 'stream': True, 'tools': None}]
+
+
+def test_truncated_block_returns_what_was_read():
+    text = '{"voice": {"provider": "11labs", "voiceId": "abc"'
+    assert parse_json_blocks(text) == [{'voice': {'provider': '11labs', 'voiceId': 'abc'}}]
+
+
+def test_object_inside_code_with_spread():
+    text = 'const call = await client.calls.create({ model: {provider: "openai"}, ...rest, tools: [{type: "fn"}] });'
+    assert parse_json_blocks(text) == [{'model': {'provider': 'openai'}, 'tools': [{'type': 'fn'}]}]
+
+
+def test_destructuring_and_plain_text_are_ignored():
+    assert parse_json_blocks('import { Vapi, Call } from "@vapi-ai/web"') == []
+    assert parse_json_blocks('{ a, b }') == []
+    assert parse_json_blocks('plain text') == []
+
+
+def test_paths_from_examples_and_schemas():
+    paths = extract_parameter_paths({'examples': [{'content': EXAMPLE}], 'schemas': [{'content': SCHEMA}]})
+    assert list(paths) == sorted(paths)
+    assert paths['voice.provider'] == {'types': ['string'], 'examples': ['11labs']}
+    assert paths['voice.speed'] == {'types': ['number'], 'examples': [1.2]}
+    assert paths['tools[]']['types'] == ['object']
+    assert paths['tools[].async'] == {'types': ['boolean'], 'examples': [False]}
+    assert paths['model'] == {'types': ['string'], 'examples': ['gpt-4o'], 'description': 'Modele'}
+    assert paths['messages[].role']['types'] == ['string']
+
+
+def test_tree_merges_pages_and_links_children():
+    pages = [
+        ('https://docs.vapi.ai/a', {'examples': [{'content': EXAMPLE}]}),
+        ('https://docs.vapi.ai/b', {'examples': [{'content': '{"voice": {"provider": "azure"}}'}]}),
+    ]
+    tree = build_parameter_tree(pages)
+    assert tree['voice']['children'] == ['voice.provider', 'voice.speed']
+    assert tree['voice.provider']['examples'] == ['11labs', 'azure']
+    assert tree['voice.provider']['sources'] == ['https://docs.vapi.ai/a', 'https://docs.vapi.ai/b']
+    assert tree['tools']['children'] == ['tools[]']
+    assert tree['tools[]']['children'] == ['tools[].async', 'tools[].type']
+
+
+def test_tree_creates_missing_parents():
+    paths = {'tools[].function.name': {'types': ['string'], 'examples': ['lookup']}}
+    tree = build_parameter_tree([('https://docs.vapi.ai/a', {'parameter_paths': paths})])
+    assert list(tree) == ['tools', 'tools[]', 'tools[].function', 'tools[].function.name']
+    assert tree['tools']['types'] == ['array']
+    assert tree['tools[].function']['types'] == ['object']
+    assert tree['tools[].function']['sources'] == []
+    assert tree['tools[].function']['children'] == ['tools[].function.name']
+
+
+def test_tree_update_matches_full_rebuild():
+    def page(content):
+        return {'examples': [{'content': content}]}
+
+    before = {
+        'https://docs.vapi.ai/a': page(EXAMPLE),
+        'https://docs.vapi.ai/b': page('{"voice": {"provider": "azure"}}'),
+        'https://docs.vapi.ai/c': page('{"tools": [{"type": "dtmf"}], "model": "gpt-4o"}'),
+        'https://docs.vapi.ai/d': page('{"firstMessage": "Bonjour"}'),
+    }
+    tree = build_parameter_tree(before.items())
+    # b modifiee, c retiree, e ajoutee entre a et b ; a et d inchangees
+    after = dict(before)
+    after['https://docs.vapi.ai/b'] = page('{"voice": {"provider": "cartesia", "voiceId": "v1"}}')
+    del after['https://docs.vapi.ai/c']
+    after['https://docs.vapi.ai/e'] = page('{"transcriber": {"provider": "deepgram"}, "voice": {"speed": 0.9}}')
+    urls = ['https://docs.vapi.ai/a', 'https://docs.vapi.ai/e', 'https://docs.vapi.ai/b', 'https://docs.vapi.ai/d']
+    changed = {'https://docs.vapi.ai/b', 'https://docs.vapi.ai/c', 'https://docs.vapi.ai/e'}
+
+    updated = update_parameter_tree(copy.deepcopy(tree), changed, after, {url: i for i, url in enumerate(urls)})
+    expected = build_parameter_tree((url, after[url]) for url in urls)
+    assert json.dumps(updated) == json.dumps(expected)
+    assert 'model' not in updated
+    assert updated['voice.speed']['sources'] == ['https://docs.vapi.ai/a', 'https://docs.vapi.ai/e']
+
@@ -0,0 +1,173 @@
+"""Politesse par hote : seau a jetons et fenetre AIMD, avec une horloge simulee"""
+
+import pytest
+
+from vapi_scraper import scheduling
+from vapi_scraper.scheduling import CrawlFrontier, HostScheduler, jittered_backoff, retry_after_seconds
+
+URL = 'https://docs.vapi.ai/quickstart'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduling, 'time', clock)
+    return clock
+
+
+def make_scheduler(**options):
+    settings = dict(rate=2.0, rate_min=0.5, rate_max=None, rate_step=1.0, backoff=0.5,
+                    latency_factor=3.0, max_concurrency=4)
+    settings.update(options)
+    return HostScheduler(**settings)
+
+
+def request(scheduler, clock, status=200, waits=('rate', 'window'), latency=0.1, wait=10.0, **release):
+    """Une requete complete ; waits simule une requete qui a attendu son jeton ('rate') ou sa place ('window')
+
+    wait doit laisser au moins un jeton dans le seau (acquire ne doit pas
+    bloquer) ; une attente courte donne aussi un debit observe realiste.
+    """
+    clock.now += wait
+    host, state, started, _ = scheduler.acquire(URL)
+    clock.now += latency
+    scheduler.release((host, state, started, set(waits)), status=status, **release)
+    return scheduler.report()['docs.vapi.ai']
+
+
+def test_slow_start_grows_rate_and_window(clock):
+    scheduler = make_scheduler()
+    report = request(scheduler, clock, latency=0.0, wait=0.5)
+    assert (report['rate'], report['concurrency']) == (4.0, 2)
+    report = request(scheduler, clock, latency=0.0, wait=0.25)
+    assert (report['rate'], report['concurrency']) == (6.0, 3)
+
+
+def test_each_wait_grows_only_its_own_limit(clock):
+    scheduler = make_scheduler()
+    report = request(scheduler, clock, waits=('window',), latency=0.0, wait=0.5)
+    assert (report['rate'], report['concurrency']) == (2.0, 2)
+    report = request(scheduler, clock, waits=('rate',), latency=0.0, wait=0.5)
+    assert (report['rate'], report['concurrency']) == (3.0, 2)
+
+
+def test_saturated_window_does_not_inflate_rate(clock):
+    scheduler = make_scheduler(rate_max=20.0, max_concurrency=2)
+    for _ in range(200):
+        report = request(scheduler, clock, waits=('window',), latency=0.05, wait=0.5)
+    assert report['concurrency'] == 2
+    assert report['rate'] == 2.0
+
+
+def test_rate_is_capped_by_observed_rate(clock):
+    # Hote qui ne sert que 4 req/s : meme si chaque requete attend son jeton, le debit ne derive pas
+    scheduler = make_scheduler(rate=4.0, rate_max=20.0)
+    for _ in range(100):
+        report = request(scheduler, clock, latency=0.0, wait=0.25)
+    assert report['rate'] <= 4 * HostScheduler.RATE_HEADROOM < 20.0
+
+
+def test_unlimited_success_does_not_increase(clock):
+    scheduler = make_scheduler()
+    report = request(scheduler, clock, waits=())
+    assert (report['rate'], report['concurrency']) == (2.0, 1)
+
+
+def test_window_and_rate_are_capped(clock):
+    scheduler = make_scheduler(rate_max=5.0, max_concurrency=2)
+    request(scheduler, clock, wait=0.5)
+    for _ in range(4):
+        report = request(scheduler, clock, wait=0.25)
+    assert (report['rate'], report['concurrency']) == (5.0, 2)
+
+
+def test_throttle_backs_off_once_per_episode(clock):
+    scheduler = make_scheduler()
+    request(scheduler, clock, latency=0.0, wait=0.5)
+    request(scheduler, clock, latency=0.0, wait=0.25)
+    report = request(scheduler, clock, status=429, latency=0.0)
+    assert (report['rate'], report['concurrency']) == (3.0, 1)
+    assert (report['throttled'], report['decreases']) == (1, 1)
+    # Deuxieme refus dans la seconde : meme episode de congestion, pas de nouvelle baisse
+    report = request(scheduler, clock, status=503, latency=0.0, wait=0.0)
+    assert (report['throttled'], report['decreases'], report['rate']) == (2, 1, 3.0)
+
+
+def test_additive_increase_after_congestion(clock):
+    scheduler = make_scheduler()
+    request(scheduler, clock, latency=0.0, wait=0.5)
+    request(scheduler, clock, status=500, latency=0.0, wait=0.25)
+    report = request(scheduler, clock, latency=0.0, wait=0.5)
+    # Fin du demarrage lent : +rate_step/rate par succes au lieu d'un doublement
+    assert report['rate'] == round(2.0 + 1.0 / 2.0, 2)
+    assert report['errors'] == 1
+
+
+def test_rate_never_drops_below_minimum(clock):
+    scheduler = make_scheduler(rate=1.0)
+    for _ in range(4):
+        clock.now += scheduling.HostScheduler.DECREASE_INTERVAL
+        report = request(scheduler, clock, error=True)
+    assert (report['rate'], report['concurrency'], report['decreases']) == (0.5, 1, 4)
+
+
+def test_slow_response_counts_as_congestion(clock):
+    scheduler = make_scheduler()
+    request(scheduler, clock, waits=(), latency=0.1)
+    report = request(scheduler, clock, waits=(), latency=2.0)
+    assert (report['slow_responses'], report['decreases'], report['rate']) == (1, 1, 1.0)
+    # Ecart sous LATENCY_SLACK : toujours tolere pour un hote rapide
+    clock.now += 2
+    report = request(scheduler, clock, waits=(), latency=0.3)
+    assert report['slow_responses'] == 1
+
+
+def test_retry_after_suspends_host(clock):
+    scheduler = make_scheduler()
+    request(scheduler, clock, status=429, retry_after=30.0)
+    state = scheduler._hosts['docs.vapi.ai']
+    assert state.blocked_until == pytest.approx(clock.now + 30.0)
+    assert scheduler.report()['docs.vapi.ai']['retry_after'] == 1
+
+
+def test_disabled_scheduler_is_a_no_op():
+    scheduler = make_scheduler(enabled=False)
+    assert scheduler.acquire(URL) is None
+    scheduler.release(None, status=429)
+    assert scheduler.report() == {}
+
+
+def test_retry_after_header_and_backoff():
+    assert retry_after_seconds('120') == 120.0
+    assert retry_after_seconds('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert retry_after_seconds('bientot') is None
+    assert retry_after_seconds(None) is None
+    for attempt in range(1, 5):
+        assert 2 ** (attempt - 1) / 2 <= jittered_backoff(1, attempt) <= 2 ** (attempt - 1)
+
+
+def test_frontier_prefetches_do_not_starve_next_chain():
+    frontier = CrawlFrontier(2)
+    frontier.push('next', priority=0)
+    for url in ('a', 'b', 'c'):
+        frontier.push(url, priority=1)
+    assert frontier.pop() == 'next'
+    assert frontier.pop() == 'a'
+    frontier.task_done()
+    frontier.task_done()
+    frontier.mark_merged()
+    # Budget de prechargement epuise : la navigation attend, le lien Next promu passe
+    frontier.push('c', priority=0)
+    assert frontier.pop() == 'c'
+    frontier.task_done()
+    frontier.mark_merged()
+    assert frontier.pop() is None
+
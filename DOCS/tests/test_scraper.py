@@ -0,0 +1,49 @@
+"""Modes de crawl : memes pages, dans le meme ordre, sans navigateur ni reseau"""
+
+import time
+
+import pytest
+
+from vapi_scraper.config import SCRAPER_CONFIG
+from vapi_scraper.scraper import VapiSequentialScraper
+
+BASE = 'https://docs.vapi.ai'
+SITE = [f"{BASE}/page-{i:04d}" for i in range(60)]
+
+
+def fake_fetch(url, with_nav_links=False):
+    """Chaine Next page-0000 -> page-0059, toutes les pages dans la navigation laterale"""
+    time.sleep(0.002)
+    index = SITE.index(url)
+    return {
+        'page_data': {'url': url, 'title': url.rsplit('/', 1)[-1], 'examples': [], 'schemas': []},
+        'next_url': SITE[index + 1] if index + 1 < len(SITE) else None,
+        'nav_links': list(SITE) if with_nav_links else None,
+        'validator': {},
+        'reused': False
+    }
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    def make(**config):
+        for key, value in config.items():
+            monkeypatch.setitem(SCRAPER_CONFIG, key, value)
+        scraper = VapiSequentialScraper()
+        scraper.fetch_page = fake_fetch
+        return scraper
+    return make
+
+
+@pytest.mark.parametrize('max_pages', [1, 3, 10])
+def test_parallel_matches_sequential_under_tight_budget(scraper, max_pages):
+    config = dict(start_url=SITE[30], max_pages=max_pages, politeness=False)
+    sequential = scraper(**config)
+    sequential.scrape_sequentially()
+    parallel = scraper(workers=4, **config)
+    parallel.scrape_parallel(4)
+
+    expected = SITE[30:30 + max_pages]
+    assert sequential.scraped_data['navigation_path'] == expected
+    assert parallel.scraped_data['navigation_path'] == expected
+    assert list(parallel.scraped_data['pages']) == expected
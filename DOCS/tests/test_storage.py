@@ -0,0 +1,85 @@
+"""Index de recherche et stockage de la base de connaissances"""
+
+import json
+import os
+
+import pytest
+
+from vapi_scraper.storage import KnowledgeBaseStore, PageArchive, search
+
+URL = 'https://docs.vapi.ai/quickstart'
+
+
+def write_knowledge_base(path, text, mtime):
+    page = {'title': 'Quickstart', 'headings': [], 'content': {'text': text}, 'examples': [], 'schemas': []}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'metadata': {}, 'pages': {URL: page}, 'navigation_path': [URL]}, f)
+    os.utime(path, (mtime, mtime))
+
+
+def test_search_rebuilds_stale_index(tmp_path):
+    kb_file, index_file = str(tmp_path / 'kb.json'), str(tmp_path / 'kb-index.sqlite')
+    write_knowledge_base(kb_file, 'Configure the voicemail detection', 1_000_000)
+    assert [r['url'] for r in search('voicemail', index_file=index_file, knowledge_base_file=kb_file)] == [URL]
+
+    write_knowledge_base(kb_file, 'Configure the transcriber endpointing', 1_000_100)
+    assert search('voicemail', index_file=index_file, knowledge_base_file=kb_file) == []
+    assert [r['url'] for r in search('endpointing', index_file=index_file, knowledge_base_file=kb_file)] == [URL]
+
+
+def test_search_without_knowledge_base(tmp_path):
+    with pytest.raises(FileNotFoundError, match='introuvable'):
+        search('voice', index_file=str(tmp_path / 'kb-index.sqlite'), knowledge_base_file=str(tmp_path / 'kb.json'))
+
+
+def corrupt(path, offset, length):
+    with open(path, 'r+b') as f:
+        f.seek(offset + length // 2)
+        byte = f.read(1)
+        f.seek(offset + length // 2)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+
+def test_archive_verifies_records_when_read(tmp_path):
+    path = str(tmp_path / 'pages.warc.gz')
+    archive = PageArchive(path)
+    archive.append(URL, '<h1>v1</h1>')
+    archive.append(URL, '<h1>v2</h1>')
+    archive.append(URL + '/next', '<h1>next</h1>')
+    corrupt(path, *archive.latest()[URL])
+    archive.close()
+
+    archive = PageArchive(path)
+    assert archive.stats()['records'] == 3
+    assert archive.get(URL)[1] == '<h1>v1</h1>'
+    assert archive.stats()['records'] == 2
+    archive.close()
+
+
+def test_archive_drops_unreadable_tail_on_open(tmp_path):
+    path = str(tmp_path / 'pages.warc.gz')
+    archive = PageArchive(path)
+    archive.append(URL, '<h1>v1</h1>')
+    archive.append(URL + '/next', '<h1>next</h1>')
+    corrupt(path, *archive.latest()[URL + '/next'])
+    archive.close()
+
+    archive = PageArchive(path)
+    assert archive.latest() == {URL: (0, os.path.getsize(path))}
+    assert archive.get(URL + '/next') is None
+    archive.close()
+
+
+def test_store_reads_categories_without_the_tree(tmp_path):
+    store = KnowledgeBaseStore(str(tmp_path / 'kb.sqlite'))
+    page = {'title': 'Voice', 'headings': [], 'content': {'text': ''}, 'parameters': ['voice.provider']}
+    categories = {'voice': ['voice.provider'], 'tools': []}
+    store.write({}, [URL], {'all': ['voice.provider'], 'categories': categories, 'tree': {}}, [(URL, page, None)])
+    store.parameter_paths = None
+
+    assert store.category('voice') == {'name': 'voice', 'parameters': ['voice.provider'],
+                                       'pages': {'voice.provider': [URL]}}
+    assert store.category('tools')['parameters'] == []
+    del store.parameter_paths
+    assert store.parameters() == {'all': ['voice.provider'], 'categories': categories, 'tree': {}}
+    store.close()
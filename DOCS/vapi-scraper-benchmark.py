@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+VAPI SCRAPER BENCHMARK
+======================
+
+Banc d'essai hors ligne du scraper sequentiel : un site de documentation
+genere (liens Next, barre laterale, blocs de code, schemas JSON) est servi
+en local, puis chaque scenario lance VapiSequentialScraper dans un processus
+separe et mesure pages/s, latence par page, pic de RSS et taille des sorties.
+Les scenarios avec 'throttle' sont servis par un serveur qui limite
+volontairement son debit (429 + Retry-After) pour eprouver la politesse
+adaptative du scraper. Chaque reponse est retardee d'un aller-retour reseau
+simule (--latency-ms) : c'est ce temps que les workers paralleles recouvrent.
+
+Usage: python vapi-scraper-benchmark.py [--pages N] [--page-size OCTETS] [--latency-ms MS] [--scenarios a,b]
+                                        [--repeat 3] [--save-baseline] [--tolerance 0.2]
+Baseline: ./vapi-scraper-benchmark-baseline.json (a generer avec --save-baseline ; ignoree si
+enregistree sur une machine differente ou avec d'autres parametres de site)
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BENCHMARK_CONFIG = {
+    'pages': 200,
+    'page_size': 20000,  # Taille approximative du HTML de chaque page (octets)
+    'sidebar_links': 60,  # Liens de la barre laterale par page
+    # Aller-retour reseau simule par reponse (ms). A 0, un serveur local repond en moins d'une ms :
+    # les workers n'ont aucune attente a recouvrir et, l'extraction tenant le GIL, le mode
+    # parallele n'est alors que plus lent que le mode sequentiel (contention, changements de thread)
+    'latency_ms': 20,
+    'seed': 42,
+    'scenarios': 'http,http-parallel,http-stream,http-incremental',
+    'repeat': 3,  # Executions par scenario : la mediane de chaque mesure absorbe le bruit de la machine
+    'baseline_file': os.path.join(DOCS_DIR, 'vapi-scraper-benchmark-baseline.json'),
+    'tolerance': 0.2  # Ecart relatif tolere avant de signaler une regression
+}
+
+# Surcharges de SCRAPER_CONFIG par scenario ; 'warmup' lance un premier crawl non mesure,
+# 'throttle' sert le site avec une limite de debit (req/s) au-dela de laquelle il repond 429
+SCENARIOS = {
+    'http': {'fetch_mode': 'auto'},
+    'http-parallel': {'fetch_mode': 'auto', 'workers': 4},
+    'http-stream': {'fetch_mode': 'auto', 'stream_output': True},
+    'http-incremental': {'fetch_mode': 'auto', 'incremental': True, 'warmup': True},
+    'http-instrumented': {'fetch_mode': 'auto', 'instrumentation': True},
+    'http-discovery': {'fetch_mode': 'auto', 'discovery': 'auto', 'workers': 4},
+    'http-pipeline': {'fetch_mode': 'auto', 'pipeline': True, 'workers': 4},
+    'archive-replay': {'fetch_mode': 'auto', 'archive': True, 'from_archive': True, 'warmup': True},
+    'http-throttled': {'fetch_mode': 'auto', 'workers': 4, 'throttle': 20, 'politeness': True, 'host_rate': 2.0},
+    'browser': {'fetch_mode': 'browser'}
+}
+
+# Metriques comparees a la baseline : (chemin, sens d'une regression)
+COMPARED_METRICS = [
+    (('pages_per_second',), 'lower'),
+    (('latency_ms', 'p95'), 'higher'),
+    (('peak_rss_kb',), 'higher'),
+    (('output_bytes',), 'higher')
+]
+
+WORDS = [
+    'assistant', 'call', 'configure', 'the', 'with', 'your', 'provider', 'voice', 'model',
+    'transcriber', 'webhook', 'server', 'message', 'tool', 'function', 'request', 'response',
+    'latency', 'stream', 'phone', 'number', 'squad', 'workflow', 'endpoint', 'token', 'when',
+    'silenceTimeoutSeconds', 'firstMessage', 'endpointing', 'temperature', 'maxTokens'
+]
+
+
+def generate_site(pages, page_size, sidebar_links, seed):
+    """Pages HTML deterministes, indexees par chemin ('/docs/page-0000', ...)"""
+    rng = random.Random(seed)
+    paths = [f'/docs/page-{index:04d}' for index in range(pages)]
+    site = {}
+    for index, path in enumerate(paths):
+        first = max(0, index - sidebar_links // 2)
+        sidebar = ''.join(f'<a href="{link}">Page {link[-4:]}</a>' for link in paths[first:first + sidebar_links])
+        parts = [
+            f'<!doctype html><html><head><title>Page {index} | Vapi</title>'
+            '<style>.content{max-width:80ch}</style><script>window.__docs = {};</script></head><body>',
+            f'<nav class="sidebar">{sidebar}</nav><main class="content">',
+            f'<h1 id="page-{index}">Page {index}</h1>'
+        ]
+        size = sum(len(part) for part in parts)
+        section = 0
+        while size < page_size:
+            section += 1
+            prose = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(60, 160)))
+            code = f'const assistant = await vapi.assistants.create({{ name: "bench-{index}-{section}" }});'
+            schema = json.dumps({
+                'voice': {'provider': rng.choice(['11labs', 'openai', 'cartesia']), 'voiceId': f'v{section}'},
+                'silenceTimeoutSeconds': rng.randint(5, 60)
+            })
+            block = (
+                f'<div class="section"><h2 id="s{section}">Section {section}</h2><p>{prose}</p>'
+                f'<pre class="language-typescript"><code>{code}</code></pre>'
+                f'<pre class="language-json"><code>{schema}</code></pre></div>'
+            )
+            parts.append(block)
+            size += len(block)
+        pagination = ''
+        if index > 0:
+            pagination += f'<a href="{paths[index - 1]}">Previous</a>'
+        if index + 1 < pages:
+            pagination += f'<a href="{paths[index + 1]}">Next</a>'
+        parts.append(f'<nav class="pagination">{pagination}</nav></main></body></html>')
+        site[path] = ''.join(parts).encode('utf-8')
+    return site
+
+
+class FixtureServer:
+    """Serveur HTTP local du site genere (ETag et If-None-Match geres, sitemap.xml)
+
+    Avec throttle (req/s), un seau a jetons limite le debit : au-dela, le
+    serveur repond 429 avec Retry-After, comme un hote qui se protege.
+    latency (s) retarde chaque reponse, comme un hote distant.
+    """
+
+    def __init__(self, site, throttle=None, latency=0.0):
+        self.site = dict(site)
+        self.latency = latency
+        self.etags = {path: '"' + hashlib.sha1(body).hexdigest() + '"' for path, body in site.items()}
+        self.requests = 0
+        self.throttle = throttle
+        self.throttled = 0
+        self._tokens = float(throttle or 0)
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                if not server.admit():
+                    self.send_response(429)
+                    self.send_header('Retry-After', '1')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body = server.site.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                etag = server.etags[self.path]
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                content_type = 'application/xml' if self.path.endswith('.xml') else 'text/html; charset=utf-8'
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self.base_url = f'http://127.0.0.1:{self._httpd.server_address[1]}'
+        self.site['/sitemap.xml'] = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + ''.join(f'<url><loc>{self.base_url}{path}</loc></url>' for path in site)
+            + '</urlset>'
+        ).encode('utf-8')
+        self.etags['/sitemap.xml'] = '"' + hashlib.sha1(self.site['/sitemap.xml']).hexdigest() + '"'
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def admit(self):
+        """Accepter une requete, ou la refuser si le debit limite est depasse"""
+        if self.throttle is None:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.throttle, self._tokens + (now - self._refilled) * self.throttle)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.throttled += 1
+            return False
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def load_scraper():
+    """Importer le paquet du scraper (a cote de ce script)"""
+    if DOCS_DIR not in sys.path:
+        sys.path.insert(0, DOCS_DIR)
+    import vapi_scraper
+    return vapi_scraper
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_kb():
+    """Pic de memoire residente du processus (ru_maxrss est en octets sous macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_scenario(name, base_url, pages, workdir):
+    """Executer un scenario dans le processus courant et renvoyer ses mesures"""
+    scraper_module = load_scraper()
+    overrides = dict(SCENARIOS[name])
+    warmup = overrides.pop('warmup', False)
+    overrides.pop('throttle', None)
+    config = scraper_module.SCRAPER_CONFIG
+    config.update({
+        'start_url': base_url + '/docs/page-0000',
+        'base_url': base_url,
+        'output_file': os.path.join(workdir, 'kb.json'),
+        'pages_file': os.path.join(workdir, 'kb-pages.jsonl'),
+        'checkpoint_file': os.path.join(workdir, 'checkpoint.sqlite'),
+        'store_file': os.path.join(workdir, 'kb.sqlite'),
+        'search_index_file': os.path.join(workdir, 'kb-index.sqlite'),
+        'archive_file': os.path.join(workdir, 'pages.warc.gz'),
+        'metrics_file': os.path.join(workdir, 'metrics.json'),
+        'keywords_file': os.path.join(DOCS_DIR, 'vapi-keywords.txt'),
+        'max_pages': pages,
+        # Comme 'delay', la montee en debit de la politesse est une attente voulue : le serveur
+        # local suit, seuls les scenarios 'throttle' partent du debit prudent par defaut
+        'host_rate': 100.0,
+        'host_rate_max': None,
+        'delay': 0,
+        'retry_backoff': 0
+    })
+    logging.getLogger().setLevel(logging.WARNING)
+
+    config.update(overrides)
+    if warmup:
+        # Premier crawl complet non mesure : base precedente ou archive rejouee par le scenario
+        config.update(incremental=False, from_archive=False)
+        scraper_module.VapiSequentialScraper().run()
+        config.update(incremental=overrides.get('incremental', False),
+                      from_archive=overrides.get('from_archive', False))
+
+    scraper = scraper_module.VapiSequentialScraper()
+    latencies = []
+
+    def timed(method):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                latencies.append((time.perf_counter() - started) * 1000)
+        return wrapper
+
+    # En mode pipeline la latence mesuree est celle de l'etage de capture
+    if config.get('from_archive'):
+        scraper._archived_snapshot = timed(scraper._archived_snapshot)
+    elif config.get('pipeline'):
+        scraper._capture_snapshot = timed(scraper._capture_snapshot)
+    else:
+        scraper.fetch_page = timed(scraper.fetch_page)
+    started = time.perf_counter()
+    scraper.run()
+    elapsed = time.perf_counter() - started
+
+    output_bytes = sum(
+        os.path.getsize(path) for path in (
+            config['output_file'], config['output_file'].replace('.json', '-summary.json'),
+            config['pages_file'], config['store_file'], config['search_index_file']
+        ) if os.path.exists(path)
+    )
+    scraped = len(scraper.scraped_data['navigation_path'])
+    politeness = scraper.scraped_data['metadata'].get('politeness', {})
+    return {
+        'pages': scraped,
+        'elapsed_s': round(elapsed, 3),
+        'pages_per_second': round(scraped / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            key: round(percentile(latencies, fraction), 2)
+            for key, fraction in (('p50', 0.5), ('p90', 0.9), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))
+        },
+        'peak_rss_kb': peak_rss_kb(),
+        'output_bytes': output_bytes,
+        'politeness': {
+            'requests': sum(host['requests'] for host in politeness.values()),
+            'throttled': sum(host['throttled'] for host in politeness.values()),
+            'final_rate': max((host['rate'] for host in politeness.values()), default=None)
+        }
+    }
+
+
+def run_isolated(name, base_url, pages):
+    """Lancer un scenario dans un processus neuf (pic de RSS propre au scenario)"""
+    with tempfile.TemporaryDirectory(prefix=f'vapi-bench-{name}-') as workdir:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', name,
+             '--base-url', base_url, '--pages', str(pages), '--workdir', workdir],
+            cwd=workdir, capture_output=True, text=True
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Scenario {name} en echec:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def median_result(runs):
+    """Mediane de chaque mesure sur les executions d'un scenario"""
+    first = runs[0]
+    if isinstance(first, dict):
+        return {key: median_result([run.get(key) for run in runs]) for key in first}
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in runs):
+        return statistics.median(runs)
+    return first
+
+
+def _metric(result, path):
+    value = result
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Regressions par rapport a la baseline : liste de messages"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get('scenarios', {}).get(name)
+        if reference is None:
+            continue
+        if reference.get('pages') != result['pages']:
+            regressions.append(f"{name}: {result['pages']} pages au lieu de {reference.get('pages')}")
+        for path, direction in COMPARED_METRICS:
+            current, expected = _metric(result, path), _metric(reference, path)
+            if not current or not expected:
+                continue
+            change = (current - expected) / expected
+            if (direction == 'lower' and change < -tolerance) or (direction == 'higher' and change > tolerance):
+                regressions.append(f"{name}: {'.'.join(path)} {expected} -> {current} ({change:+.0%})")
+    return regressions
+
+
+def print_report(results, baseline):
+    header = f"{'scenario':<18}{'pages':>7}{'pages/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'RSS Mo':>9}{'sortie Ko':>11}"
+    print(header)
+    print('-' * len(header))
+    for name, result in results.items():
+        latency = result['latency_ms']
+        print(f"{name:<18}{result['pages']:>7}{result['pages_per_second']:>10.1f}{latency['p50']:>9.1f}"
+              f"{latency['p95']:>9.1f}{latency['p99']:>9.1f}{result['peak_rss_kb'] / 1024:>9.1f}"
+              f"{result['output_bytes'] / 1024:>11.1f}")
+        reference = (baseline or {}).get('scenarios', {}).get(name)
+        if reference:
+            print(f"{'  baseline':<18}{reference['pages']:>7}{reference['pages_per_second']:>10.1f}"
+                  f"{reference['latency_ms']['p50']:>9.1f}{reference['latency_ms']['p95']:>9.1f}"
+                  f"{reference['latency_ms']['p99']:>9.1f}{reference['peak_rss_kb'] / 1024:>9.1f}"
+                  f"{reference['output_bytes'] / 1024:>11.1f}")
+    for name, result in results.items():
+        throttle = SCENARIOS[name].get('throttle')
+        if throttle:
+            politeness = result['politeness']
+            print(f"\n{name}: serveur limite a {throttle} req/s, {politeness['throttled']} reponses 429 "
+                  f"sur {politeness['requests']} requetes, debit final {politeness['final_rate']} req/s")
+
+
+def parse_args():
+    """Lire les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Banc d'essai hors ligne du scraper Vapi")
+    parser.add_argument('--pages', type=int, default=BENCHMARK_CONFIG['pages'],
+                        help="Nombre de pages du site genere")
+    parser.add_argument('--page-size', type=int, default=BENCHMARK_CONFIG['page_size'],
+                        help="Taille approximative de chaque page (octets)")
+    parser.add_argument('--latency-ms', type=float, default=BENCHMARK_CONFIG['latency_ms'],
+                        help="Aller-retour reseau simule par reponse (ms)")
+    parser.add_argument('--scenarios', default=BENCHMARK_CONFIG['scenarios'],
+                        help=f"Scenarios separes par des virgules parmi: {', '.join(SCENARIOS)}")
+    parser.add_argument('--repeat', type=int, default=BENCHMARK_CONFIG['repeat'],
+                        help="Executions par scenario (mediane de chaque mesure)")
+    parser.add_argument('--baseline', default=BENCHMARK_CONFIG['baseline_file'],
+                        help="Fichier de baseline a comparer")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Enregistrer les resultats comme nouvelle baseline")
+    parser.add_argument('--tolerance', type=float, default=BENCHMARK_CONFIG['tolerance'],
+                        help="Ecart relatif tolere avant de signaler une regression")
+    parser.add_argument('--output', help="Ecrire aussi les resultats dans ce fichier JSON")
+    # Options internes du processus enfant
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        print(json.dumps(run_scenario(args.child, args.base_url, args.pages, args.workdir)))
+        return 0
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Scenarios inconnus: {', '.join(unknown)}")
+
+    site = generate_site(args.pages, args.page_size, BENCHMARK_CONFIG['sidebar_links'], BENCHMARK_CONFIG['seed'])
+    print(f"Site genere: {len(site)} pages, {sum(len(body) for body in site.values()) / 1024:.0f} Ko")
+    results = {}
+    latency = args.latency_ms / 1000
+    with FixtureServer(site, latency=latency) as server:
+        for name in names:
+            print(f"Scenario {name}...")
+            throttle = SCENARIOS[name].get('throttle')
+            runs = []
+            for _ in range(max(1, args.repeat)):
+                if throttle:
+                    with FixtureServer(site, throttle=throttle, latency=latency) as throttled_server:
+                        runs.append(run_isolated(name, throttled_server.base_url, args.pages))
+                else:
+                    runs.append(run_isolated(name, server.base_url, args.pages))
+            results[name] = median_result(runs)
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        # Debits et latences ne se comparent que sur la meme machine
+        'machine': {'system': platform.system(), 'arch': platform.machine(), 'cpus': os.cpu_count()},
+        'repeat': max(1, args.repeat),
+        'site': {'pages': args.pages, 'page_size': args.page_size, 'sidebar_links': BENCHMARK_CONFIG['sidebar_links'],
+                 'latency_ms': args.latency_ms},
+        'scenarios': results
+    }
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('site') != report['site']:
+            print("Baseline ignoree: site genere avec d'autres parametres")
+            baseline = None
+        elif baseline.get('machine') != report['machine']:
+            print("Baseline ignoree: enregistree sur une autre machine (relancer avec --save-baseline)")
+            baseline = None
+
+    print()
+    print_report(results, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline enregistree: {args.baseline}")
+        return 0
+    if baseline is None:
+        print("\nAucune baseline comparable (lancer avec --save-baseline)")
+        return 0
+
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print(f"\nAucune regression (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
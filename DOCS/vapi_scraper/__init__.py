@@ -0,0 +1,55 @@
+"""Scraper de la documentation Vapi
+
+Modules :
+    config           configuration par defaut (SCRAPER_CONFIG)
+    dom              mini DOM html.parser et selecteurs CSS
+    extraction       spec d'extraction et assemblage des pages
+    browser          navigateur allege et attente de stabilite
+    keywords         recherche des mots-cles (Aho-Corasick)
+    parameters       JSON tolerant et arbre des parametres
+    pipeline         extraction en processus separes
+    duplicates       pages en double ou quasi en double (MinHash)
+    instrumentation  duree des phases et histogrammes
+    storage          flux, point de reprise, archive, index et stockage
+    scheduling       frontiere d'URLs et politesse par hote
+    export           passages bornes en tokens et export Supabase
+    scraper          VapiSequentialScraper
+    cli              ligne de commande
+"""
+
+from .config import SCRAPER_CONFIG
+from .dom import HtmlNode, parse_html, select, select_one, text_content
+from .extraction import assemble_page_data, content_hash, extract_raw_static, parse_sitemap
+from .keywords import KeywordMatcher, find_keywords
+from .parameters import build_parameter_tree, extract_parameter_paths, parse_json_blocks
+from .duplicates import DuplicateDetector, NearDuplicateIndex
+from .instrumentation import Instrumentation
+from .storage import (
+    CrawlCheckpoint,
+    JsonlPageSink,
+    KnowledgeBaseIndex,
+    KnowledgeBaseStore,
+    PageArchive,
+    parameter_paths,
+    search,
+)
+from .scheduling import CrawlFrontier, HostScheduler
+from .export import SupabaseChunkExporter, chunk_text, export_supabase
+from .scraper import VapiSequentialScraper
+from .cli import main, parse_args
+
+__all__ = [
+    'SCRAPER_CONFIG',
+    'HtmlNode', 'parse_html', 'select', 'select_one', 'text_content',
+    'assemble_page_data', 'content_hash', 'extract_raw_static', 'parse_sitemap',
+    'KeywordMatcher', 'find_keywords',
+    'build_parameter_tree', 'extract_parameter_paths', 'parse_json_blocks',
+    'DuplicateDetector', 'NearDuplicateIndex',
+    'Instrumentation',
+    'CrawlCheckpoint', 'JsonlPageSink', 'KnowledgeBaseIndex', 'KnowledgeBaseStore', 'PageArchive',
+    'parameter_paths', 'search',
+    'CrawlFrontier', 'HostScheduler',
+    'SupabaseChunkExporter', 'chunk_text', 'export_supabase',
+    'VapiSequentialScraper',
+    'main', 'parse_args',
+]
@@ -0,0 +1,116 @@
+"""Navigateur allege, mesure memoire de Chrome et attente de stabilite de la page"""
+
+import os
+
+try:
+    import psutil  # Optionnel : mesure de la memoire de Chrome hors Linux
+except ImportError:
+    psutil = None
+
+
+# Motifs d'URL bloques par type de ressource en mode navigateur allege
+LEAN_RESOURCE_PATTERNS = {
+    'image': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico'],
+    'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'stylesheet': ['*.css'],
+    'media': ['*.mp4', '*.webm', '*.mov', '*.mp3', '*.wav', '*.m3u8']
+}
+
+# Octets transferes par la page courante (document et sous-ressources)
+TRANSFER_SIZE_JS = """
+return performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'))
+  .reduce((total, entry) => total + (entry.transferSize || 0), 0);
+"""
+
+
+def lean_blocked_patterns(config):
+    """Motifs Network.setBlockedURLs du mode allege (types puis hotes tiers)"""
+    patterns = []
+    for resource_type in config['lean_blocked_types']:
+        patterns.extend(LEAN_RESOURCE_PATTERNS.get(resource_type, []))
+    allowed = set(config['lean_allowed_hosts'])
+    for host in config['lean_blocked_hosts']:
+        if host not in allowed:
+            patterns.extend([f'*://{host}/*', f'*://*.{host}/*'])
+    return patterns
+
+
+def process_tree_rss(pid):
+    """Memoire residente (octets) d'un processus et de ses descendants, ou None"""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            return sum(process.memory_info().rss for process in [root] + root.children(recursive=True))
+        except psutil.Error:
+            return None
+    if not os.path.isdir('/proc'):
+        return None
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat', 'r') as f:
+                    # Le nom du processus peut contenir des espaces : lire apres la parenthese fermante
+                    parent = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(parent, []).append(int(entry))
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/statm', 'r') as f:
+                total += int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+# Attente adaptative : la page est prete quand le reseau (fetch/XHR/ressources)
+# est inactif et que le DOM ne change plus pendant une fenetre de calme.
+# Le script d'amorce est injecte avant les scripts de la page (CDP) ; a defaut,
+# SETTLE_WAIT_JS l'installe lui-meme au premier appel.
+SETTLE_BOOTSTRAP_JS = """
+(() => {
+  if (window.__vapiSettle) return;
+  const state = window.__vapiSettle = {inflight: 0, lastActivity: performance.now()};
+  const touch = () => { state.lastActivity = performance.now(); };
+  const fetch = window.fetch;
+  if (fetch) {
+    window.fetch = function (...args) {
+      state.inflight++;
+      touch();
+      return fetch.apply(this, args).finally(() => { state.inflight--; touch(); });
+    };
+  }
+  const send = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function (...args) {
+    state.inflight++;
+    touch();
+    this.addEventListener('loadend', () => { state.inflight--; touch(); }, {once: true});
+    return send.apply(this, args);
+  };
+  new MutationObserver(touch).observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+  if (window.PerformanceObserver) {
+    try { new PerformanceObserver(touch).observe({type: 'resource'}); } catch (e) {}
+  }
+})();
+"""
+
+SETTLE_WAIT_JS = SETTLE_BOOTSTRAP_JS + """
+const [quietMs, timeoutMs] = arguments;
+const done = arguments[arguments.length - 1];
+const state = window.__vapiSettle;
+const started = performance.now();
+(function poll() {
+  const now = performance.now();
+  const idle = document.readyState !== 'loading' && state.inflight <= 0 && now - state.lastActivity >= quietMs;
+  if (idle || now - started >= timeoutMs) {
+    done({settled: idle, waited_ms: Math.round(now - started)});
+    return;
+  }
+  setTimeout(poll, 50);
+})();
+"""
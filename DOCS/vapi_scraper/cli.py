@@ -0,0 +1,191 @@
+"""Ligne de commande du scraper"""
+
+import argparse
+import json
+import os
+import time
+
+from .config import SCRAPER_CONFIG
+from .storage import iter_knowledge_base_pages, KnowledgeBaseStore, parameter_paths, search
+from .export import export_supabase
+from .scraper import VapiSequentialScraper
+
+
+def parse_args():
+    """Lire les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Scraper de la documentation Vapi")
+    parser.add_argument('--workers', type=int, default=SCRAPER_CONFIG['workers'],
+                        help="Nombre de navigateurs en parallele (1 = sequentiel)")
+    parser.add_argument('--fetch-mode', choices=['browser', 'auto'], default=SCRAPER_CONFIG['fetch_mode'],
+                        help="'auto' : HTTP + parseur HTML, navigateur seulement en repli")
+    parser.add_argument('--discovery', choices=['next', 'sitemap', 'sidebar', 'auto'],
+                        default=SCRAPER_CONFIG['discovery'],
+                        help="Liste des pages connue d'avance (sitemap.xml, barre laterale) au lieu des liens Next")
+    parser.add_argument('--pipeline', action='store_true', default=SCRAPER_CONFIG['pipeline'],
+                        help="Capture, extraction (pool de processus) et fusion en etages paralleles")
+    parser.add_argument('--incremental', action='store_true', default=SCRAPER_CONFIG['incremental'],
+                        help="Reprendre les pages inchangees (ETag, Last-Modified, hash du contenu)")
+    parser.add_argument('--stream', action='store_true', default=SCRAPER_CONFIG['stream_output'],
+                        help="Ecrire les pages au fil de l'eau dans un fichier .jsonl")
+    parser.add_argument('--checkpoint', action='store_true', default=SCRAPER_CONFIG['checkpoint'],
+                        help="Tenir un point de reprise durable pendant le crawl (pour --resume)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reprendre le crawl interrompu depuis le point de reprise")
+    parser.add_argument('--archive', action='store_true', default=SCRAPER_CONFIG['archive'],
+                        help="Archiver le HTML brut de chaque page (pour --from-archive)")
+    parser.add_argument('--store', action='store_true', default=SCRAPER_CONFIG['store'],
+                        help="Ecrire aussi le stockage compact SQLite (pour --export-json et --parameters)")
+    parser.add_argument('--search-index', action='store_true', default=SCRAPER_CONFIG['search_index'],
+                        help="Construire l'index de recherche plein texte en fin de crawl")
+    parser.add_argument('--politeness', action='store_true', default=SCRAPER_CONFIG['politeness'],
+                        help="Adapter debit et concurrence a chaque hote (seau a jetons + AIMD)")
+    parser.add_argument('--near-duplicates', action='store_true', default=SCRAPER_CONFIG['near_duplicates'],
+                        help="Reperer pages et blocs de code quasi identiques (references au lieu de copies)")
+    parser.add_argument('--from-archive', nargs='?', const=SCRAPER_CONFIG['archive_file'], metavar='ARCHIVE',
+                        help="Re-extraire depuis l'archive des pages brutes, sans reseau ni navigateur")
+    parser.add_argument('--skip-duplicates', action='store_true', default=SCRAPER_CONFIG['duplicate_skip_extraction'],
+                        help="Ne pas chercher mots-cles et parametres dans les pages quasi identiques a une page deja vue "
+                             "(implique --near-duplicates)")
+    parser.add_argument('--keywords-file', default=SCRAPER_CONFIG['keywords_file'],
+                        help="Fichier des mots-cles recherches (un par ligne)")
+    parser.add_argument('--lean-browser', action='store_true', default=SCRAPER_CONFIG['lean_browser'],
+                        help="Bloquer images, polices, CSS, medias et traceurs tiers dans le navigateur")
+    parser.add_argument('--metrics', action='store_true', default=SCRAPER_CONFIG['instrumentation'],
+                        help="Chronometrer chaque phase et ecrire les fichiers de metriques")
+    parser.add_argument('--search', metavar='REQUETE',
+                        help="Chercher dans la base de connaissances existante au lieu de scrapper")
+    parser.add_argument('--export-json', metavar='FICHIER',
+                        help="Reexporter le JSON complet depuis le stockage compact au lieu de scrapper")
+    parser.add_argument('--export-supabase', nargs='?', const='', metavar='DSN',
+                        help="Exporter les passages de la base existante vers Supabase (defaut: SUPABASE_DB_URL) "
+                             "au lieu de scrapper")
+    parser.add_argument('--parameters', nargs='?', const='', metavar='PREFIXE',
+                        help="Lister les chemins de parametres sous un prefixe (ex. voice, tools[])")
+    parser.add_argument('--limit', type=int, default=10,
+                        help="Nombre de resultats affiches par --search")
+    return parser.parse_args()
+
+
+def main():
+    """Point d'entree de la ligne de commande"""
+    args = parse_args()
+    SCRAPER_CONFIG['workers'] = max(1, args.workers)
+    SCRAPER_CONFIG['fetch_mode'] = args.fetch_mode
+    SCRAPER_CONFIG['discovery'] = args.discovery
+    SCRAPER_CONFIG['pipeline'] = args.pipeline
+    SCRAPER_CONFIG['incremental'] = args.incremental
+    SCRAPER_CONFIG['stream_output'] = args.stream
+    SCRAPER_CONFIG['resume'] = args.resume
+    SCRAPER_CONFIG['checkpoint'] = args.checkpoint or args.resume
+    SCRAPER_CONFIG['archive'] = args.archive
+    SCRAPER_CONFIG['store'] = args.store
+    SCRAPER_CONFIG['search_index'] = args.search_index
+    SCRAPER_CONFIG['politeness'] = args.politeness
+    SCRAPER_CONFIG['near_duplicates'] = args.near_duplicates or args.skip_duplicates
+    SCRAPER_CONFIG['keywords_file'] = args.keywords_file
+    SCRAPER_CONFIG['instrumentation'] = args.metrics
+    SCRAPER_CONFIG['lean_browser'] = args.lean_browser
+    SCRAPER_CONFIG['duplicate_skip_extraction'] = args.skip_duplicates
+    if args.from_archive:
+        SCRAPER_CONFIG['archive_file'] = args.from_archive
+        SCRAPER_CONFIG['from_archive'] = True
+
+    if args.export_json:
+        if not os.path.exists(SCRAPER_CONFIG['store_file']):
+            raise SystemExit(f"Stockage introuvable (crawl avec --store): {SCRAPER_CONFIG['store_file']}")
+        store = KnowledgeBaseStore(SCRAPER_CONFIG['store_file'])
+        try:
+            store.export_json(args.export_json)
+        finally:
+            store.close()
+        print(f"Base exportee depuis {SCRAPER_CONFIG['store_file']} vers {args.export_json}")
+        raise SystemExit(0)
+
+    if args.export_supabase is not None:
+        if os.path.exists(SCRAPER_CONFIG['store_file'] or ''):
+            store = KnowledgeBaseStore(SCRAPER_CONFIG['store_file'])
+            pages, metadata = ((url, page_data) for url, page_data, _ in store.iter_pages()), store.metadata()
+        else:
+            store = None
+            with open(SCRAPER_CONFIG['output_file'], 'r', encoding='utf-8') as f:
+                metadata = json.load(f).get('metadata', {})
+            pages = iter_knowledge_base_pages(SCRAPER_CONFIG['output_file'])
+        try:
+            stats = export_supabase(pages, metadata, dsn=args.export_supabase or None)
+        except (RuntimeError, ValueError) as e:
+            raise SystemExit(str(e))
+        finally:
+            if store is not None:
+                store.close()
+        print(f"{stats['chunks']} passages ({stats['upserted']} envoyes, {stats['unchanged']} inchanges, "
+              f"{stats['deleted']} supprimes) en {stats['seconds']}s: {stats['rows_per_second']} lignes/s")
+        raise SystemExit(0)
+
+    if args.search:
+        started = time.perf_counter()
+        try:
+            results = search(args.search, limit=args.limit)
+        except FileNotFoundError as e:
+            raise SystemExit(str(e))
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"{len(results)} resultat(s) pour '{args.search}' ({elapsed:.1f} ms)")
+        for result in results:
+            context = ' > '.join(result['headings'][:3])
+            print(f"\n[{result['score']:.2f}] {result['title']} ({result['kind']})")
+            print(f"  {result['url']}")
+            if context:
+                print(f"  {context}")
+            print(f"  {' '.join(result['snippet'].split())}")
+        raise SystemExit(0)
+
+    if args.parameters is not None:
+        try:
+            nodes = parameter_paths(args.parameters)
+        except FileNotFoundError as e:
+            raise SystemExit(str(e))
+        print(f"{len(nodes)} chemin(s) de parametres sous '{args.parameters or '*'}'")
+        for path, node in nodes.items():
+            types = '|'.join(node['types']) or '?'
+            examples = ', '.join(json.dumps(example, ensure_ascii=False) for example in node['examples'][:3])
+            print(f"\n{path} ({types})" + (f" ex: {examples}" if examples else ''))
+            if node.get('description'):
+                print(f"  {node['description']}")
+            for url in node['sources'][:3]:
+                print(f"  {url}")
+        raise SystemExit(0)
+
+    print("VAPI DOCUMENTATION SEQUENTIAL SCRAPER")
+    print("=====================================")
+    print(f"URL de depart: {SCRAPER_CONFIG['start_url']}")
+    print(f"Fichier de sortie: {SCRAPER_CONFIG['output_file']}")
+    print(f"Delai entre pages: {SCRAPER_CONFIG['delay']}s")
+    print(f"Limite de pages: {SCRAPER_CONFIG['max_pages']}")
+    print(f"Workers: {SCRAPER_CONFIG['workers']}")
+    print(f"Mode de recuperation: {SCRAPER_CONFIG['fetch_mode']}")
+    print(f"Decouverte des pages: {SCRAPER_CONFIG['discovery']}")
+    print(f"Mode incremental: {'oui' if SCRAPER_CONFIG['incremental'] else 'non'}")
+    if SCRAPER_CONFIG['politeness']:
+        print(f"Politesse adaptative: depart a {SCRAPER_CONFIG['host_rate']} req/s par hote, "
+              f"plafond {SCRAPER_CONFIG['host_rate_max'] or 'aucun'}")
+    if SCRAPER_CONFIG['lean_browser']:
+        print(f"Navigateur allege: recycle toutes les {SCRAPER_CONFIG['driver_max_pages']} pages "
+              f"ou au-dela de {SCRAPER_CONFIG['driver_max_rss_mb']} Mo")
+    if SCRAPER_CONFIG['stream_output']:
+        print(f"Pages en flux: {SCRAPER_CONFIG['pages_file']}")
+    if SCRAPER_CONFIG['resume']:
+        print(f"Reprise depuis: {SCRAPER_CONFIG['checkpoint_file']}")
+    elif SCRAPER_CONFIG['checkpoint']:
+        print(f"Point de reprise: {SCRAPER_CONFIG['checkpoint_file']}")
+    if SCRAPER_CONFIG['archive']:
+        print(f"Archive des pages brutes: {SCRAPER_CONFIG['archive_file']}")
+    if SCRAPER_CONFIG['store']:
+        print(f"Stockage compact: {SCRAPER_CONFIG['store_file']}")
+    if SCRAPER_CONFIG['from_archive']:
+        print(f"Rejeu hors ligne depuis: {SCRAPER_CONFIG['archive_file']}")
+    print()
+    
+    try:
+        scraper = VapiSequentialScraper()
+    except FileNotFoundError as e:
+        raise SystemExit(str(e))
+    scraper.run()
@@ -0,0 +1,72 @@
+"""Configuration par defaut du scraper (dictionnaire partage par tous les modules)"""
+
+import os
+
+# Dossier DOCS (parent du paquet) : fichiers livres avec le scraper, quel que soit le repertoire courant
+PACKAGE_DATA_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Configuration du scraper
+SCRAPER_CONFIG = {
+    'start_url': 'https://docs.vapi.ai/quickstart/dashboard',
+    'base_url': 'https://docs.vapi.ai',
+    'output_file': './DOCS/vapi-knowledge-base-complete.json',
+    'delay': 2,  # Attente maximale (s) apres chargement ; la page est lue des qu'elle est stable
+    'settle_quiet_ms': 500,  # Fenetre sans mutation DOM ni requete reseau pour juger la page prete
+    'page_load_strategy': 'eager',  # driver.get rend la main au DOMContentLoaded
+    'max_pages': 500,  # Limite augmentée pour scrapper toute la doc
+    'timeout': 30,
+    # 'next' : suivre les liens Next ; 'sitemap', 'sidebar' ou 'auto' : liste complete des pages d'abord
+    'discovery': 'next',
+    'workers': 1,  # Nombre de navigateurs en parallele (1 = mode sequentiel)
+    'pipeline': False,  # Capture (threads) / extraction (processus) / fusion, avec files bornees
+    'extract_processes': os.cpu_count() or 2,  # Processus d'extraction du pipeline
+    'queue_size': 32,  # Capacite de chaque file du pipeline
+    # 'browser' : toujours Selenium ; 'auto' : HTTP + parseur HTML, navigateur en repli
+    'fetch_mode': 'browser',
+    'incremental': False,  # Reprendre les pages inchangees de la base precedente
+    'stream_output': False,  # Ecrire chaque page dans un .jsonl au lieu de tout garder en memoire
+    'pages_file': './DOCS/vapi-knowledge-base-pages.jsonl',
+    'checkpoint': False,  # Point de reprise durable pendant le crawl (--checkpoint, implique par --resume)
+    'checkpoint_file': './DOCS/vapi-scraper-checkpoint.sqlite',
+    'retries': 3,  # Nouvelles tentatives avant de sauter une page en echec
+    'retry_backoff': 2,  # Delai initial (s) entre deux tentatives, double a chaque echec (avec gigue)
+    'politeness': False,  # Debit et concurrence adaptes a chaque hote (seau a jetons + AIMD)
+    'host_rate': 2.0,  # Requetes/s de depart par hote, augmentees tant que l'hote suit
+    'host_rate_min': 0.2,
+    'host_rate_max': 10.0,  # Plafond de debit par hote (None = sans plafond)
+    'host_rate_step': 0.5,  # Hausse additive (req/s par seconde) apres la premiere congestion
+    'host_backoff': 0.5,  # Facteur de baisse sur 429/5xx, erreur reseau ou latence excessive
+    'host_latency_factor': 4,  # Latence excessive : au-dela de N fois la meilleure observee
+    'retry_after_max': 120,  # Attente maximale (s) accordee a un Retry-After
+    'resume': False,
+    'archive': False,  # Archiver le HTML brut de chaque page (--archive)
+    'archive_file': './DOCS/vapi-pages-archive.warc.gz',
+    'from_archive': False,  # Re-extraire depuis l'archive, sans reseau ni navigateur
+    'store': False,  # Ecrire aussi le stockage compact SQLite (--store)
+    'store_file': './DOCS/vapi-knowledge-base.sqlite',
+    'search_index': False,  # Construire l'index plein texte en fin de crawl (sinon --search le construit au besoin)
+    'search_index_file': './DOCS/vapi-knowledge-base-index.sqlite',
+    'instrumentation': False,  # Chronometrer chaque phase (metadata.timings + fichiers de metriques)
+    'metrics_file': './DOCS/vapi-scraper-metrics.json',  # Plus un instantane Prometheus en .prom
+    'keywords_file': os.path.join(PACKAGE_DATA_DIR, 'vapi-keywords.txt'),  # Mots-cles recherches dans chaque page
+    'keyword_max_offsets': 20,  # Positions conservees par mot-cle et par page
+    'supabase_db_url': os.environ.get('SUPABASE_DB_URL'),  # Postgres Supabase, de preference via le pooler (port 6543)
+    'supabase_export': False,  # Exporter les passages vers Supabase a la fin du scrapping
+    'supabase_knowledge_base': 'vapi-docs',  # vapi_knowledge_base_id de la ligne knowledge_bases alimentee
+    'supabase_batch_size': 1000,  # Lignes par lot envoye
+    'supabase_copy': True,  # COPY vers une table temporaire puis fusion ; sinon INSERT multi-lignes par lots
+    'chunk_max_tokens': 400,  # Taille maximale (tokens estimes) d'un passage exporte
+    'near_duplicates': False,  # Signatures MinHash : pages et blocs quasi identiques stockes en reference
+    'duplicate_similarity': 0.8,  # Jaccard estime des triplets de mots a partir duquel deux contenus sont doublons
+    'duplicate_skip_extraction': False,  # Ne pas chercher mots-cles et parametres dans une page en double (avec near_duplicates)
+    'lean_browser': False,  # Bloquer les ressources inutiles a l'extraction (CDP)
+    'lean_blocked_types': ['image', 'font', 'stylesheet', 'media'],
+    'lean_blocked_hosts': [
+        'google-analytics.com', 'googletagmanager.com', 'segment.io', 'segment.com', 'intercom.io',
+        'intercomcdn.com', 'hotjar.com', 'posthog.com', 'sentry.io', 'fonts.googleapis.com', 'fonts.gstatic.com'
+    ],
+    'lean_allowed_hosts': [],  # Hotes jamais bloques, meme s'ils figurent dans la liste ci-dessus
+    'driver_max_pages': 100,  # Recycler un navigateur apres N pages (0 = jamais)
+    'driver_max_rss_mb': 1500,  # ... ou au-dela de cette memoire (Chrome et ses processus)
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
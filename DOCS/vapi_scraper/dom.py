@@ -0,0 +1,232 @@
+"""Mini DOM construit avec html.parser et selecteurs CSS simples, sans navigateur"""
+
+import functools
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+
+# Extraction statique : mini DOM construit avec html.parser, sans navigateur
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+}
+
+HIDDEN_TAGS = {'head', 'script', 'style', 'noscript', 'template'}
+
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li',
+    'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'tr', 'ul'
+}
+
+_SELECTOR_COMBINATOR = re.compile(r'\s*>\s*|\s+')
+
+_SELECTOR_TOKEN = re.compile(r'''
+    (?P<tag>\*|[a-zA-Z][\w-]*)
+  | \.(?P<cls>[\w-]+)
+  | \#(?P<id>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$~]?=)\s*(?P<quote>["']?)(?P<val>.*?)(?P=quote)\s*(?P<flag>[iI])?\s*)?\]
+  | :(?P<pseudo>first-child|last-child)
+''', re.VERBOSE)
+
+
+class HtmlNode:
+    """Element HTML minimal, equivalent statique d'un noeud du DOM"""
+
+    __slots__ = ('tag', 'attrs', 'parent', 'children')
+
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.parent = parent
+        self.children = []
+
+    def iter(self):
+        """Parcourir les elements descendants dans l'ordre du document"""
+        stack = [c for c in reversed(self.children) if isinstance(c, HtmlNode)]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(c for c in reversed(node.children) if isinstance(c, HtmlNode))
+
+    def href(self, base_url):
+        """Equivalent de element.href : URL absolue d'un lien, ou None"""
+        if self.tag != 'a' or 'href' not in self.attrs:
+            return None
+        return urljoin(base_url, self.attrs['href'])
+
+
+class _DomBuilder(HTMLParser):
+    """Construire un arbre HtmlNode a partir du HTML brut"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = HtmlNode('#document')
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = HtmlNode(tag, {name: value or '' for name, value in attrs}, self.current)
+        self.current.children.append(node)
+        if tag not in VOID_TAGS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        node = HtmlNode(tag, {name: value or '' for name, value in attrs}, self.current)
+        self.current.children.append(node)
+
+    def handle_endtag(self, tag):
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+
+def parse_html(html):
+    """Parser un document HTML en arbre HtmlNode"""
+    builder = _DomBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def _iter_text(node):
+    """Parcourir les textes d'un noeud (iteratif pour supporter le HTML mal ferme)"""
+    stack = [iter(node.children)]
+    while stack:
+        for child in stack[-1]:
+            if isinstance(child, str):
+                yield child
+            else:
+                stack.append(iter(child.children))
+                break
+        else:
+            stack.pop()
+
+
+def text_content(node):
+    """Equivalent de textContent (scripts et styles compris)"""
+    return ''.join(_iter_text(node)) if node is not None else ''
+
+
+@functools.lru_cache(maxsize=None)
+def compile_selector(selector):
+    """Compiler un selecteur CSS simple (tag, .classe, #id, [attr], :last-child, descendant, >)"""
+    chains = []
+    for part in selector.split(','):
+        part = part.strip()
+        chain = []
+        compound = []
+        combinator = None
+        pos = 0
+        while pos < len(part):
+            match = _SELECTOR_COMBINATOR.match(part, pos)
+            if match:
+                chain.append((combinator, tuple(compound)))
+                compound = []
+                combinator = '>' if '>' in match.group() else ' '
+                pos = match.end()
+                continue
+            match = _SELECTOR_TOKEN.match(part, pos)
+            if not match:
+                raise ValueError(f"Selecteur non supporte: {selector}")
+            if match.group('tag'):
+                compound.append(('tag', match.group('tag').lower()))
+            elif match.group('cls'):
+                compound.append(('class', match.group('cls')))
+            elif match.group('id'):
+                compound.append(('id', match.group('id')))
+            elif match.group('attr'):
+                compound.append(('attr', match.group('attr').lower(), match.group('op'),
+                                 match.group('val'), bool(match.group('flag'))))
+            else:
+                compound.append(('pseudo', match.group('pseudo')))
+            pos = match.end()
+        chain.append((combinator, tuple(compound)))
+        chains.append(tuple(chain))
+    return tuple(chains)
+
+
+def _match_compound(node, tests):
+    if node.tag.startswith('#'):
+        return False
+    for test in tests:
+        kind = test[0]
+        if kind == 'tag':
+            if test[1] != '*' and node.tag != test[1]:
+                return False
+        elif kind == 'class':
+            if test[1] not in node.attrs.get('class', '').split():
+                return False
+        elif kind == 'id':
+            if node.attrs.get('id') != test[1]:
+                return False
+        elif kind == 'attr':
+            _, name, op, expected, ignore_case = test
+            value = node.attrs.get(name)
+            if value is None:
+                return False
+            if op is None:
+                continue
+            if ignore_case:
+                value, expected = value.lower(), expected.lower()
+            if op == '=' and value != expected:
+                return False
+            if op == '*=' and (not expected or expected not in value):
+                return False
+            if op == '^=' and (not expected or not value.startswith(expected)):
+                return False
+            if op == '$=' and (not expected or not value.endswith(expected)):
+                return False
+            if op == '~=' and expected not in value.split():
+                return False
+        else:
+            parent = node.parent
+            siblings = [c for c in parent.children if isinstance(c, HtmlNode)] if parent else [node]
+            if siblings[-1 if test[1] == 'last-child' else 0] is not node:
+                return False
+    return True
+
+
+def _match_chain(node, chain, index):
+    combinator, tests = chain[index]
+    if not _match_compound(node, tests):
+        return False
+    if index == 0:
+        return True
+    if combinator == '>':
+        return node.parent is not None and _match_chain(node.parent, chain, index - 1)
+    ancestor = node.parent
+    while ancestor is not None:
+        if _match_chain(ancestor, chain, index - 1):
+            return True
+        ancestor = ancestor.parent
+    return False
+
+
+def matches(node, selector):
+    """Equivalent de element.matches(selector)"""
+    return any(_match_chain(node, chain, len(chain) - 1) for chain in compile_selector(selector))
+
+
+def select(root, selector):
+    """Equivalent de querySelectorAll : elements correspondants dans l'ordre du document"""
+    return [node for node in root.iter() if matches(node, selector)]
+
+
+def select_one(root, selector):
+    """Equivalent de querySelector"""
+    return next((node for node in root.iter() if matches(node, selector)), None)
+
+
+def closest(node, selector):
+    """Equivalent de element.closest(selector)"""
+    while node is not None:
+        if matches(node, selector):
+            return node
+        node = node.parent
+    return None
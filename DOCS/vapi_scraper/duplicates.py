@@ -0,0 +1,234 @@
+"""Detection des pages en double ou quasi en double (MinHash)"""
+
+import array
+import hashlib
+import heapq
+import re
+import threading
+import zlib
+from collections import Counter
+
+
+def canonical_entries(page_data, key):
+    """Exemples ou schemas propres a la page (sans les references vers un doublon deja vu)"""
+    return [entry for entry in page_data.get(key, []) if 'duplicate_of' not in entry]
+
+
+# Empreintes de quasi-doublons : esquisses MinHash (k plus petites empreintes des triplets de mots)
+MINHASH_SIZE = 64
+
+MINHASH_SHINGLE = 3
+
+# Seules les plus petites valeurs d'une esquisse sont indexees : assez pour trouver les candidats
+MINHASH_INDEXED = 16
+
+# En dessous, une esquisse est trop peu fiable : seuls les doublons exacts comptent
+DUPLICATE_MIN_TOKENS = 24
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def fingerprint_tokens(*texts):
+    return [token for text in texts for token in _TOKEN_PATTERN.findall(text.lower())]
+
+
+def minhash(tokens):
+    """Esquisse MinHash 'bottom-k' : les MINHASH_SIZE plus petites empreintes 32 bits des triplets de tokens
+
+    Un seul hachage par triplet : bien moins couteux que k permutations,
+    pour la meme estimation du Jaccard.
+    """
+    if len(tokens) >= MINHASH_SHINGLE:
+        shingles = set(map(' '.join, zip(*(tokens[i:] for i in range(MINHASH_SHINGLE)))))
+    else:
+        shingles = {' '.join(tokens)}
+    # CRC32 (stable d'un processus a l'autre) puis melange multiplicatif pour casser sa linearite
+    hashes = {(zlib.crc32(shingle.encode('utf-8')) * 0x9E3779B1) & 0xffffffff for shingle in shingles}
+    return tuple(heapq.nsmallest(MINHASH_SIZE, hashes))
+
+
+def sketch_similarity(a, b):
+    """Jaccard estime : part des k plus petites empreintes de l'union presentes dans les deux esquisses"""
+    union = heapq.nsmallest(MINHASH_SIZE, set(a) | set(b))
+    common = set(a) & set(b)
+    return sum(value in common for value in union) / len(union) if union else 1.0
+
+
+def encode_signature(signature):
+    return ''.join(f'{value:08x}' for value in signature)
+
+
+def decode_signature(text):
+    return tuple(int(text[i:i + 8], 16) for i in range(0, len(text), 8))
+
+
+def page_fingerprint_tokens(text, blocks):
+    """Tokens d'une page : texte principal, et blocs de code quand le texte manque"""
+    return fingerprint_tokens(text) or fingerprint_tokens(*blocks)
+
+
+class NearDuplicateIndex:
+    """Index inverse des esquisses MinHash deja vues
+
+    Deux contenus proches partagent la plupart de leurs plus petites
+    empreintes : seuls les candidats qui partagent assez des
+    MINHASH_INDEXED premieres sont compares, puis retenus si leur
+    similarite estimee atteint le seuil.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self._signatures = []
+        self._postings = {}
+        self._exact = {}
+        self._lock = threading.Lock()
+
+    def find(self, signature, exact=False):
+        """(cle canonique, similarite estimee) du contenu le plus proche, ou None"""
+        packed = array.array('I', signature).tobytes()
+        with self._lock:
+            if packed in self._exact:
+                return self._exact[packed], 1.0
+            if exact or not signature:
+                return None
+            prefix = signature[:MINHASH_INDEXED]
+            shared = Counter(ident for value in prefix for ident in self._postings.get(value, ()))
+            minimum = max(1, int(self.threshold * len(prefix) / 2))
+            best = None
+            for ident, count in shared.items():
+                if count < minimum:
+                    continue
+                candidate, key = self._signatures[ident]
+                similarity = sketch_similarity(candidate, signature)
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (key, similarity)
+            return best
+
+    def add(self, signature, key):
+        """Enregistrer une esquisse canonique (la premiere vue garde la cle)"""
+        packed = array.array('I', signature)
+        with self._lock:
+            if packed.tobytes() in self._exact:
+                return
+            # Esquisses gardees en tableaux 32 bits : 4 octets par valeur au lieu d'un int Python
+            self._exact[packed.tobytes()] = key
+            ident = len(self._signatures)
+            self._signatures.append((packed, key))
+            for value in signature[:MINHASH_INDEXED]:
+                self._postings.setdefault(value, []).append(ident)
+
+
+class DuplicateDetector:
+    """Detection des pages et blocs de code quasi identiques, au fil du crawl
+
+    La premiere page (ou le premier bloc) vue est canonique ; une page
+    proche recoit duplicate_of, et ses blocs proches d'un bloc deja vu sont
+    remplaces par une reference {url, position} sans leur contenu.
+    """
+
+    BLOCK_KEYS = ('examples', 'schemas')
+
+    def __init__(self, threshold):
+        self.pages = NearDuplicateIndex(threshold)
+        self.blocks = {key: NearDuplicateIndex(threshold) for key in self.BLOCK_KEYS}
+        # Blocs identiques au caractere pres (les plus frequents) : reconnus par leur hash, sans esquisse
+        self._identical = {key: {} for key in self.BLOCK_KEYS}
+        # Chercher puis enregistrer d'un seul tenant : deux workers ne deviennent pas canoniques ensemble
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _page_tokens(cls, text, page_data):
+        blocks = [entry.get('content', '') for key in cls.BLOCK_KEYS for entry in page_data.get(key, [])]
+        return page_fingerprint_tokens(text, blocks)
+
+    @staticmethod
+    def _match(index, tokens):
+        signature = minhash(tokens)
+        return signature, index.find(signature, exact=len(tokens) < DUPLICATE_MIN_TOKENS)
+
+    def _add_block(self, key, url, position, content, signature=None):
+        if signature is None:
+            signature = minhash(fingerprint_tokens(content))
+        self.blocks[key].add(signature, (url, position))
+        self._identical[key].setdefault(hashlib.sha1(content.encode('utf-8')).digest(), (url, position))
+
+    def _match_block(self, key, url, position, content):
+        """((url, position), similarite) du bloc canonique proche, ou None apres l'avoir enregistre"""
+        canonical = self._identical[key].get(hashlib.sha1(content.encode('utf-8')).digest())
+        if canonical is not None:
+            return canonical, 1.0
+        signature, match = self._match(self.blocks[key], fingerprint_tokens(content))
+        if match is None:
+            self._add_block(key, url, position, content, signature)
+        return match
+
+    def match_raw(self, raw):
+        """URL canonique d'une page extraite (collections brutes), avant l'extraction fine"""
+        _, match = self._match(self.pages, self._page_tokens(raw['main']['text'] if raw['main'] else '', raw))
+        return match[0] if match else None
+
+    def match_page(self, page_data):
+        """URL canonique d'une page assemblee sans extraction fine (pipeline)"""
+        _, match = self._match(self.pages, self._page_tokens(page_data.get('content', {}).get('text', ''), page_data))
+        return match[0] if match else None
+
+    def process(self, url, page_data):
+        """page_data avec signature et references vers les doublons ; enregistre le reste comme canonique"""
+        with self._lock:
+            return self._process(url, dict(page_data))
+
+    def _process(self, url, page_data):
+        signature, match = self._match(
+            self.pages, self._page_tokens(page_data.get('content', {}).get('text', ''), page_data))
+        page_data['fingerprint'] = encode_signature(signature)
+        if match is not None:
+            page_data['duplicate_of'] = {'url': match[0], 'similarity': round(match[1], 3)}
+        else:
+            self.pages.add(signature, url)
+        for key in self.BLOCK_KEYS:
+            if key not in page_data:
+                continue
+            entries = []
+            for position, entry in enumerate(page_data[key]):
+                match = self._match_block(key, url, position, entry.get('content', ''))
+                if match is None:
+                    entries.append(entry)
+                    continue
+                (canonical_url, canonical_position), similarity = match
+                reference = {name: value for name, value in entry.items() if name != 'content'}
+                reference['duplicate_of'] = {'url': canonical_url, 'position': canonical_position,
+                                             'similarity': round(similarity, 3)}
+                entries.append(reference)
+            page_data[key] = entries
+        return page_data
+
+    def register(self, url, page_data=None, fingerprint=None):
+        """Reprendre comme canonique une page deja traitee (reprise ou base precedente)"""
+        with self._lock:
+            self._register(url, page_data, fingerprint)
+
+    def _register(self, url, page_data, fingerprint):
+        if page_data is not None:
+            for key in self.BLOCK_KEYS:
+                for position, entry in enumerate(page_data.get(key, [])):
+                    if 'duplicate_of' not in entry:
+                        self._add_block(key, url, position, entry.get('content', ''))
+            if 'duplicate_of' in page_data:
+                return
+            fingerprint = page_data.get('fingerprint')
+            if fingerprint is None:
+                fingerprint = encode_signature(minhash(
+                    self._page_tokens(page_data.get('content', {}).get('text', ''), page_data)))
+        if fingerprint:
+            self.pages.add(decode_signature(fingerprint), url)
+
+
+def duplicate_counts(page_data):
+    """Compteurs de pages et blocs (canoniques ou en double) d'une page, pour les statistiques"""
+    counts = Counter(pages=1, duplicate_pages=int('duplicate_of' in page_data))
+    for key in DuplicateDetector.BLOCK_KEYS:
+        entries = page_data.get(key, [])
+        duplicates = sum('duplicate_of' in entry for entry in entries)
+        counts[key] += len(entries)
+        counts[f'duplicate_{key}'] += duplicates
+    return counts
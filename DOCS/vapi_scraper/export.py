@@ -0,0 +1,234 @@
+"""Decoupage en passages bornes en tokens et export vers Supabase"""
+
+import csv
+import hashlib
+import io
+import json
+import re
+import time
+import uuid
+import logging
+from collections import Counter
+
+try:
+    import psycopg2  # Optionnel : export des passages vers Supabase (--export-supabase)
+    import psycopg2.extras
+except ImportError:
+    psycopg2 = None
+
+from .config import SCRAPER_CONFIG
+
+
+# Tokens estimes : mots (un token par tranche de 16 caracteres) et signes de ponctuation, sans tokenizer externe
+_CHUNK_TOKEN_PATTERN = re.compile(r'\w{1,16}|[^\w\s]')
+
+
+def estimate_tokens(text):
+    return len(_CHUNK_TOKEN_PATTERN.findall(text))
+
+
+def _split_word(word, max_tokens):
+    """Couper un mot sans espace (URL, JSON minifie, base64) en morceaux (texte, tokens) d'au plus max_tokens"""
+    starts = [match.start() for match in _CHUNK_TOKEN_PATTERN.finditer(word)][max_tokens::max_tokens]
+    bounds = [0] + starts + [len(word)]
+    return [(word[start:end], estimate_tokens(word[start:end])) for start, end in zip(bounds, bounds[1:])]
+
+
+def chunk_text(text, max_tokens):
+    """Decouper un texte en passages (contenu, tokens) d'au plus max_tokens
+
+    Les coupures tombent entre deux lignes ; une ligne trop longue est
+    elle-meme coupee entre deux mots, et un mot trop long entre deux tokens.
+    """
+    chunks, lines, size = [], [], 0
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        tokens = estimate_tokens(line)
+        if lines and size + tokens > max_tokens:
+            chunks.append(('\n'.join(lines), size))
+            lines, size = [], 0
+        if tokens <= max_tokens:
+            lines.append(line)
+            size += tokens
+            continue
+        words, words_size = [], 0
+        for word in line.split():
+            word_tokens = estimate_tokens(word)
+            pieces = [(word, word_tokens)] if word_tokens <= max_tokens else _split_word(word, max_tokens)
+            for piece, piece_tokens in pieces:
+                if words and words_size + piece_tokens > max_tokens:
+                    chunks.append((' '.join(words), words_size))
+                    words, words_size = [], 0
+                words.append(piece)
+                words_size += piece_tokens
+        # La fin de la ligne peut encore accueillir les lignes suivantes
+        lines, size = [' '.join(words)], words_size
+    if lines:
+        chunks.append(('\n'.join(lines), size))
+    return chunks
+
+
+def knowledge_base_chunks(pages, max_tokens):
+    """Passages a exporter depuis des paires (url, page_data), pages en erreur exclues
+
+    Seule une page au texte identique a une page deja exportee est sautee :
+    un quasi-doublon (meme gabarit, autre SDK) garde ses passages.
+    """
+    exported = set()
+    for url, page_data in pages:
+        if 'error' in page_data:
+            continue
+        main = page_data.get('content', {})
+        text = main.get('fullText') or main.get('text', '')
+        digest = hashlib.sha1(text.encode('utf-8')).digest()
+        if digest in exported:
+            continue
+        exported.add(digest)
+        metadata = {
+            'breadcrumb': [crumb['text'] for crumb in page_data.get('navigation', {}).get('breadcrumb', [])],
+            'parameters': page_data.get('parameters', [])
+        }
+        # Rang d'un passage parmi les passages identiques de la page, pour des identifiants distincts
+        occurrences = Counter()
+        for position, (content, tokens) in enumerate(chunk_text(text, max_tokens)):
+            occurrences[content] += 1
+            yield {'url': url, 'position': position, 'occurrence': occurrences[content] - 1,
+                   'title': page_data.get('title') or None, 'content': content, 'token_count': tokens,
+                   'metadata': metadata}
+
+
+class SupabaseChunkExporter:
+    """Export par lots des passages de la base vers Supabase (table knowledge_base_chunks)
+
+    Une seule connexion, ouverte de preference sur le pooler Supabase, porte
+    tout l'export dans une transaction : les lignes partent par COPY dans une
+    table temporaire fusionnee d'un seul INSERT ... ON CONFLICT, ou par lots
+    d'INSERT multi-lignes. L'identifiant d'un passage (base, URL, empreinte
+    du contenu, rang parmi les passages identiques de la page) ne bouge pas
+    quand du texte est insere ailleurs dans la page : seules les lignes
+    nouvelles ou dont l'empreinte a change (rang compris) sont envoyees,
+    celles qui ont disparu sont supprimees.
+    """
+
+    COLUMNS = ('id', 'knowledge_base_id', 'url', 'position', 'title', 'content', 'token_count',
+               'content_hash', 'metadata')
+    LOAD_TABLE = 'knowledge_base_chunks_load'
+
+    def __init__(self, dsn, knowledge_base, batch_size=1000, use_copy=True):
+        if psycopg2 is None:
+            raise RuntimeError("psycopg2 est requis pour l'export Supabase (pip install psycopg2-binary)")
+        self.knowledge_base = knowledge_base
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self._conn = psycopg2.connect(dsn, application_name='vapi-sequential-scraper')
+        columns = ', '.join(self.COLUMNS)
+        updates = ', '.join(f'{column} = EXCLUDED.{column}' for column in self.COLUMNS[2:])
+        self._upsert_values = f'''
+            INSERT INTO public.knowledge_base_chunks ({columns}) VALUES %s
+            ON CONFLICT (id) DO UPDATE SET {updates}
+        '''
+        self._upsert_load = f'''
+            INSERT INTO public.knowledge_base_chunks ({columns}) SELECT {columns} FROM {self.LOAD_TABLE}
+            ON CONFLICT (id) DO UPDATE SET {updates}
+        '''
+        self._copy = f'COPY {self.LOAD_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)'
+
+    def _row(self, knowledge_base_id, chunk):
+        digest = hashlib.sha256(chunk['content'].encode('utf-8')).hexdigest()
+        chunk_id = str(uuid.uuid5(uuid.NAMESPACE_URL,
+                                  f"{self.knowledge_base}|{chunk['url']}#{digest}:{chunk['occurrence']}"))
+        payload = [chunk['url'], chunk['position'], chunk['title'], chunk['content'], chunk['token_count'],
+                   chunk['metadata']]
+        content_hash = hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode('utf-8')).hexdigest()
+        return (chunk_id, knowledge_base_id, chunk['url'], chunk['position'], chunk['title'], chunk['content'],
+                chunk['token_count'], content_hash, json.dumps(chunk['metadata'], ensure_ascii=False))
+
+    def _send(self, cursor, rows):
+        if self.use_copy:
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator='\n').writerows(rows)
+            buffer.seek(0)
+            cursor.copy_expert(self._copy, buffer)
+        else:
+            psycopg2.extras.execute_values(cursor, self._upsert_values, rows, page_size=self.batch_size)
+
+    def export(self, chunks, metadata=None):
+        """Synchroniser les passages de la base ; retourne les compteurs et le debit (lignes/s)"""
+        metadata = metadata or {}
+        started = time.perf_counter()
+        stats = Counter()
+        with self._conn, self._conn.cursor() as cursor:
+            cursor.execute('''
+                INSERT INTO public.knowledge_bases (vapi_knowledge_base_id, name, description, metadata)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (vapi_knowledge_base_id) DO UPDATE SET metadata = EXCLUDED.metadata
+                RETURNING id
+            ''', (self.knowledge_base, self.knowledge_base, f"Documentation Vapi ({SCRAPER_CONFIG['base_url']})",
+                  json.dumps({'scraped_at': metadata.get('scraped_at'),
+                              'statistics': metadata.get('statistics', {})}, ensure_ascii=False)))
+            knowledge_base_id = cursor.fetchone()[0]
+            cursor.execute('SELECT id::text, content_hash FROM public.knowledge_base_chunks WHERE knowledge_base_id = %s',
+                           (knowledge_base_id,))
+            existing = dict(cursor.fetchall())
+            if self.use_copy:
+                cursor.execute(f'''CREATE TEMP TABLE {self.LOAD_TABLE}
+                                   (LIKE public.knowledge_base_chunks INCLUDING DEFAULTS) ON COMMIT DROP''')
+
+            seen, pages, batch = set(), set(), []
+            for chunk in chunks:
+                row = self._row(knowledge_base_id, chunk)
+                seen.add(row[0])
+                pages.add(chunk['url'])
+                if existing.get(row[0]) == row[7]:
+                    stats['unchanged'] += 1
+                    continue
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self._send(cursor, batch)
+                    stats['upserted'] += len(batch)
+                    batch = []
+            if batch:
+                self._send(cursor, batch)
+                stats['upserted'] += len(batch)
+            if self.use_copy and stats['upserted']:
+                cursor.execute(self._upsert_load)
+
+            stale = [chunk_id for chunk_id in existing if chunk_id not in seen]
+            for start in range(0, len(stale), self.batch_size):
+                cursor.execute('DELETE FROM public.knowledge_base_chunks WHERE id = ANY(%s::uuid[])',
+                               (stale[start:start + self.batch_size],))
+            stats['deleted'] = len(stale)
+            cursor.execute('UPDATE public.knowledge_bases SET chunks_count = %s, file_count = %s WHERE id = %s',
+                           (len(seen), len(pages), knowledge_base_id))
+        seconds = time.perf_counter() - started
+        return {
+            'chunks': len(seen),
+            'upserted': stats['upserted'],
+            'unchanged': stats['unchanged'],
+            'deleted': stats['deleted'],
+            'method': 'copy' if self.use_copy else 'values',
+            'seconds': round(seconds, 3),
+            'rows_per_second': round((stats['upserted'] + stats['deleted']) / seconds) if seconds else 0
+        }
+
+    def close(self):
+        self._conn.close()
+
+
+def export_supabase(pages, metadata=None, dsn=None):
+    """Exporter les passages de paires (url, page_data) vers Supabase"""
+    dsn = dsn or SCRAPER_CONFIG['supabase_db_url']
+    if not dsn:
+        raise ValueError("Connexion Supabase absente (SUPABASE_DB_URL ou --export-supabase DSN)")
+    exporter = SupabaseChunkExporter(dsn, SCRAPER_CONFIG['supabase_knowledge_base'],
+                                     SCRAPER_CONFIG['supabase_batch_size'], SCRAPER_CONFIG['supabase_copy'])
+    try:
+        stats = exporter.export(knowledge_base_chunks(pages, SCRAPER_CONFIG['chunk_max_tokens']), metadata)
+    finally:
+        exporter.close()
+    logging.info(f"Export Supabase: {stats['chunks']} passages, {stats['upserted']} envoyes, "
+                 f"{stats['unchanged']} inchanges, {stats['deleted']} supprimes en {stats['seconds']}s "
+                 f"({stats['rows_per_second']} lignes/s, {stats['method']})")
+    return stats
@@ -0,0 +1,443 @@
+"""Spec declarative d'extraction (navigateur et HTML statique) et assemblage des pages"""
+
+import functools
+import hashlib
+import json
+import re
+import xml.etree.ElementTree as ElementTree
+
+from .dom import BLOCK_TAGS, closest, HIDDEN_TAGS, matches, select_one, text_content
+from .keywords import find_keywords
+from .parameters import extract_parameter_paths
+
+
+MAIN_CONTENT_SELECTOR = 'main, .content, article, .documentation, [role="main"]'
+
+
+# Spec declarative de l'extraction : chaque collection est decrite par un
+# selecteur, des champs et des filtres. Elle est compilee une fois en un script
+# injecte (un seul parcours du DOM) et interpretee a l'identique cote Python
+# pour le HTML statique. Ajouter un champ ne demande que de modifier ce dict.
+#
+# Sources de champ : 'tag', 'text' (textContent sans espaces de bord),
+# 'word_count', 'href', 'context' (titre de la section/div englobante),
+# 'attr:<nom>', 'matches:<selecteur>', 'match_list:<sel1>|<sel2>|...'
+# (indices des selecteurs satisfaits), 'ancestors:<selecteur>' (numeros des
+# sections englobantes, dans l'ordre du document).
+NEXT_LINK_SELECTORS = [
+    'a[href*="next"]',
+    '.next a',
+    '[aria-label*="next" i] a',
+    'nav a:last-child',
+    '.pagination a:last-child'
+]
+
+EXTRACTOR_SPEC = {
+    'title': {
+        'selector': 'title',
+        'first': True,
+        'fields': {'text': 'text'}
+    },
+    'headings': {
+        'selector': 'h1, h2, h3, h4, h5, h6',
+        'fields': {'level': 'tag', 'text': 'text', 'id': 'attr:id'}
+    },
+    'examples': {
+        'selector': 'code, pre',
+        'fields': {'type': 'tag', 'content': 'text', 'language': 'attr:class', 'context': 'context'},
+        'filter': {'field': 'content', 'min_length': 21, 'max_length': 1999},
+        'defaults': {'language': 'unknown', 'context': 'unknown'}
+    },
+    'schemas': {
+        'selector': 'code, pre',
+        'fields': {'content': 'text', 'context': 'context'},
+        'filter': {'field': 'content', 'contains': ['{', '}', '"'], 'starts_with': ['{', '['], 'max_length': 2999},
+        'defaults': {'context': 'unknown'}
+    },
+    'links': {
+        'selector': 'a[href]',
+        'fields': {
+            'text': 'text',
+            'href': 'href',
+            'next_hints': 'match_list:' + '|'.join(NEXT_LINK_SELECTORS),
+            'in_nav': 'matches:nav a, .navigation a, .pagination a',
+            'in_sidebar': 'matches:nav a, .navigation a',
+            'in_page_nav': 'matches:nav a, .navigation a, .pagination a, footer a',
+            'in_breadcrumb': 'matches:.breadcrumb a, [aria-label="breadcrumb"] a, nav[aria-label="breadcrumb"] a',
+            'sections': 'ancestors:nav, .navigation, .pagination'
+        }
+    },
+    'main': {
+        'selector': MAIN_CONTENT_SELECTOR,
+        'first': True,
+        'fields': {'text': 'text', 'full_text': 'text', 'word_count': 'word_count'},
+        'truncate': {'text': 5000}
+    }
+}
+
+EXTRACTOR_JS = """
+const spec = __SPEC__;
+const hiddenTags = new Set(__HIDDEN_TAGS__);
+const blockTags = new Set(__BLOCK_TAGS__);
+const rules = Object.entries(spec);
+const out = {location: window.location.href, visible_text: ''};
+rules.forEach(([name, rule]) => { out[name] = rule.first ? null : []; });
+
+const sectionSelectors = [];
+rules.forEach(([, rule]) => Object.values(rule.fields).forEach(source => {
+    if (source.startsWith('ancestors:')) sectionSelectors.push(source.slice(10));
+}));
+const sectionIds = new Map();
+const contextCache = new Map();
+const textParts = [];
+
+function fieldValue(el, source, getText) {
+    if (source === 'tag') return el.tagName.toLowerCase();
+    if (source === 'text') return getText();
+    if (source === 'word_count') return getText().split(/\\s+/).length;
+    if (source === 'href') return el.href || null;
+    if (source === 'context') {
+        const container = el.closest('section, div');
+        if (!container) return '';
+        if (!contextCache.has(container)) {
+            const heading = container.querySelector('h1, h2, h3, h4');
+            contextCache.set(container, heading ? heading.textContent.trim() : '');
+        }
+        return contextCache.get(container);
+    }
+    const split = source.indexOf(':');
+    const kind = source.slice(0, split);
+    const arg = source.slice(split + 1);
+    if (kind === 'attr') return el.getAttribute(arg) || null;
+    if (kind === 'matches') return el.matches(arg);
+    if (kind === 'match_list') {
+        return arg.split('|').map((selector, i) => el.matches(selector) ? i : -1).filter(i => i >= 0);
+    }
+    if (kind === 'ancestors') {
+        const ids = [];
+        for (let node = el; node; node = node.parentElement) {
+            if (sectionIds.has(node) && node.matches(arg)) ids.push(sectionIds.get(node));
+        }
+        return ids.reverse();
+    }
+    return null;
+}
+
+function accept(rule, record) {
+    const f = rule.filter;
+    if (!f) return true;
+    const value = record[f.field] || '';
+    if (f.min_length !== undefined && value.length < f.min_length) return false;
+    if (f.max_length !== undefined && value.length > f.max_length) return false;
+    if (f.contains && !f.contains.every(token => value.includes(token))) return false;
+    if (f.starts_with && !f.starts_with.some(prefix => value.startsWith(prefix))) return false;
+    return true;
+}
+
+function visit(el) {
+    for (const selector of sectionSelectors) {
+        if (el.matches(selector)) { sectionIds.set(el, sectionIds.size); break; }
+    }
+    let text = null;
+    const getText = () => (text === null ? (text = el.textContent.trim()) : text);
+    for (const [name, rule] of rules) {
+        if ((rule.first && out[name] !== null) || !el.matches(rule.selector)) continue;
+        const record = {};
+        for (const [field, source] of Object.entries(rule.fields)) {
+            record[field] = fieldValue(el, source, getText);
+        }
+        if (!accept(rule, record)) continue;
+        for (const [field, value] of Object.entries(rule.defaults || {})) {
+            if (!record[field]) record[field] = value;
+        }
+        for (const [field, limit] of Object.entries(rule.truncate || {})) {
+            if (typeof record[field] === 'string') record[field] = record[field].substring(0, limit);
+        }
+        if (rule.first) out[name] = record; else out[name].push(record);
+    }
+}
+
+function walk(parent, hidden) {
+    for (let child = parent.firstChild; child; child = child.nextSibling) {
+        if (child.nodeType === Node.TEXT_NODE) {
+            if (!hidden) textParts.push(child.data);
+            continue;
+        }
+        if (child.nodeType !== Node.ELEMENT_NODE) continue;
+        const tag = child.tagName.toLowerCase();
+        const childHidden = hidden || hiddenTags.has(tag);
+        const block = !childHidden && blockTags.has(tag);
+        if (block) textParts.push('\\n');
+        visit(child);
+        walk(child, childHidden);
+        if (block) textParts.push('\\n');
+    }
+}
+
+walk(document, false);
+out.visible_text = textParts.join('');
+return out;
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def compiled_extractor_script():
+    """Compiler EXTRACTOR_SPEC en un script injecte unique (fait une seule fois)"""
+    return (EXTRACTOR_JS
+            .replace('__SPEC__', json.dumps(EXTRACTOR_SPEC))
+            .replace('__HIDDEN_TAGS__', json.dumps(sorted(HIDDEN_TAGS)))
+            .replace('__BLOCK_TAGS__', json.dumps(sorted(BLOCK_TAGS))))
+
+
+def _section_selectors():
+    return [source[len('ancestors:'):]
+            for rule in EXTRACTOR_SPEC.values()
+            for source in rule['fields'].values()
+            if source.startswith('ancestors:')]
+
+
+def extract_raw_static(dom, url):
+    """Interpreter EXTRACTOR_SPEC sur un DOM statique, comme le script injecte"""
+    out = {'location': url, 'visible_text': ''}
+    for name, rule in EXTRACTOR_SPEC.items():
+        out[name] = None if rule.get('first') else []
+    section_selectors = _section_selectors()
+    section_ids = {}
+    context_cache = {}
+    text_parts = []
+
+    def field_value(node, source, get_text):
+        if source == 'tag':
+            return node.tag
+        if source == 'text':
+            return get_text()
+        if source == 'word_count':
+            return len(re.split(r'\s+', get_text()))
+        if source == 'href':
+            return node.href(url)
+        if source == 'context':
+            container = closest(node, 'section, div')
+            if container is None:
+                return ''
+            if id(container) not in context_cache:
+                heading = select_one(container, 'h1, h2, h3, h4')
+                context_cache[id(container)] = text_content(heading).strip()
+            return context_cache[id(container)]
+        kind, _, arg = source.partition(':')
+        if kind == 'attr':
+            return node.attrs.get(arg) or None
+        if kind == 'matches':
+            return matches(node, arg)
+        if kind == 'match_list':
+            return [i for i, selector in enumerate(arg.split('|')) if matches(node, selector)]
+        if kind == 'ancestors':
+            ids = []
+            ancestor = node
+            while ancestor is not None:
+                if id(ancestor) in section_ids and matches(ancestor, arg):
+                    ids.append(section_ids[id(ancestor)])
+                ancestor = ancestor.parent
+            return ids[::-1]
+        return None
+
+    def visit(node):
+        for selector in section_selectors:
+            if matches(node, selector):
+                section_ids[id(node)] = len(section_ids)
+                break
+        text = []
+
+        def get_text():
+            if not text:
+                text.append(text_content(node).strip())
+            return text[0]
+
+        for name, rule in EXTRACTOR_SPEC.items():
+            if (rule.get('first') and out[name] is not None) or not matches(node, rule['selector']):
+                continue
+            record = {field: field_value(node, source, get_text) for field, source in rule['fields'].items()}
+            if not _accept_record(rule, record):
+                continue
+            for field, value in rule.get('defaults', {}).items():
+                if not record[field]:
+                    record[field] = value
+            for field, limit in rule.get('truncate', {}).items():
+                if isinstance(record[field], str):
+                    record[field] = record[field][:limit]
+            if rule.get('first'):
+                out[name] = record
+            else:
+                out[name].append(record)
+
+    # Parcours unique en profondeur, iteratif pour supporter le HTML mal ferme
+    stack = [(iter(dom.children), False, None)]
+    while stack:
+        children, hidden, block_tag = stack[-1]
+        for child in children:
+            if isinstance(child, str):
+                if not hidden:
+                    text_parts.append(child)
+                continue
+            child_hidden = hidden or child.tag in HIDDEN_TAGS
+            block = not child_hidden and child.tag in BLOCK_TAGS
+            if block:
+                text_parts.append('\n')
+            visit(child)
+            stack.append((iter(child.children), child_hidden, child.tag if block else None))
+            break
+        else:
+            stack.pop()
+            if block_tag:
+                text_parts.append('\n')
+
+    out['visible_text'] = ''.join(text_parts)
+    return out
+
+
+def _accept_record(rule, record):
+    spec_filter = rule.get('filter')
+    if not spec_filter:
+        return True
+    value = record.get(spec_filter['field']) or ''
+    if 'min_length' in spec_filter and len(value) < spec_filter['min_length']:
+        return False
+    if 'max_length' in spec_filter and len(value) > spec_filter['max_length']:
+        return False
+    if 'contains' in spec_filter and not all(token in value for token in spec_filter['contains']):
+        return False
+    if 'starts_with' in spec_filter and not value.startswith(tuple(spec_filter['starts_with'])):
+        return False
+    return True
+
+
+def _is_next_text(text):
+    return 'next' in text or 'suivant' in text or text in ('→', '>')
+
+
+def _is_previous_text(text):
+    return 'previous' in text or 'précédent' in text or 'prev' in text
+
+
+def assemble_page_data(raw, url, deep=True, options=None):
+    """Construire page_data (format historique) a partir des collections extraites
+
+    Sans deep, mots-cles et chemins de parametres ne sont pas cherches
+    (page quasi identique a une page deja extraite). options : voir
+    deepen_page_data.
+    """
+    links = raw['links']
+    main_content = raw['main']
+    data = {
+        'url': raw.get('location') or url,
+        'title': ' '.join((raw['title'] or {}).get('text', '').split()),
+        'headings': raw['headings'],
+        'parameters': [],
+        'parameter_hits': {},
+        'examples': raw['examples'],
+        'schemas': raw['schemas'],
+        'parameter_paths': {},
+        'content': {},
+        'navigation': {
+            'next': None,
+            'previous': None,
+            'breadcrumb': []
+        }
+    }
+
+    # Lien Next : par texte, puis par attributs, puis liens de navigation en bas de page
+    navigation = data['navigation']
+    navigation['next'] = next((link['href'] for link in links if _is_next_text(link['text'].lower())), None)
+    if not navigation['next']:
+        for index in range(len(NEXT_LINK_SELECTORS)):
+            link = next((link for link in links if index in link['next_hints']), None)
+            if link is not None and link['href']:
+                navigation['next'] = link['href']
+                break
+    for link in links:
+        if not link['in_page_nav'] or not link['href']:
+            continue
+        text = link['text'].lower()
+        if 'next' in text or 'suivant' in text:
+            navigation['next'] = link['href']
+        if _is_previous_text(text):
+            navigation['previous'] = link['href']
+
+    navigation['breadcrumb'] = [
+        {'text': link['text'], 'href': link['href']}
+        for link in links if link['in_breadcrumb'] and link['text'] and link['href']
+    ]
+
+    if main_content is not None:
+        data['content']['text'] = main_content['text']
+        data['content']['wordCount'] = main_content['word_count']
+        # Texte integral (passages exportes) garde seulement quand text est tronque
+        if len(main_content['full_text']) > len(main_content['text']):
+            data['content']['fullText'] = main_content['full_text']
+
+    if deep:
+        deepen_page_data(data, raw['visible_text'], options)
+    return data
+
+
+def deepen_page_data(data, visible_text, options=None):
+    """Extraction fine d'une page assemblee : mots-cles et chemins de parametres
+
+    options peut porter keywords_file et keyword_max_offsets (SCRAPER_CONFIG
+    sinon) : un processus d'extraction ne voit pas la configuration du
+    processus principal.
+    """
+    options = options or {}
+    parameter_hits = find_keywords(visible_text, options.get('keywords_file'), options.get('keyword_max_offsets'))
+    data['parameters'] = list(parameter_hits)
+    data['parameter_hits'] = parameter_hits
+    data['parameter_paths'] = extract_parameter_paths(data)
+    return data
+
+
+def next_link_from_links(links):
+    """Lien Next a suivre : par texte, dans la navigation, puis dernier lien d'une navigation"""
+    for link in links:
+        if _is_next_text(link['text'].lower()):
+            return link['href']
+
+    for link in links:
+        text = link['text'].lower()
+        if link['in_nav'] and ('next' in text or 'suivant' in text):
+            return link['href']
+
+    sections = {}
+    for link in links:
+        for section_id in link['sections']:
+            sections.setdefault(section_id, []).append(link)
+    for section_id in sorted(sections):
+        section_links = sections[section_id]
+        if len(section_links) >= 2 and not _is_previous_text(section_links[-1]['text'].lower()):
+            return section_links[-1]['href']
+
+    return None
+
+
+def nav_links_from_links(links):
+    """Liens de la navigation laterale (prechargement parallele)"""
+    return [link['href'] for link in links if link['in_sidebar']]
+
+
+def parse_sitemap(xml_text):
+    """URLs de pages et sous-sitemaps d'un sitemap.xml, dans l'ordre du fichier"""
+    root = ElementTree.fromstring(xml_text)
+    pages, sitemaps = [], []
+    for entry in root:
+        location = entry.find('{*}loc')
+        if location is None or not (location.text or '').strip():
+            continue
+        kind = entry.tag.rsplit('}', 1)[-1]
+        if kind == 'url':
+            pages.append(location.text.strip())
+        elif kind == 'sitemap':
+            sitemaps.append(location.text.strip())
+    return pages, sitemaps
+
+
+def content_hash(text):
+    """Hash stable d'un contenu textuel (validation incrementale)"""
+    return hashlib.sha256(text.strip().encode('utf-8')).hexdigest()
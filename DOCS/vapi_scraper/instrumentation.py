@@ -0,0 +1,162 @@
+"""Mesure de la duree des phases et histogrammes"""
+
+import contextlib
+import threading
+import time
+from collections import defaultdict
+
+
+# Bornes (ms) des histogrammes de duree des phases
+PHASE_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_NULL_PHASE = contextlib.nullcontext()
+
+
+def percentile(values, fraction):
+    """Percentile par interpolation lineaire (liste non vide ou 0.0)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class InstrumentationHook:
+    """Interface des hooks d'instrumentation (profileur, traces...)
+
+    Sous-classer et redefinir les methodes utiles ; elles sont appelees dans
+    le thread qui execute la phase.
+    """
+
+    def phase_started(self, phase, url):
+        pass
+
+    def phase_finished(self, phase, url, seconds):
+        pass
+
+    def page_finished(self, url, timings):
+        pass
+
+
+class _Phase:
+    __slots__ = ('instrumentation', 'name', 'url', 'started')
+
+    def __init__(self, instrumentation, name, url):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.url = url
+
+    def __enter__(self):
+        for hook in self.instrumentation.hooks:
+            hook.phase_started(self.name, self.url)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.instrumentation.record(self.name, time.perf_counter() - self.started, self.url)
+        return False
+
+
+class Instrumentation:
+    """Chronometrage des phases du scraper, par page et agrege
+
+    Desactivee, phase() et page() renvoient un contexte vide partage :
+    aucune mesure, aucune allocation.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.hooks = []
+        self.samples = defaultdict(list)
+        self.page_timings = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def add_hook(self, hook):
+        """Brancher un hook (active l'instrumentation)"""
+        self.hooks.append(hook)
+        self.enabled = True
+
+    def phase(self, name, url=None):
+        """Contexte chronometrant une phase ; url par defaut : la page en cours du thread"""
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name, url or getattr(self._local, 'url', None))
+
+    @contextlib.contextmanager
+    def _page(self, url):
+        self._local.url = url
+        self._local.timings = timings = {}
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.url = self._local.timings = None
+            timings['total'] = (time.perf_counter() - started) * 1000
+            timings = {phase: round(ms, 2) for phase, ms in timings.items()}
+            with self._lock:
+                # Une page reprise (ou fusionnee plus tard) cumule ses mesures
+                page = self.page_timings.setdefault(url, {})
+                for phase, ms in timings.items():
+                    page[phase] = round(page.get(phase, 0) + ms, 2)
+            for hook in self.hooks:
+                hook.page_finished(url, timings)
+
+    def page(self, url):
+        """Contexte regroupant les phases d'une page"""
+        if not self.enabled:
+            return _NULL_PHASE
+        return self._page(url)
+
+    def record(self, phase, seconds, url=None):
+        milliseconds = seconds * 1000
+        with self._lock:
+            self.samples[phase].append(milliseconds)
+            if url is not None and url != getattr(self._local, 'url', None):
+                page = self.page_timings.setdefault(url, {})
+                page[phase] = round(page.get(phase, 0) + milliseconds, 2)
+        timings = getattr(self._local, 'timings', None)
+        if timings is not None and url == self._local.url:
+            timings[phase] = timings.get(phase, 0) + milliseconds
+        for hook in self.hooks:
+            hook.phase_finished(phase, url, seconds)
+
+    def summary(self):
+        """Statistiques par phase : nombre, total, percentiles et histogramme cumule (ms)"""
+        with self._lock:
+            samples = {phase: list(values) for phase, values in self.samples.items()}
+        summary = {}
+        for phase, values in samples.items():
+            summary[phase] = {
+                'count': len(values),
+                'total_ms': round(sum(values), 2),
+                'mean_ms': round(sum(values) / len(values), 2),
+                'p50_ms': round(percentile(values, 0.5), 2),
+                'p90_ms': round(percentile(values, 0.9), 2),
+                'p95_ms': round(percentile(values, 0.95), 2),
+                'p99_ms': round(percentile(values, 0.99), 2),
+                'max_ms': round(max(values), 2),
+                'histogram': {str(bound): sum(1 for value in values if value <= bound) for bound in PHASE_BUCKETS_MS}
+            }
+        return summary
+
+    def to_prometheus(self, counters=None):
+        """Instantane au format texte Prometheus (durees en secondes)"""
+        lines = [
+            '# HELP vapi_scraper_phase_seconds Duree des phases du scraper Vapi',
+            '# TYPE vapi_scraper_phase_seconds histogram'
+        ]
+        for phase, stats in sorted(self.summary().items()):
+            for bound, count in stats['histogram'].items():
+                lines.append(f'vapi_scraper_phase_seconds_bucket{{phase="{phase}",le="{int(bound) / 1000:g}"}} {count}')
+            lines.append(f'vapi_scraper_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'vapi_scraper_phase_seconds_sum{{phase="{phase}"}} {stats["total_ms"] / 1000:.6f}')
+            lines.append(f'vapi_scraper_phase_seconds_count{{phase="{phase}"}} {stats["count"]}')
+        for name, (help_text, values) in (counters or {}).items():
+            lines.append(f'# HELP vapi_scraper_{name} {help_text}')
+            lines.append(f'# TYPE vapi_scraper_{name} counter')
+            for label, value in values.items():
+                lines.append(f'vapi_scraper_{name}{{path="{label}"}} {value}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,97 @@
+"""Recherche des mots-cles de la documentation (Aho-Corasick)"""
+
+import functools
+
+from .config import SCRAPER_CONFIG
+
+
+class KeywordMatcher:
+    """Recherche multi-motifs (Aho-Corasick) insensible a la casse
+
+    Un seul passage sur le texte quel que soit le nombre de mots-cles ;
+    chaque occurrence est comptee avec sa position dans le texte.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keywords))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in self._fold(keyword):
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append(index)
+
+        # Liens d'echec en largeur : chaque etat herite des sorties de son suffixe
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+        self._lengths = [len(self._fold(keyword)) for keyword in self.keywords]
+
+    @staticmethod
+    def _fold(text):
+        """Minuscules caractere par caractere, sans changer les positions"""
+        folded = text.lower()
+        if len(folded) == len(text):
+            return folded
+        return ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+    def scan(self, text, max_offsets=None):
+        """Occurrences par mot-cle : {mot-cle: {'count': n, 'offsets': [...]}}"""
+        goto, fail, output, lengths = self._goto, self._fail, self._output, self._lengths
+        hits = {}
+        state = 0
+        for position, char in enumerate(self._fold(text)):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                hit = hits.get(index)
+                if hit is None:
+                    hit = hits[index] = {'count': 0, 'offsets': []}
+                hit['count'] += 1
+                if max_offsets is None or len(hit['offsets']) < max_offsets:
+                    hit['offsets'].append(position - lengths[index] + 1)
+        # Ordre de la liste de mots-cles, comme l'ancienne recherche par sous-chaine
+        return {self.keywords[index]: hits[index] for index in sorted(hits)}
+
+
+def load_keywords(path):
+    """Lire la liste des mots-cles (un par ligne, lignes vides et # ignorees)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            keywords = [line.strip() for line in f]
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Fichier de mots-cles introuvable (--keywords-file): {path}") from None
+    return [keyword for keyword in keywords if keyword and not keyword.startswith('#')]
+
+
+@functools.lru_cache(maxsize=None)
+def keyword_matcher(path):
+    """Automate compile une seule fois par fichier de mots-cles"""
+    return KeywordMatcher(load_keywords(path))
+
+
+def find_keywords(text, keywords_file=None, max_offsets=None):
+    """Occurrences des mots-cles Vapi dans le texte d'une page
+
+    keywords_file et max_offsets valent par defaut ceux de SCRAPER_CONFIG ;
+    les processus d'extraction les recoivent explicitement.
+    """
+    if keywords_file is None:
+        keywords_file = SCRAPER_CONFIG['keywords_file']
+    if max_offsets is None:
+        max_offsets = SCRAPER_CONFIG['keyword_max_offsets']
+    return keyword_matcher(keywords_file).scan(text, max_offsets)
@@ -0,0 +1,399 @@
+"""JSON tolerant des exemples, schemas et arbre des chemins de parametres"""
+
+import json
+import re
+
+
+# Schemas et exemples : JSON tolerant et arbre des chemins de parametres
+_JSON_LITERALS = {'true': True, 'false': False, 'null': None, 'True': True, 'False': False, 'None': None}
+
+_JSON_NUMBER = re.compile(r'-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+
+_JSON_IDENTIFIER = re.compile(r'[A-Za-z_$][\w$-]*')
+
+_EXPRESSION = object()  # Valeur de code (variable, appel...) sans type JSON
+
+_ELLIPSIS = object()  # '...' d'un exemple abrege ou d'un spread JavaScript
+
+PARAMETER_EXAMPLES = 5  # Valeurs d'exemple conservees par chemin
+
+PARAMETER_EXAMPLE_LENGTH = 100
+
+
+class _LenientJsonParser:
+    """JSON tel qu'il apparait dans la doc : commentaires, virgules finales,
+    cles sans guillemets, apostrophes, '...', valeurs JavaScript et texte tronque
+
+    Un bloc coupe (limite de longueur de l'extraction) rend ce qui a ete lu.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def fail(self, reason):
+        raise ValueError(f"{reason} a la position {self.pos}")
+
+    def skip(self):
+        text = self.text
+        while self.pos < len(text):
+            char = text[self.pos]
+            if char.isspace():
+                self.pos += 1
+            elif text.startswith('//', self.pos):
+                end = text.find('\n', self.pos)
+                self.pos = len(text) if end < 0 else end + 1
+            elif text.startswith('/*', self.pos):
+                end = text.find('*/', self.pos + 2)
+                self.pos = len(text) if end < 0 else end + 2
+            else:
+                return
+
+    def at_end(self):
+        self.skip()
+        return self.pos >= len(self.text)
+
+    def value(self):
+        self.skip()
+        if self.pos >= len(self.text):
+            self.fail("valeur attendue")
+        char = self.text[self.pos]
+        if char == '{':
+            return self.object()
+        if char == '[':
+            return self.array()
+        if char in '"\'`':
+            return self.string()
+        if self.text.startswith('...', self.pos):
+            self.pos += 3
+            self.skip()
+            if self.pos < len(self.text) and self.text[self.pos] not in ',]})':
+                self.expression()
+            return _ELLIPSIS
+        match = _JSON_NUMBER.match(self.text, self.pos)
+        if match and not _JSON_IDENTIFIER.match(self.text, match.end()):
+            self.pos = match.end()
+            number = match.group()
+            return float(number) if any(c in number for c in '.eE') else int(number)
+        match = _JSON_IDENTIFIER.match(self.text, self.pos)
+        if match and match.group() in _JSON_LITERALS and not self._continues(match.end()):
+            self.pos = match.end()
+            return _JSON_LITERALS[match.group()]
+        if match:
+            return self.expression()
+        self.fail("valeur illisible")
+
+    def _continues(self, position):
+        return position < len(self.text) and self.text[position] in '.('
+
+    def expression(self):
+        """Sauter une expression de code jusqu'a la fin de la valeur"""
+        depth = 0
+        start = self.pos
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char in '"\'`':
+                self.string()
+                continue
+            if char in '([{':
+                depth += 1
+            elif char in ')]}':
+                if depth == 0:
+                    break
+                depth -= 1
+            elif char in ',;\n' and depth == 0:
+                break
+            self.pos += 1
+        if self.pos == start:
+            self.fail("expression vide")
+        return _EXPRESSION
+
+    def string(self):
+        quote = self.text[self.pos]
+        self.pos += 1
+        chars = []
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char == '\\' and self.pos + 1 < len(self.text):
+                escaped = self.text[self.pos + 1]
+                if escaped == 'u':
+                    try:
+                        chars.append(chr(int(self.text[self.pos + 2:self.pos + 6], 16)))
+                        self.pos += 6
+                        continue
+                    except ValueError:
+                        pass
+                chars.append({'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f'}.get(escaped, escaped))
+                self.pos += 2
+                continue
+            self.pos += 1
+            if char == quote:
+                return ''.join(chars)
+            chars.append(char)
+        return ''.join(chars)
+
+    def key(self):
+        char = self.text[self.pos]
+        if char in '"\'`':
+            return self.string()
+        match = _JSON_IDENTIFIER.match(self.text, self.pos) or _JSON_NUMBER.match(self.text, self.pos)
+        if not match:
+            self.fail("cle attendue")
+        self.pos = match.end()
+        return match.group()
+
+    def object(self):
+        self.pos += 1
+        result = {}
+        while not self.at_end():
+            if self.text[self.pos] == '}':
+                self.pos += 1
+                return result
+            if self.text.startswith('...', self.pos):
+                self.value()
+            else:
+                key = self.key()
+                if self.at_end():
+                    break
+                separator = self.text[self.pos]
+                if separator == ':':
+                    self.pos += 1
+                    if self.at_end():
+                        break
+                    result[key] = self.value()
+                elif separator in ',}':
+                    result[key] = _EXPRESSION  # Propriete abregee { name }
+                else:
+                    self.fail("':' attendu")
+            if self.at_end():
+                break
+            if self.text[self.pos] == ',':
+                self.pos += 1
+            elif self.text[self.pos] != '}':
+                self.fail("',' ou '}' attendu")
+        return result
+
+    def array(self):
+        self.pos += 1
+        result = []
+        while not self.at_end():
+            if self.text[self.pos] == ']':
+                self.pos += 1
+                return result
+            result.append(self.value())
+            if self.at_end():
+                break
+            if self.text[self.pos] == ',':
+                self.pos += 1
+            elif self.text[self.pos] != ']':
+                self.fail("',' ou ']' attendu")
+        return result
+
+
+def _has_fields(value):
+    """Objet avec au moins une vraie valeur (pas un import ni une destructuration { a, b })"""
+    if isinstance(value, list):
+        return any(_has_fields(item) for item in value)
+    return isinstance(value, dict) and any(child is not _EXPRESSION for child in value.values())
+
+
+def parse_json_blocks(text):
+    """Objets JSON (ou litteraux JavaScript) d'un bloc de code, avec une analyse tolerante
+
+    Un bloc qui commence par '{' ou '[' est lu en entier ; ailleurs (appel
+    d'API, variable...), chaque '{' est essaye comme debut d'objet.
+    """
+    try:
+        value = json.loads(text)
+        return [value] if _has_fields(value) else []
+    except ValueError:
+        pass
+    values = []
+    stripped = text.lstrip()
+    position = len(text) - len(stripped) if stripped[:1] in ('{', '[') else text.find('{')
+    while 0 <= position < len(text):
+        parser = _LenientJsonParser(text)
+        parser.pos = position
+        try:
+            value = parser.value()
+        except (ValueError, RecursionError):
+            position = text.find('{', position + 1)
+            continue
+        if _has_fields(value):
+            values.append(value)
+        position = text.find('{', max(parser.pos, position + 1))
+    return values
+
+
+def _json_type(value):
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, int):
+        return 'integer'
+    if isinstance(value, float):
+        return 'number'
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, dict):
+        return 'object'
+    if isinstance(value, list):
+        return 'array'
+    return 'null' if value is None else None
+
+
+def _observe_path(paths, path, types=(), examples=(), description=None):
+    node = paths.setdefault(path, {'types': [], 'examples': []})
+    for type_name in types:
+        if type_name and type_name not in node['types']:
+            node['types'].append(type_name)
+    for example in examples:
+        if isinstance(example, str):
+            example = example[:PARAMETER_EXAMPLE_LENGTH]
+        elif not isinstance(example, (bool, int, float)):
+            continue
+        if len(node['examples']) < PARAMETER_EXAMPLES and example not in node['examples']:
+            node['examples'].append(example)
+    if description and 'description' not in node:
+        node['description'] = description[:300]
+
+
+def _is_json_schema(value):
+    properties = value.get('properties')
+    return (isinstance(properties, dict) and value.get('type', 'object') == 'object'
+            and all(isinstance(child, dict) for child in properties.values()))
+
+
+def _collect_schema(schema, paths, prefix):
+    """Chemins declares par un JSON Schema (properties / items), avec leurs types"""
+    for name, child in schema['properties'].items():
+        path = f'{prefix}.{name}' if prefix else name
+        declared = child.get('type')
+        types = declared if isinstance(declared, list) else [declared]
+        if declared is None:
+            types = ['object' if 'properties' in child else 'array' if 'items' in child else None]
+        examples = list(child.get('enum') or []) + list(child.get('examples') or [])
+        examples += [child[key] for key in ('example', 'default') if key in child]
+        description = child.get('description') if isinstance(child.get('description'), str) else None
+        _observe_path(paths, path, types, examples, description)
+        if _is_json_schema(child):
+            _collect_schema(child, paths, path)
+        items = child.get('items')
+        if isinstance(items, dict) and _is_json_schema(items):
+            _observe_path(paths, path + '[]', ['object'])
+            _collect_schema(items, paths, path + '[]')
+
+
+def _collect_paths(value, paths, prefix=''):
+    """Chemins d'une valeur JSON : 'voice.provider', 'tools[].function.name'..."""
+    if isinstance(value, dict):
+        if _is_json_schema(value):
+            _collect_schema(value, paths, prefix)
+            return
+        for key, child in value.items():
+            if child is _ELLIPSIS:
+                continue
+            path = f'{prefix}.{key}' if prefix else key
+            _observe_path(paths, path, [_json_type(child)], [child])
+            _collect_paths(child, paths, path)
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, (dict, list)):
+                # Un tableau de premier niveau est une liste d'enregistrements
+                path = prefix + '[]' if prefix else ''
+                if path:
+                    _observe_path(paths, path, [_json_type(item)])
+                _collect_paths(item, paths, path)
+            elif prefix and item is not _ELLIPSIS:
+                _observe_path(paths, prefix, examples=[item])
+
+
+def extract_parameter_paths(page_data):
+    """Chemins de parametres des schemas et exemples d'une page, tries par chemin"""
+    paths = {}
+    for key in ('schemas', 'examples'):
+        for entry in page_data.get(key, []):
+            for value in parse_json_blocks(entry.get('content') or ''):
+                _collect_paths(value, paths)
+    return {path: paths[path] for path in sorted(paths)}
+
+
+def parent_parameter_path(path):
+    """'voice.provider' -> 'voice', 'tools[]' -> 'tools', 'voice' -> None"""
+    if path.endswith('[]'):
+        return path[:-2] or None
+    return path.rsplit('.', 1)[0] if '.' in path else None
+
+
+def build_parameter_tree(pages):
+    """Fusionner les chemins de chaque page (url, page_data) en un arbre plat indexe par chemin
+
+    Chaque noeud garde types observes, exemples, pages sources, et ses
+    enfants directs ; les parents absents (ex. 'tools' pour 'tools[]')
+    sont crees pour que l'arbre se parcoure depuis ses racines.
+    """
+    tree = {}
+    for url, page_data in pages:
+        _merge_page_paths(tree, url, _page_paths(page_data))
+    return _link_parameter_tree(tree)
+
+
+def update_parameter_tree(tree, changed, pages, order):
+    """Mettre a jour un arbre de build_parameter_tree apres modification de quelques pages
+
+    changed : URLs modifiees, ajoutees ou retirees depuis la construction
+    de l'arbre ; pages : page_data par URL (au moins les pages actuelles de
+    changed et les sources des chemins touches) ; order : rang de chaque
+    page actuelle dans l'ordre de navigation. Seuls les chemins des pages
+    modifiees sont recalcules, a partir de leurs pages sources : le resultat
+    est celui de build_parameter_tree sur toutes les pages, tant que les
+    pages inchangees gardent leur ordre relatif.
+    """
+    current = {url: _page_paths(pages[url]) for url in changed if url in order}
+    affected = {path for path, node in tree.items() if not changed.isdisjoint(node['sources'])}
+    for paths in current.values():
+        affected.update(paths)
+    sources = set(current)
+    for path in affected:
+        if path in tree:
+            sources.update(url for url in tree[path]['sources'] if url not in changed)
+
+    rebuilt = {}
+    for url in sorted(sources, key=order.__getitem__):
+        paths = current[url] if url in current else _page_paths(pages[url])
+        _merge_page_paths(rebuilt, url, {path: info for path, info in paths.items() if path in affected})
+    # Parents crees et liens vers les enfants sont recalcules sur tout l'arbre
+    kept = {path: node for path, node in tree.items() if node['sources'] and path not in affected}
+    for node in kept.values():
+        node.pop('children', None)
+    kept.update(rebuilt)
+    return _link_parameter_tree(kept)
+
+
+def _page_paths(page_data):
+    paths = page_data.get('parameter_paths')
+    return extract_parameter_paths(page_data) if paths is None else paths
+
+
+def _merge_page_paths(tree, url, paths):
+    for path, info in paths.items():
+        _observe_path(tree, path, info['types'], info['examples'], info.get('description'))
+        sources = tree[path].setdefault('sources', [])
+        if not sources or sources[-1] != url:
+            sources.append(url)
+
+
+def _link_parameter_tree(tree):
+    """Creer les parents absents et les listes d'enfants, trier par chemin"""
+    # Ordre trie : le type d'un parent cree ne depend pas de l'ordre des pages
+    for path in sorted(tree):
+        parent = parent_parameter_path(path)
+        while parent is not None and parent not in tree:
+            _observe_path(tree, parent, ['array'] if path.startswith(parent + '[]') else ['object'])
+            tree[parent]['sources'] = []
+            parent = parent_parameter_path(parent)
+    for path in sorted(tree):
+        tree[path].setdefault('children', [])
+        parent = parent_parameter_path(path)
+        if parent is not None:
+            tree[parent].setdefault('children', []).append(path)
+    return {path: tree[path] for path in sorted(tree)}
@@ -0,0 +1,118 @@
+"""Extraction en processus separes et suivi des files du pipeline"""
+
+import threading
+import time
+import logging
+from collections import Counter
+
+from .dom import parse_html, select_one, text_content
+from .extraction import (
+    assemble_page_data,
+    content_hash,
+    deepen_page_data,
+    extract_raw_static,
+    MAIN_CONTENT_SELECTOR,
+    nav_links_from_links,
+    next_link_from_links,
+)
+
+
+def extract_snapshot(snapshot, options):
+    """Extraire un instantane HTML (execute dans un processus du pool)
+
+    options porte la configuration utile a l'extraction (keywords_file,
+    keyword_max_offsets, deep) : un processus du pool ne voit pas
+    SCRAPER_CONFIG tel que modifie par le processus principal. Sans deep,
+    l'extraction fine est laissee a deepen_snapshot et le texte visible
+    est renvoye pour elle.
+    """
+    started = time.perf_counter()
+    dom = parse_html(snapshot['html'])
+    main_content = select_one(dom, MAIN_CONTENT_SELECTOR)
+    if main_content is None and snapshot['source'] == 'http':
+        return {'needs_browser': True, 'seconds': time.perf_counter() - started}
+    raw = extract_raw_static(dom, snapshot['final_url'])
+    deep = options.get('deep', True)
+    extraction = {
+        'page_data': assemble_page_data(raw, snapshot['final_url'], deep=deep, options=options),
+        'next_url': next_link_from_links(raw['links']),
+        'nav_links': nav_links_from_links(raw['links']),
+        'content_hash': content_hash(text_content(main_content if main_content is not None else dom)),
+        'seconds': time.perf_counter() - started
+    }
+    if not deep:
+        extraction['visible_text'] = raw['visible_text']
+    return extraction
+
+
+def deepen_snapshot(page_data, visible_text, options):
+    """Deuxieme passe (processus du pool) : extraction fine d'une page qui ne double aucune page deja vue"""
+    started = time.perf_counter()
+    return {
+        'page_data': deepen_page_data(page_data, visible_text, options),
+        'seconds': time.perf_counter() - started
+    }
+
+
+class PipelineMonitor:
+    """Debit par etage et profondeur des files du pipeline
+
+    Un etage sature a cote d'une file pleine en amont designe le goulot.
+    """
+
+    STAGES = ('capture', 'extraction', 'fusion')
+
+    def __init__(self, queues):
+        self.queues = queues
+        self.started = time.perf_counter()
+        self.items = Counter()
+        self.busy = Counter()
+        self.depths = {name: [] for name in queues}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.items[stage] += 1
+            self.busy[stage] += seconds
+
+    def sample(self):
+        with self._lock:
+            for name, depth in self.queues.items():
+                self.depths[name].append(depth())
+
+    def start(self, interval=1.0):
+        def run():
+            while not self._stop.wait(interval):
+                self.sample()
+                logging.info(f"Pipeline: {self.describe()}")
+        self._thread = threading.Thread(target=run, name='pipeline-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.sample()
+
+    def describe(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        rates = ', '.join(f"{stage} {self.items[stage] / elapsed:.1f} p/s" for stage in self.STAGES)
+        depths = ', '.join(f"{name} {values[-1] if values else 0}" for name, values in self.depths.items())
+        return f"{rates} | files: {depths}"
+
+    def report(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'stages': {stage: {
+                'pages': self.items[stage],
+                'busy_s': round(self.busy[stage], 3),
+                'pages_per_second': round(self.items[stage] / elapsed, 2)
+            } for stage in self.STAGES},
+            'queues': {name: {
+                'max': max(values) if values else 0,
+                'mean': round(sum(values) / len(values), 2) if values else 0
+            } for name, values in self.depths.items()}
+        }
@@ -0,0 +1,285 @@
+"""Frontiere d'URLs partagee et politesse par hote (seau a jetons, recul AIMD)"""
+
+import email.utils
+import heapq
+import itertools
+import random
+import threading
+import time
+import logging
+from collections import Counter, deque
+from urllib.parse import urlparse
+from datetime import datetime, timezone
+
+
+class CrawlFrontier:
+    """Frontiere d'URLs partagee et dedupliquee entre les workers paralleles
+
+    Le budget max_pages porte sur les pages fusionnees (mark_merged) : les
+    liens Next (priorite 0 ou moins) passent tant qu'il reste de la place,
+    les prechargements (priorite 1 et plus) seulement tant que le nombre
+    total d'URLs prises reste sous le budget. Un prechargement ne peut donc
+    pas priver la chaine Next de ses pages.
+    """
+
+    def __init__(self, max_pages):
+        self.max_pages = max_pages
+        self._heap = []
+        self._seen = set()
+        self._pending = {}
+        self._counter = itertools.count()
+        self._in_flight = 0
+        self._taken = 0
+        self._merged = 0
+        self._cond = threading.Condition()
+
+    def push(self, url, priority=1):
+        """Ajouter une URL (priorite 0 = lien Next, 1 = lien de navigation)
+
+        Une URL deja en attente avec une priorite plus faible est promue
+        (ex. page de la navigation qui s'avere etre le lien Next suivant).
+        """
+        with self._cond:
+            if url in self._seen and priority >= self._pending.get(url, priority):
+                return False
+            self._seen.add(url)
+            self._pending[url] = priority
+            heapq.heappush(self._heap, (priority, next(self._counter), url))
+            self._cond.notify()
+            return True
+
+    def pop(self):
+        """Prendre la prochaine URL, ou None quand le crawl est termine"""
+        with self._cond:
+            while self._merged < self.max_pages:
+                # Entrees perimees : URL deja prise ou promue depuis
+                while self._heap and self._pending.get(self._heap[0][2]) != self._heap[0][0]:
+                    heapq.heappop(self._heap)
+                if self._heap and self._allowed(self._heap[0][0]):
+                    _, _, url = heapq.heappop(self._heap)
+                    del self._pending[url]
+                    self._in_flight += 1
+                    self._taken += 1
+                    return url
+                # Attendre les URLs en cours : elles peuvent encore en ajouter ou etre remises (retry)
+                if self._in_flight == 0:
+                    return None
+                self._cond.wait()
+            return None
+
+    def _allowed(self, priority):
+        if self._merged + self._in_flight >= self.max_pages:
+            return False
+        return priority <= 0 or self._taken < self.max_pages
+
+    def task_done(self):
+        """Signaler qu'une URL prise avec pop() a ete traitee"""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def mark_merged(self):
+        """Compter une page fusionnee dans le resultat final"""
+        with self._cond:
+            self._merged += 1
+            self._cond.notify_all()
+
+    def retry(self, url):
+        """Remettre en tete une URL deja prise (ex. repli navigateur), sans la recompter"""
+        with self._cond:
+            self._pending[url] = -1
+            heapq.heappush(self._heap, (-1, next(self._counter), url))
+            self._in_flight -= 1
+            self._taken -= 1
+            self._cond.notify_all()
+
+    def restore(self, done_urls):
+        """Marquer des URLs deja traitees lors d'une execution precedente"""
+        with self._cond:
+            new_urls = set(done_urls) - self._seen
+            self._seen.update(new_urls)
+            self._taken += len(new_urls)
+
+
+THROTTLE_STATUSES = {429, 503}
+
+
+def retry_after_seconds(value):
+    """Delai demande par un en-tete Retry-After (secondes ou date HTTP), None s'il est illisible"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def jittered_backoff(base, attempt):
+    """Backoff exponentiel avec gigue : entre la moitie et la totalite du palier"""
+    delay = base * 2 ** (attempt - 1)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class _HostState:
+    """Debit, fenetre de concurrence et compteurs d'un hote"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.window = 1.0
+        self.tokens = 1.0
+        self.refilled = time.monotonic()
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.slow_start = True
+        self.last_decrease = 0.0
+        self.best_latency = None
+        self.counts = Counter()
+        self.waited = 0.0
+        self.starts = deque(maxlen=HostScheduler.OBSERVED_REQUESTS)
+
+    def refill(self, now):
+        self.tokens = min(max(1.0, self.window), self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+
+    def observed_rate(self):
+        """Debit reellement atteint sur les dernieres requetes, None sans mesure"""
+        if len(self.starts) < 2 or self.starts[-1] <= self.starts[0]:
+            return None
+        return (len(self.starts) - 1) / (self.starts[-1] - self.starts[0])
+
+
+class HostScheduler:
+    """Politesse adaptative par hote : seau a jetons et concurrence AIMD
+
+    Chaque hote a un debit (jetons par seconde) et une fenetre de requetes
+    simultanees. Un succes apres l'attente d'un jeton augmente le debit, un
+    succes apres l'attente d'une place augmente la fenetre : exponentiellement
+    tant qu'aucune congestion n'a ete vue (demarrage lent), puis
+    additivement. Le debit ne depasse jamais RATE_HEADROOM fois le debit
+    reellement observe, pour ne pas deriver quand la fenetre freine. Une reponse
+    429/5xx, une erreur reseau ou une latence tres superieure a la meilleure
+    observee les multiplie par 'backoff' (au plus une fois par seconde) ;
+    Retry-After suspend l'hote le temps demande.
+    """
+
+    DECREASE_INTERVAL = 1.0  # Une seule baisse par episode de congestion
+    LATENCY_SLACK = 0.25  # Ecart de latence (s) toujours tolere, pour les hotes tres rapides
+    OBSERVED_REQUESTS = 20  # Requetes prises en compte pour mesurer le debit reel
+    RATE_HEADROOM = 2.0  # Marge du debit sur le debit observe (un tour de demarrage lent)
+
+    def __init__(self, rate, rate_min, rate_max, rate_step, backoff, latency_factor, max_concurrency, enabled=True):
+        self.enabled = enabled
+        self.initial_rate = rate
+        self.rate_min = rate_min
+        self.rate_max = rate_max or float('inf')
+        self.rate_step = rate_step
+        self.backoff = backoff
+        self.latency_factor = latency_factor
+        self.max_concurrency = max(1, max_concurrency)
+        self._hosts = {}
+        self._cond = threading.Condition()
+
+    def acquire(self, url):
+        """Attendre un jeton et une place dans la fenetre de l'hote ; retourne un ticket pour release()"""
+        if not self.enabled:
+            return None
+        host = urlparse(url).netloc
+        with self._cond:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = _HostState(self.initial_rate)
+            started = now = time.monotonic()
+            waits = set()
+            while True:
+                state.refill(now)
+                if now < state.blocked_until:
+                    timeout = state.blocked_until - now
+                elif state.in_flight >= int(state.window):
+                    timeout = None
+                    waits.add('window')
+                elif state.tokens < 1:
+                    timeout = (1 - state.tokens) / state.rate
+                    waits.add('rate')
+                else:
+                    break
+                self._cond.wait(timeout)
+                now = time.monotonic()
+            state.tokens -= 1
+            state.in_flight += 1
+            state.counts['requests'] += 1
+            state.waited += now - started
+            state.starts.append(now)
+        return host, state, now, waits
+
+    def release(self, ticket, status=None, error=False, retry_after=None, measure_latency=True):
+        """Rendre la place de l'hote et ajuster debit et fenetre selon la reponse"""
+        if ticket is None:
+            return
+        host, state, started, waits = ticket
+        now = time.monotonic()
+        latency = now - started
+        with self._cond:
+            state.in_flight -= 1
+            if retry_after is not None:
+                state.blocked_until = max(state.blocked_until, now + retry_after)
+                state.counts['retry_after'] += 1
+            if error or (status is not None and (status in THROTTLE_STATUSES or status >= 500)):
+                state.counts['throttled' if status in THROTTLE_STATUSES else 'errors'] += 1
+                self._decrease(host, state, now, f"HTTP {status}" if status else "erreur reseau")
+            elif measure_latency and state.best_latency is not None and latency > max(
+                    state.best_latency * self.latency_factor, state.best_latency + self.LATENCY_SLACK):
+                state.counts['slow'] += 1
+                self._decrease(host, state, now, f"latence {latency * 1000:.0f} ms")
+            elif waits:
+                # Seule une requete qui a attendu prouve que la limite freine : n'augmenter que celle-la
+                self._increase(state, waits)
+            if measure_latency and not error:
+                state.best_latency = latency if state.best_latency is None else min(state.best_latency, latency)
+            self._cond.notify_all()
+
+    def _increase(self, state, waits):
+        if 'rate' in waits:
+            rate = state.rate
+            if state.slow_start:
+                # Un succes par place de la fenetre ~ un aller-retour : le debit double a chaque tour
+                rate *= 1 + 1 / state.window
+            else:
+                rate += self.rate_step / rate
+            observed = state.observed_rate()
+            if observed is not None:
+                rate = min(rate, max(state.rate, observed * self.RATE_HEADROOM))
+            state.rate = min(rate, self.rate_max)
+        if 'window' in waits:
+            state.window += 1 if state.slow_start else 1 / state.window
+            state.window = min(state.window, self.max_concurrency)
+
+    def _decrease(self, host, state, now, reason):
+        state.slow_start = False
+        if now - state.last_decrease < self.DECREASE_INTERVAL:
+            return
+        state.last_decrease = now
+        state.rate = max(self.rate_min, state.rate * self.backoff)
+        state.window = max(1.0, state.window * self.backoff)
+        state.counts['decreases'] += 1
+        logging.info(f"Politesse {host}: {reason}, debit ramene a {state.rate:.1f} req/s, "
+                     f"{int(state.window)} requete(s) simultanee(s)")
+
+    def report(self):
+        with self._cond:
+            return {host: {
+                'rate': round(state.rate, 2),
+                'concurrency': int(state.window),
+                'requests': state.counts['requests'],
+                'throttled': state.counts['throttled'],
+                'errors': state.counts['errors'],
+                'slow_responses': state.counts['slow'],
+                'retry_after': state.counts['retry_after'],
+                'decreases': state.counts['decreases'],
+                'waited_s': round(state.waited, 3)
+            } for host, state in self._hosts.items()}
@@ -0,0 +1,1779 @@
+"""Scraper de la documentation Vapi (navigateur, HTTP, parallele et pipeline)"""
+
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import logging
+from collections import ChainMap, Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from urllib.parse import urljoin, urlparse
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.chrome.options import Options
+
+from .config import SCRAPER_CONFIG
+from .dom import parse_html, select_one, text_content
+from .extraction import (
+    assemble_page_data,
+    compiled_extractor_script,
+    content_hash,
+    extract_raw_static,
+    MAIN_CONTENT_SELECTOR,
+    nav_links_from_links,
+    next_link_from_links,
+    parse_sitemap,
+)
+from .browser import (
+    lean_blocked_patterns,
+    process_tree_rss,
+    SETTLE_BOOTSTRAP_JS,
+    SETTLE_WAIT_JS,
+    TRANSFER_SIZE_JS,
+)
+from .keywords import keyword_matcher
+from .parameters import build_parameter_tree, update_parameter_tree
+from .pipeline import deepen_snapshot, extract_snapshot, PipelineMonitor
+from .duplicates import canonical_entries, duplicate_counts, DuplicateDetector
+from .instrumentation import Instrumentation, percentile, PHASE_BUCKETS_MS
+from .storage import (
+    CrawlCheckpoint,
+    index_page_records,
+    iter_page_records,
+    JsonlPageSink,
+    KnowledgeBaseIndex,
+    KnowledgeBaseStore,
+    knowledge_base_version,
+    page_summary,
+    PageArchive,
+)
+from .scheduling import (
+    CrawlFrontier,
+    HostScheduler,
+    jittered_backoff,
+    retry_after_seconds,
+    THROTTLE_STATUSES,
+)
+from .export import export_supabase
+
+
+class VapiSequentialScraper:
+    def __init__(self):
+        self.driver = None
+        self.scraped_data = {
+            'metadata': {
+                'scraped_at': datetime.now().isoformat(),
+                'total_pages': 0,
+                'version': '2.0.0',
+                'scraping_method': 'sequential_next_button'
+            },
+            'pages': {},
+            'navigation_path': [],
+            'parameters': {
+                'all': [],
+                'categories': {}
+            },
+            'examples': [],
+            'schemas': [],
+            'validators': {}
+        }
+        self.visited_urls = set()
+        self.previous_pages = {}
+        self.previous_validators = {}
+        # Versions precedentes de toutes les pages (previous_pages se vide au fil de la fusion)
+        self.previous_versions = {}
+        # Agregats de la base precedente, mis a jour avec les seules pages modifiees
+        self.previous_aggregates = None
+        # Pages reprises telles quelles : seules canoniques sures pour une page reprise
+        self.unchanged_pages = set()
+        self.page_sink = None
+        self.stream_counts = Counter()
+        self.duplicates = DuplicateDetector(SCRAPER_CONFIG['duplicate_similarity']) if SCRAPER_CONFIG['near_duplicates'] else None
+        self.checkpoint = None
+        self.resuming = False
+        self.archive = None
+        self.replaying = False
+        self._archived = {}
+        self.failed_pages = []
+        self.fetch_stats = Counter()
+        self.settle_times = []
+        self.transfer_stats = Counter()
+        self.settle_timeouts = 0
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self._drivers = []
+        self.session = self.create_session()
+        self.scheduler = HostScheduler(
+            SCRAPER_CONFIG['host_rate'], SCRAPER_CONFIG['host_rate_min'], SCRAPER_CONFIG['host_rate_max'],
+            SCRAPER_CONFIG['host_rate_step'], SCRAPER_CONFIG['host_backoff'], SCRAPER_CONFIG['host_latency_factor'],
+            SCRAPER_CONFIG['workers'], enabled=SCRAPER_CONFIG['politeness']
+        )
+        # Compiler les mots-cles des le depart : un fichier absent echoue avant le crawl
+        self.keywords = keyword_matcher(SCRAPER_CONFIG['keywords_file'])
+        self.instrumentation = Instrumentation(enabled=SCRAPER_CONFIG['instrumentation'])
+        
+    def setup_driver(self):
+        """Initialiser le driver Selenium avec Chrome"""
+        self.driver = self._get_driver()
+
+    def create_session(self):
+        """Session HTTP partagee, avec un pool de connexions par worker"""
+        session = requests.Session()
+        pool_size = max(10, SCRAPER_CONFIG['workers'])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = SCRAPER_CONFIG['user_agent']
+        return session
+
+    def _get_driver(self):
+        """Driver Chrome du thread courant, cree a la premiere utilisation"""
+        driver = getattr(self._local, 'driver', None)
+        if driver is None:
+            driver = self.create_driver()
+            self._local.driver = driver
+            with self._stats_lock:
+                self._drivers.append(driver)
+        return driver
+
+    def _release_driver(self):
+        """Fermer le driver du thread courant s'il existe"""
+        driver = getattr(self._local, 'driver', None)
+        if driver is not None:
+            self._local.driver = None
+            self._local.pages = 0
+            if self.driver is driver:
+                self.driver = None
+            with self._stats_lock:
+                self._drivers.remove(driver)
+            driver.quit()
+
+    def create_driver(self):
+        """Creer un nouveau driver Chrome (un par worker en mode parallele)"""
+        logging.info("Initialisation du driver Chrome...")
+
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')  # Mode sans interface
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--window-size=1920,1080')
+        chrome_options.add_argument(f"--user-agent={SCRAPER_CONFIG['user_agent']}")
+        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+        chrome_options.page_load_strategy = SCRAPER_CONFIG['page_load_strategy']
+        
+        try:
+            driver = webdriver.Chrome(options=chrome_options)
+            # Pas d'attente implicite : les attentes explicites (settle, WebDriverWait) suffisent
+            # et une attente implicite ralentirait chaque recherche d'element absent
+            driver.implicitly_wait(0)
+            driver.set_script_timeout(SCRAPER_CONFIG['delay'] + SCRAPER_CONFIG['timeout'])
+            # Masquer le fait que c'est un bot
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            try:
+                # Suivre reseau et mutations des le debut de chaque document
+                driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': SETTLE_BOOTSTRAP_JS})
+            except Exception as e:
+                logging.warning(f"Amorce de l'attente adaptative indisponible (CDP): {e}")
+            if SCRAPER_CONFIG['lean_browser']:
+                self._block_resources(driver)
+            logging.info("Driver Chrome initialise avec succes")
+            return driver
+        except Exception as e:
+            logging.error(f"Erreur lors de l'initialisation du driver: {e}")
+            raise
+
+    def _block_resources(self, driver):
+        """Mode allege : ne pas telecharger images, polices, CSS, medias ni traceurs tiers"""
+        patterns = lean_blocked_patterns(SCRAPER_CONFIG)
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+            logging.info(f"Navigateur allege: {len(patterns)} motifs d'URL bloques")
+        except Exception as e:
+            logging.warning(f"Blocage des ressources indisponible (CDP): {e}")
+
+    def _after_browser_page(self, driver):
+        """Mesurer octets et memoire du navigateur, le recycler si besoin
+
+        Le crawl ne depend pas du navigateur : le fermer entre deux pages ne
+        perd aucun etat, le suivant est recree a la page suivante.
+        """
+        self._local.pages = getattr(self._local, 'pages', 0) + 1
+        try:
+            transferred = driver.execute_script(TRANSFER_SIZE_JS) or 0
+        except Exception:
+            transferred = 0
+        service = getattr(driver, 'service', None)
+        process = getattr(service, 'process', None)
+        rss = process_tree_rss(process.pid) if process is not None else None
+        with self._stats_lock:
+            self.transfer_stats['browser_bytes'] += int(transferred)
+            if rss is not None:
+                self.transfer_stats['browser_peak_rss'] = max(self.transfer_stats['browser_peak_rss'], rss)
+
+        max_pages = SCRAPER_CONFIG['driver_max_pages']
+        max_rss = SCRAPER_CONFIG['driver_max_rss_mb'] * 1024 * 1024
+        reason = None
+        if max_pages and self._local.pages >= max_pages:
+            reason = f"{self._local.pages} pages"
+        elif rss is not None and max_rss and rss >= max_rss:
+            reason = f"{rss / 1024 / 1024:.0f} Mo"
+        if reason:
+            logging.info(f"Recyclage du navigateur apres {reason}")
+            self._release_driver()
+            with self._stats_lock:
+                self.transfer_stats['driver_recycles'] += 1
+
+    def extract_page_data(self, url, driver=None):
+        """Extraire toutes les données d'une page
+
+        Un seul script compile depuis EXTRACTOR_SPEC parcourt le DOM une fois.
+        Retourne (page_data, liens) ; les liens servent a trouver le lien Next
+        et la navigation laterale sans second script.
+        """
+        logging.info(f"Extraction des donnees de: {url}")
+        driver = driver or self.driver
+
+        try:
+            # Attendre que la page soit complètement chargée
+            WebDriverWait(driver, SCRAPER_CONFIG['timeout']).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+
+            raw = driver.execute_script(compiled_extractor_script())
+            page_data = self._assemble_page(raw, url)
+
+            logging.info(f"Donnees extraites: {len(page_data.get('parameters', []))} parametres, {len(page_data.get('examples', []))} exemples")
+            return page_data, raw['links']
+            
+        except Exception as e:
+            logging.error(f"Erreur lors de l'extraction de {url}: {e}")
+            return {
+                'url': url,
+                'error': str(e),
+                'scraped_at': datetime.now().isoformat()
+            }, []
+    
+    def _assemble_page(self, raw, url):
+        """assemble_page_data, sans extraction fine si la page double une page deja vue"""
+        deep = True
+        if self.duplicates is not None and SCRAPER_CONFIG['duplicate_skip_extraction']:
+            canonical = self.duplicates.match_raw(raw)
+            if canonical is not None:
+                logging.info(f"Quasi-doublon de {canonical}, extraction fine sautee")
+                deep = False
+        return assemble_page_data(raw, url, deep=deep)
+
+    def fetch_page(self, url, with_nav_links=False):
+        """Recuperer une page : HTTP statique si possible, navigateur sinon
+
+        Retourne un dict avec page_data, next_url (lien Next brut), nav_links
+        (ou None), validator (ETag, Last-Modified, hash du contenu principal)
+        et reused (page inchangee reprise de la base precedente).
+        """
+        result = {'page_data': None, 'next_url': None, 'nav_links': None, 'validator': {}, 'reused': False}
+        incremental = SCRAPER_CONFIG['incremental']
+
+        phase = self.instrumentation.phase
+        dom = None
+        if incremental or SCRAPER_CONFIG['fetch_mode'] == 'auto':
+            with phase('http_get'):
+                response = self._http_get(url)
+            if response is not None:
+                with self._stats_lock:
+                    self.transfer_stats['http_bytes'] += len(response.content)
+            if response is not None and response.status_code == 304 and self._is_reusable(url):
+                return self._reuse_page(url, dict(self.previous_validators[url]), result)
+            if response is not None:
+                with phase('parse'):
+                    dom, result['validator'] = self._parse_static_response(url, response)
+                if self._is_unchanged(url, result['validator']):
+                    return self._reuse_page(url, result['validator'], result)
+
+        if dom is not None and SCRAPER_CONFIG['fetch_mode'] == 'auto':
+            logging.info(f"Extraction statique de: {url}")
+            page_url = result['validator'].pop('final_url')
+            self._archive_page(url, response.text, page_url, 'http', result['validator'])
+            with phase('extract'):
+                raw = extract_raw_static(dom, page_url)
+                result['page_data'] = self._assemble_page(raw, page_url)
+            with phase('find_next_link'):
+                result['next_url'] = next_link_from_links(raw['links'])
+                if with_nav_links:
+                    result['nav_links'] = nav_links_from_links(raw['links'])
+            self._count_fetch('http')
+            result['validator']['next_url'] = result['next_url']
+            return result
+        result['validator'].pop('final_url', None)
+
+        driver = self._get_driver()
+        self._browser_get(driver, url)
+
+        # Attendre que la page soit stable (au plus 'delay' secondes)
+        with phase('settle'):
+            settle = self.settle_page(driver)
+
+        if incremental and not result['validator'].get('content_hash'):
+            result['validator']['content_hash'] = self._browser_content_hash(driver)
+            result['validator']['hash_source'] = 'browser'
+            if self._is_unchanged(url, result['validator']):
+                return self._reuse_page(url, result['validator'], result)
+
+        if self.archive is not None:
+            self._archive_page(url, driver.page_source, driver.current_url, 'browser', result['validator'])
+        with phase('extract'):
+            result['page_data'], links = self.extract_page_data(url, driver)
+        result['page_data']['settle_ms'] = settle['waited_ms']
+        with phase('find_next_link'):
+            result['next_url'] = next_link_from_links(links)
+            if with_nav_links:
+                result['nav_links'] = nav_links_from_links(links)
+        self._count_fetch('browser')
+        result['validator']['next_url'] = result['next_url']
+        self._after_browser_page(driver)
+        return result
+
+    def settle_page(self, driver):
+        """Attendre l'inactivite reseau et DOM, avec 'delay' comme plafond
+
+        Retourne {'settled': bool, 'waited_ms': int} ; settled est faux quand
+        le plafond est atteint avant que la page soit stable.
+        """
+        timeout_ms = SCRAPER_CONFIG['delay'] * 1000
+        started = time.perf_counter()
+        try:
+            settle = driver.execute_async_script(SETTLE_WAIT_JS, SCRAPER_CONFIG['settle_quiet_ms'], timeout_ms)
+        except Exception as e:
+            logging.warning(f"Attente adaptative impossible, attente fixe: {e}")
+            time.sleep(max(0, SCRAPER_CONFIG['delay'] - (time.perf_counter() - started)))
+            settle = {'settled': False, 'waited_ms': round((time.perf_counter() - started) * 1000)}
+        if not settle['settled']:
+            logging.info(f"Page encore active apres {settle['waited_ms']} ms, lecture au plafond")
+        with self._stats_lock:
+            self.settle_times.append(settle['waited_ms'])
+            self.settle_timeouts += not settle['settled']
+        return settle
+
+    def _browser_get(self, driver, url):
+        """Charger une page dans le navigateur, au rythme accorde par l'ordonnanceur de l'hote"""
+        with self.instrumentation.phase('politeness_wait', url):
+            ticket = self.scheduler.acquire(url)
+        try:
+            with self.instrumentation.phase('driver_get', url):
+                driver.get(url)
+        except Exception:
+            self.scheduler.release(ticket, error=True)
+            raise
+        # Le temps de chargement d'une page complete ne renseigne pas sur la charge de l'hote
+        self.scheduler.release(ticket, measure_latency=False)
+
+    def _get(self, url, headers=None):
+        """GET HTTP regule par l'ordonnanceur de l'hote ; 429 et 5xx sont retentes
+
+        Retry-After est respecte (plafonne a 'retry_after_max'), sinon backoff
+        exponentiel avec gigue. Retourne la derniere reponse ; un hote qui
+        limite encore apres toutes les tentatives leve une erreur, pour que la
+        page soit retentee plus tard plutot que confiee au navigateur.
+        """
+        attempts = SCRAPER_CONFIG['retries'] + 1
+        for attempt in range(1, attempts + 1):
+            with self.instrumentation.phase('politeness_wait', url):
+                ticket = self.scheduler.acquire(url)
+            try:
+                response = self.session.get(url, headers=headers, timeout=SCRAPER_CONFIG['timeout'])
+            except requests.RequestException:
+                self.scheduler.release(ticket, error=True)
+                raise
+            status = response.status_code
+            retry_after = None
+            if status in THROTTLE_STATUSES:
+                retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+                if retry_after is not None:
+                    retry_after = min(retry_after, SCRAPER_CONFIG['retry_after_max'])
+            self.scheduler.release(ticket, status=status, retry_after=retry_after)
+            if status != 429 and status < 500:
+                return response
+            if attempt == attempts:
+                break
+            delay = retry_after if retry_after is not None else jittered_backoff(SCRAPER_CONFIG['retry_backoff'], attempt)
+            logging.warning(f"HTTP {status} pour {url} (tentative {attempt}/{attempts}), nouvel essai dans {delay:.1f}s")
+            with self.instrumentation.phase('retry_wait', url):
+                time.sleep(delay)
+        if status in THROTTLE_STATUSES:
+            raise RuntimeError(f"HTTP {status}: hote toujours limite apres {attempts} tentatives")
+        return response
+
+    def _http_get(self, url):
+        """GET HTTP, conditionnel (If-None-Match / If-Modified-Since) si la page est reutilisable"""
+        headers = {}
+        if self._is_reusable(url):
+            previous = self.previous_validators[url]
+            if previous.get('etag'):
+                headers['If-None-Match'] = previous['etag']
+            if previous.get('last_modified'):
+                headers['If-Modified-Since'] = previous['last_modified']
+        try:
+            return self._get(url, headers)
+        except requests.RequestException as e:
+            logging.warning(f"Echec HTTP pour {url}, repli navigateur: {e}")
+            return None
+
+    def _parse_static_response(self, url, response):
+        """Parser une reponse HTTP ; le DOM est None si le HTML statique est inexploitable"""
+        validator = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'final_url': response.url
+        }
+        if response.status_code != 200 or 'html' not in response.headers.get('Content-Type', ''):
+            logging.info(f"Reponse HTTP {response.status_code} inexploitable, repli navigateur: {url}")
+            return None, validator
+
+        dom = parse_html(response.text)
+        main_content = select_one(dom, MAIN_CONTENT_SELECTOR)
+        if main_content is None:
+            logging.info(f"Contenu principal absent du HTML statique, repli navigateur: {url}")
+            return None, validator
+
+        validator['content_hash'] = content_hash(text_content(main_content))
+        validator['hash_source'] = 'http'
+        return dom, validator
+
+    def _browser_content_hash(self, driver):
+        """Hash du contenu principal tel que rendu par le navigateur"""
+        text = driver.execute_script(
+            "const main = document.querySelector(arguments[0]) || document.body;"
+            "return main ? main.textContent : '';",
+            MAIN_CONTENT_SELECTOR
+        )
+        return content_hash(text or '')
+
+    def _is_reusable(self, url):
+        """Une page peut etre reprise si l'execution precedente l'a extraite sans erreur"""
+        if not SCRAPER_CONFIG['incremental'] or url not in self.previous_validators:
+            return False
+        previous_page = self.previous_pages.get(url)
+        return previous_page is not None and not previous_page.get('error')
+
+    def _is_unchanged(self, url, validator):
+        """Comparer le hash du contenu avec celui de l'execution precedente"""
+        if not self._is_reusable(url) or not validator.get('content_hash'):
+            return False
+        previous = self.previous_validators[url]
+        return (previous.get('content_hash') == validator['content_hash']
+                and previous.get('hash_source') == validator.get('hash_source'))
+
+    def _reuse_page(self, url, validator, result):
+        """Reprendre une page inchangee sans la re-extraire"""
+        logging.info(f"Page inchangee, reprise de la base precedente: {url}")
+        validator.pop('final_url', None)
+        validator['next_url'] = self.previous_validators[url].get('next_url')
+        result.update(page_data=self.previous_pages[url], next_url=validator['next_url'],
+                      nav_links=[], validator=validator, reused=True)
+        self._count_fetch('reused')
+        return result
+
+    def _count_fetch(self, path):
+        with self._stats_lock:
+            self.fetch_stats[path] += 1
+
+    def _archive_page(self, url, html, final_url, source, validator=None, kind='page'):
+        """Ajouter le HTML recupere a l'archive ; un echec d'archivage n'arrete pas le crawl"""
+        if self.archive is None or self.replaying:
+            return
+        try:
+            with self.instrumentation.phase('archive', url):
+                self.archive.append(url, html, final_url, source, kind, validator)
+        except Exception as e:
+            logging.warning(f"Archivage impossible pour {url}: {e}")
+
+    def _normalize_link(self, url):
+        """Rendre une URL absolue par rapport a la base de la documentation"""
+        if url and url.startswith('/'):
+            url = urljoin(SCRAPER_CONFIG['base_url'], url)
+        return url
+
+    def _is_docs_url(self, url):
+        """Verifier qu'une URL appartient bien a la documentation Vapi"""
+        return urlparse(url).netloc == urlparse(SCRAPER_CONFIG['base_url']).netloc
+
+    def _merge_page(self, url, result):
+        """Ajouter une page a la base, dans l'ordre de navigation
+
+        Parametres, exemples et schemas agreges sont calcules ensuite par
+        generate_knowledge_base (en incremental, a partir des seules pages
+        modifiees) : une base incrementale est identique, octet pour octet,
+        a une base complete.
+        """
+        self._deduplicate(url, result)
+        page_data = result['page_data']
+        self.scraped_data['navigation_path'].append(url)
+
+        if self.page_sink is not None:
+            # Mode flux : la page part sur disque, seuls les compteurs restent en memoire
+            if not result.get('streamed'):
+                with self.instrumentation.phase('sink_write', url):
+                    self.page_sink.write(url, page_data, result['validator'])
+            summary = result.get('summary') or page_summary(page_data)
+            result.update(summary=summary, page_data=None, streamed=True)
+            self.stream_counts['pages'] += 1
+            self.stream_counts['examples'] += summary['examples']
+            self.stream_counts['schemas'] += summary['schemas']
+        else:
+            self.scraped_data['pages'][url] = page_data
+            self.scraped_data['validators'][url] = result['validator']
+        # La version precedente ne sert plus qu'aux pages reprises qui la referencent (previous_versions)
+        self.previous_pages.pop(url, None)
+
+    def _deduplicate(self, url, result):
+        """Marquer une page nouvelle et ses blocs quasi identiques a du deja vu
+
+        Appele uniquement a la fusion, dans l'ordre de navigation : la page
+        canonique est toujours la premiere de cet ordre, quel que soit le
+        nombre de workers. Une page deja traitee (reprise, base precedente,
+        deja ecrite en flux) est seulement reprise comme canonique.
+        """
+        page_data = result.get('page_data')
+        if result.get('reused') and page_data is not None:
+            if self._stale_references(url, page_data):
+                # Sa page canonique a change ou disparu : la page redevient une page nouvelle
+                logging.info(f"Page inchangee dont la page canonique a change, recalculee: {url}")
+                page_data = result['page_data'] = self._rehydrate(url, page_data)
+                result['reused'] = False
+            else:
+                self.unchanged_pages.add(url)
+        if self.duplicates is None:
+            return
+        if page_data is None:
+            summary = result.get('summary') or {}
+            if not summary.get('duplicate_of'):
+                self.duplicates.register(url, fingerprint=summary.get('fingerprint'))
+        elif result.get('reused') or 'fingerprint' in page_data:
+            self.duplicates.register(url, page_data)
+        else:
+            with self.instrumentation.phase('dedup', url):
+                page_data = result['page_data'] = self.duplicates.process(url, page_data)
+            if 'duplicate_of' in page_data and SCRAPER_CONFIG['duplicate_skip_extraction']:
+                # Meme resultat que l'extraction fine sautee, que le doublon ait ete reconnu a la capture ou ici
+                page_data.update(parameters=[], parameter_hits={}, parameter_paths={})
+
+    def _stale_references(self, url, page_data):
+        """Vrai si la page renvoie a une page canonique qui n'a pas ete reprise telle quelle"""
+        targets = {entry['duplicate_of']['url'] for key in DuplicateDetector.BLOCK_KEYS
+                   for entry in page_data.get(key, []) if 'duplicate_of' in entry}
+        if 'duplicate_of' in page_data:
+            targets.add(page_data['duplicate_of']['url'])
+        targets.discard(url)
+        return any(target not in self.unchanged_pages for target in targets)
+
+    def _rehydrate(self, url, page_data):
+        """Page reprise sans marques de doublon, ses blocs references recopies depuis la version precedente"""
+        page_data = {name: value for name, value in page_data.items() if name not in ('fingerprint', 'duplicate_of')}
+        for key in DuplicateDetector.BLOCK_KEYS:
+            if key not in page_data:
+                continue
+            entries = page_data[key] = list(page_data[key])
+            for position, entry in enumerate(entries):
+                reference = entry.get('duplicate_of')
+                if reference is None:
+                    continue
+                source = entries if reference['url'] == url else self.previous_versions.get(reference['url'], {}).get(key, [])
+                if reference['position'] < len(source) and 'content' in source[reference['position']]:
+                    entries[position] = {name: value for name, value in entry.items() if name != 'duplicate_of'}
+                    entries[position]['content'] = source[reference['position']]['content']
+        return page_data
+
+    def load_previous_knowledge_base(self):
+        """Charger la base precedente comme point de depart du mode incremental"""
+        try:
+            with open(SCRAPER_CONFIG['output_file'], 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Pas de base precedente exploitable, scrapping complet: {e}")
+            return
+
+        self.previous_pages = previous.get('pages', {})
+        self.previous_versions = dict(self.previous_pages)
+        self.previous_validators = previous.get('validators', {})
+        self.previous_aggregates = {
+            'navigation_path': previous.get('navigation_path', []),
+            'tree': previous.get('parameters', {}).get('tree'),
+            'statistics': previous.get('metadata', {}).get('statistics')
+        }
+        logging.info(f"Base precedente chargee: {len(self.previous_pages)} pages, "
+                     f"{len(self.previous_validators)} validateurs")
+
+    def _apply_incremental_removals(self):
+        """Compter les pages de la base precedente absentes de ce crawl (elles ne sont pas reprises)"""
+        removed = list(self.previous_pages)
+        self.previous_pages.clear()
+
+        self.scraped_data['metadata']['incremental'] = {
+            'hits': self.fetch_stats['reused'],
+            'misses': self.fetch_stats['http'] + self.fetch_stats['browser'],
+            'removed_pages': len(removed)
+        }
+
+    def scrape_sequentially(self):
+        """Scrapper séquentiellement en suivant les liens Next"""
+        current_url = SCRAPER_CONFIG['start_url']
+        page_count = 0
+        if self.resuming:
+            current_url, page_count = self._restore_sequential()
+        
+        logging.info(f"Debut du scrapping sequentiel depuis: {current_url}")
+        
+        while current_url and page_count < SCRAPER_CONFIG['max_pages']:
+            if current_url in self.visited_urls:
+                logging.warning(f"URL deja visitee, arret: {current_url}")
+                break
+                
+            try:
+                # Naviguer vers la page
+                logging.info(f"Page {page_count + 1}/{SCRAPER_CONFIG['max_pages']}: {current_url}")
+                self.visited_urls.add(current_url)
+                page_count += 1
+                
+                with self.instrumentation.page(current_url):
+                    # Extraire les données et chercher le lien Next
+                    result = self._fetch_with_retry(current_url)
+                    if result is None:
+                        # Page abandonnee : retrouver le lien Next par HTTP pour continuer
+                        next_url = self._recover_next_link(current_url)
+                    else:
+                        with self.instrumentation.phase('merge'):
+                            self._merge_page(current_url, result)
+                        next_url = result['next_url']
+
+                    if next_url:
+                        # Normaliser l'URL
+                        next_url = self._normalize_link(next_url)
+
+                        # Vérifier que c'est bien une page de documentation Vapi
+                        if not self._is_docs_url(next_url):
+                            logging.warning(f"Lien Next hors documentation: {next_url}")
+                            next_url = None
+                    else:
+                        logging.info("Aucun lien Next trouve, fin du scrapping")
+
+                    with self.instrumentation.phase('checkpoint'):
+                        self._checkpoint_page(current_url, result, next_url)
+                current_url = next_url
+                    
+            except Exception as e:
+                logging.error(f"Erreur lors du scrapping de {current_url}: {e}")
+                break
+        
+        self.scraped_data['metadata']['total_pages'] = self._aggregate_count('pages')
+        logging.info(f"Scrapping termine: {self.scraped_data['metadata']['total_pages']} pages")
+    
+    def _canonical_url(self, url):
+        """Forme comparable d'une URL de documentation (absolue, sans ancre ni / final)"""
+        url = self._normalize_link(url).split('#')[0]
+        return url.rstrip('/') if urlparse(url).path not in ('', '/') else url
+
+    def _discovery_document(self, url):
+        """Sitemap ou page de depart : (texte, URL finale), depuis l'archive en rejeu"""
+        if self.replaying:
+            # Sans enregistrement de decouverte, la page elle-meme fait l'affaire
+            record = self.archive.get(url, kind='discovery') or self.archive.get(url)
+            if record is None:
+                raise LookupError(f"absent de l'archive: {url}")
+            headers, text = record
+            return text, headers['X-Final-URL']
+        response = self._get(url)
+        response.raise_for_status()
+        self._archive_page(url, response.text, response.url, 'http', kind='discovery')
+        return response.text, response.url
+
+    def _sitemap_urls(self, sitemap_url, depth=0):
+        """Pages d'un sitemap, en suivant les index de sitemaps"""
+        text, _ = self._discovery_document(sitemap_url)
+        pages, sitemaps = parse_sitemap(text.encode('utf-8'))
+        if depth < 3:
+            for child in sitemaps:
+                pages.extend(self._sitemap_urls(child, depth + 1))
+        return pages
+
+    def _sidebar_urls(self):
+        """Liens de la navigation laterale de la page de depart, dans l'ordre du document"""
+        html, final_url = self._discovery_document(SCRAPER_CONFIG['start_url'])
+        raw = extract_raw_static(parse_html(html), final_url)
+        return nav_links_from_links(raw['links'])
+
+    def discover_pages(self):
+        """Construire la liste complete des pages avant tout telechargement
+
+        L'ordre du document vient de la barre laterale ; le sitemap ajoute les
+        pages qu'elle ne montre pas. Retourne (urls, source) ou ([], None) si
+        rien n'a ete trouve (le crawl suit alors les liens Next).
+        """
+        mode = SCRAPER_CONFIG['discovery']
+        sources = {'sidebar': [], 'sitemap': []}
+        for source in ('sidebar', 'sitemap'):
+            if mode not in (source, 'auto'):
+                continue
+            try:
+                if source == 'sidebar':
+                    sources[source] = self._sidebar_urls()
+                else:
+                    sources[source] = self._sitemap_urls(urljoin(SCRAPER_CONFIG['base_url'] + '/', 'sitemap.xml'))
+            except Exception as e:
+                logging.warning(f"Decouverte par {source} impossible: {e}")
+
+        urls, seen = [], set()
+        for url in sources['sidebar'] + sources['sitemap']:
+            canonical = self._canonical_url(url)
+            if canonical not in seen and self._is_docs_url(canonical):
+                seen.add(canonical)
+                urls.append(canonical)
+        if not urls:
+            logging.warning("Aucune page decouverte, repli sur la chaine Next")
+            return [], None
+
+        start_url = self._canonical_url(SCRAPER_CONFIG['start_url'])
+        if start_url not in seen:
+            urls.insert(0, start_url)
+        used = '+'.join(source for source in ('sidebar', 'sitemap') if sources[source])
+        logging.info(f"{len(urls)} pages decouvertes ({used})")
+        return urls, used
+
+    def scrape_discovered(self, urls, source, workers):
+        """Scrapper une liste de pages connue a l'avance, dans n'importe quel ordre
+
+        navigation_path suit l'ordre decouvert ; la chaine Next ne sert plus
+        qu'a verifier cet ordre (metadata.discovery).
+        """
+        urls = urls[:SCRAPER_CONFIG['max_pages']]
+        frontier = CrawlFrontier(len(urls))
+        results = {}
+        lock = threading.Lock()
+        if self.resuming:
+            self._restore_parallel(frontier, results)
+        for index, url in enumerate(urls):
+            self._push_frontier(frontier, url, priority=index)
+
+        done = sum(1 for url in urls if url in results)
+        progress = {'done': done, 'initial': done, 'total': len(urls), 'started': time.perf_counter()}
+        order = {'urls': urls, 'index': 0, 'current': None, 'merged': set(), 'frontier': frontier}
+        logging.info(f"Debut du scrapping de {len(urls)} pages decouvertes ({workers} workers)")
+        threads = [
+            threading.Thread(target=self._parallel_worker, args=(frontier, results, lock, order, progress),
+                             name=f"scraper-{i + 1}")
+            for i in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._merge_ready(order, results)
+
+        self.scraped_data['metadata']['scraping_method'] = f'discovery_{source}'
+        self.scraped_data['metadata']['discovery'] = self._verify_discovery(urls, results, source)
+        self.scraped_data['metadata']['total_pages'] = self._aggregate_count('pages')
+        logging.info(f"Scrapping termine: {self.scraped_data['metadata']['total_pages']} pages")
+
+    def _verify_discovery(self, urls, results, source):
+        """Comparer l'ordre decouvert aux liens Next des pages"""
+        position = {url: index for index, url in enumerate(urls)}
+        checked = in_order = 0
+        mismatches, missing = [], []
+        for index, url in enumerate(urls):
+            next_url = (results.get(url) or {}).get('next_url')
+            if not next_url:
+                continue
+            next_url = self._canonical_url(next_url)
+            checked += 1
+            if next_url not in position:
+                if next_url not in missing:
+                    missing.append(next_url)
+            elif position[next_url] == index + 1:
+                in_order += 1
+            else:
+                mismatches.append({'url': url, 'next': next_url,
+                                   'expected': urls[index + 1] if index + 1 < len(urls) else None})
+        if missing:
+            logging.warning(f"{len(missing)} pages atteintes par un lien Next absentes de la decouverte")
+        if mismatches:
+            logging.warning(f"{len(mismatches)} liens Next en desaccord avec l'ordre decouvert")
+        return {
+            'source': source,
+            'discovered': len(urls),
+            'next_links_checked': checked,
+            'next_links_in_order': in_order,
+            'order_agreement': round(in_order / checked, 3) if checked else None,
+            'mismatches': mismatches[:20],
+            'missing_from_discovery': missing[:50]
+        }
+
+    def scrape_pipeline(self, urls=None, source=None):
+        """Scrapper en trois etages relies par des files bornees
+
+        Capture (threads) : HTML brut et validateurs, par HTTP ou navigateur.
+        Extraction (processus) : parseur HTML et EXTRACTOR_SPEC hors du GIL.
+        Fusion (ce thread) : agregats mis a jour au fil de l'eau, dans l'ordre
+        de navigation. Sans liste decouverte (urls), les liens Next extraits
+        alimentent la capture.
+        """
+        workers = SCRAPER_CONFIG['workers']
+        queue_size = SCRAPER_CONFIG['queue_size']
+        if urls is not None:
+            urls = urls[:SCRAPER_CONFIG['max_pages']]
+            frontier = CrawlFrontier(len(urls))
+        elif self.replaying:
+            frontier = CrawlFrontier(max(SCRAPER_CONFIG['max_pages'], len(self._archived)))
+        else:
+            frontier = CrawlFrontier(SCRAPER_CONFIG['max_pages'])
+        results = {}
+        if self.resuming:
+            self._restore_parallel(frontier, results)
+        if urls is not None:
+            for index, url in enumerate(urls):
+                self._push_frontier(frontier, url, priority=index)
+        elif not self.resuming:
+            self._push_frontier(frontier, SCRAPER_CONFIG['start_url'], priority=0)
+            if self.replaying:
+                # Les pages archivees sont connues d'avance : les extraire en parallele,
+                # la fusion suit toujours la chaine Next
+                for index, url in enumerate(self._archived, start=1):
+                    self._push_frontier(frontier, url, priority=index)
+
+        snapshots = queue.Queue(maxsize=queue_size)
+        extracted = queue.Queue()
+        in_flight = threading.BoundedSemaphore(queue_size)
+        pending_extractions = [0]
+        monitor = PipelineMonitor({
+            'snapshots': snapshots.qsize,
+            'extraction': lambda: pending_extractions[0],
+            'fusion': extracted.qsize
+        })
+        order = {'urls': urls, 'index': 0, 'current': SCRAPER_CONFIG['start_url'], 'merged': set(),
+                 'frontier': frontier}
+        options = {key: SCRAPER_CONFIG[key] for key in ('keywords_file', 'keyword_max_offsets')}
+        # Extraction fine sautee pour les doublons : elle devient une deuxieme passe, apres comparaison
+        options['deep'] = self.duplicates is None or not SCRAPER_CONFIG['duplicate_skip_extraction']
+        self._force_browser = set()
+
+        # Jamais fork : les threads de capture, du moniteur et des requetes HTTP tournent deja, un
+        # processus forke pourrait heriter d'un verrou pris. forkserver quand il existe, spawn sinon.
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['vapi_scraper.pipeline'])
+        else:
+            context = multiprocessing.get_context('spawn')
+        pool = ProcessPoolExecutor(max_workers=SCRAPER_CONFIG['extract_processes'], mp_context=context)
+
+        def capture():
+            try:
+                while True:
+                    url = frontier.pop()
+                    if url is None:
+                        break
+                    started = time.perf_counter()
+                    # Toute URL prise produit un element : sinon la frontiere attend sa fin pour toujours
+                    snapshot = None
+                    try:
+                        if self.replaying:
+                            snapshot = self._archived_snapshot(url)
+                        else:
+                            snapshot = self._fetch_with_retry(url, fetch=lambda: self._capture_snapshot(url))
+                    except Exception as e:
+                        logging.error(f"Erreur lors de la capture de {url}: {e}")
+                        self._record_failure(url, 1, e)
+                        snapshot = None
+                    finally:
+                        monitor.record('capture', time.perf_counter() - started)
+                        if snapshot is None or snapshot.get('reused'):
+                            extracted.put((url, snapshot, None, None))
+                        else:
+                            snapshots.put(snapshot)
+            finally:
+                self._release_driver()
+
+        def submit(function, *args):
+            # Un echec de soumission (pool casse) devient l'erreur de la page : la fusion ne l'attend pas en vain
+            try:
+                return pool.submit(function, *args)
+            except Exception as e:
+                future = Future()
+                future.set_exception(e)
+                return future
+
+        def dispatch():
+            while True:
+                snapshot = snapshots.get()
+                if snapshot is None:
+                    extracted.put(None)
+                    return
+                in_flight.acquire()
+                with self._stats_lock:
+                    pending_extractions[0] += 1
+                future = submit(extract_snapshot, snapshot, options)
+                future.add_done_callback(
+                    lambda future, snapshot=snapshot: extracted.put((snapshot['url'], snapshot, future, None)))
+
+        def deepen(url, result):
+            with self._stats_lock:
+                pending_extractions[0] += 1
+            future = submit(deepen_snapshot, result['page_data'], result.pop('visible_text'), options)
+            future.add_done_callback(lambda future: extracted.put((url, None, future, result)))
+
+        def close_capture(threads):
+            for thread in threads:
+                thread.join()
+            snapshots.put(None)
+
+        logging.info(f"Debut du scrapping en pipeline: {workers} captures, "
+                     f"{SCRAPER_CONFIG['extract_processes']} processus d'extraction, files de {queue_size}")
+        capture_threads = [threading.Thread(target=capture, name=f"capture-{i + 1}") for i in range(workers)]
+        helpers = [
+            threading.Thread(target=dispatch, name='pipeline-dispatch'),
+            threading.Thread(target=close_capture, args=(capture_threads,), name='pipeline-close')
+        ]
+        monitor.start()
+        try:
+            for thread in capture_threads + helpers:
+                thread.start()
+            self._merge_ready(order, results)
+            while True:
+                item = extracted.get()
+                if item is None:
+                    break
+                # pending : page en attente de son extraction fine (deuxieme passe)
+                url, snapshot, future, pending = item
+                started = time.perf_counter()
+                if future is not None:
+                    if pending is None:
+                        in_flight.release()
+                    with self._stats_lock:
+                        pending_extractions[0] -= 1
+                retried = deferred = False
+                try:
+                    if pending is None:
+                        result = self._pipeline_result(url, snapshot, future, monitor)
+                    else:
+                        result = self._deepened_result(url, pending, future, monitor)
+                    if result is None:
+                        # Repli navigateur : la page repart en capture
+                        frontier.retry(url)
+                        retried = True
+                    elif self._needs_deep_extraction(result):
+                        deepen(url, result)
+                        deferred = True
+                    else:
+                        self._finish_pipeline_page(url, result, frontier, results, follow_next=urls is None)
+                        self._merge_ready(order, results)
+                except Exception as e:
+                    logging.error(f"Erreur lors du scrapping de {url}: {e}")
+                finally:
+                    if not retried and not deferred:
+                        frontier.task_done()
+                monitor.record('fusion', time.perf_counter() - started)
+        finally:
+            for thread in capture_threads + helpers:
+                thread.join()
+            pool.shutdown()
+            monitor.stop()
+
+        report = monitor.report()
+        logging.info(f"Pipeline termine: {monitor.describe()}")
+        self.scraped_data['metadata']['pipeline'] = report
+        method = f'pipeline_discovery_{source}' if urls is not None else 'pipeline_next_button'
+        self.scraped_data['metadata']['scraping_method'] = 'archive_' + method if self.replaying else method
+        if urls is not None:
+            self.scraped_data['metadata']['discovery'] = self._verify_discovery(urls, results, source)
+        self.scraped_data['metadata']['total_pages'] = self._aggregate_count('pages')
+        logging.info(f"Scrapping termine: {self.scraped_data['metadata']['total_pages']} pages")
+
+    def _capture_snapshot(self, url):
+        """Etage de capture : HTML brut et validateurs, sans extraction"""
+        phase = self.instrumentation.phase
+        validator = {}
+        if url not in self._force_browser and (SCRAPER_CONFIG['incremental'] or SCRAPER_CONFIG['fetch_mode'] == 'auto'):
+            with phase('http_get', url):
+                response = self._http_get(url)
+            if response is not None:
+                with self._stats_lock:
+                    self.transfer_stats['http_bytes'] += len(response.content)
+                if response.status_code == 304 and self._is_reusable(url):
+                    return {'url': url, 'reused': True, 'validator': dict(self.previous_validators[url])}
+                validator = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+                if (SCRAPER_CONFIG['fetch_mode'] == 'auto' and response.status_code == 200
+                        and 'html' in response.headers.get('Content-Type', '')):
+                    return {'url': url, 'final_url': response.url, 'html': response.text,
+                            'source': 'http', 'validator': validator}
+
+        driver = self._get_driver()
+        self._browser_get(driver, url)
+        with phase('settle', url):
+            settle = self.settle_page(driver)
+        snapshot = {'url': url, 'final_url': driver.current_url, 'html': driver.page_source,
+                    'source': 'browser', 'validator': validator, 'settle_ms': settle['waited_ms']}
+        self._after_browser_page(driver)
+        return snapshot
+
+    def _archived_snapshot(self, url):
+        """Etage de capture du rejeu : dernier HTML archive pour l'URL"""
+        location = self._archived.get(url)
+        if location is None:
+            logging.warning(f"Page absente de l'archive, sautee: {url}")
+            self._record_failure(url, 0, "absente de l'archive")
+            return None
+        with self.instrumentation.phase('archive_read', url):
+            record = self.archive.read(*location) or self.archive.get(url)
+        if record is None:
+            logging.warning(f"Enregistrement d'archive illisible, page sautee: {url}")
+            self._record_failure(url, 0, "illisible dans l'archive")
+            return None
+        headers, html = record
+        validator = {'etag': headers['X-ETag'] or None, 'last_modified': headers['X-Last-Modified'] or None}
+        return {'url': url, 'final_url': headers['X-Final-URL'], 'html': html,
+                'source': headers['X-Fetch-Source'], 'validator': validator, 'archived': True}
+
+    def _pipeline_result(self, url, snapshot, future, monitor):
+        """Resultat au format de fetch_page ; None si la page doit passer par le navigateur"""
+        result = {'page_data': None, 'next_url': None, 'nav_links': [], 'validator': {}, 'reused': False}
+        if snapshot is None:
+            return {'failed': True, 'next_url': self._recover_next_link(url), 'nav_links': []}
+        if snapshot.get('reused'):
+            return self._reuse_page(url, snapshot['validator'], result)
+        try:
+            extraction = future.result()
+        except Exception as e:
+            logging.error(f"Erreur lors de l'extraction de {url}: {e}")
+            self._record_failure(url, 1, e)
+            return {'failed': True, 'next_url': self._recover_next_link(url), 'nav_links': []}
+        monitor.record('extraction', extraction['seconds'])
+        self.instrumentation.record('extract', extraction['seconds'], url)
+        if extraction.get('needs_browser') and snapshot.get('archived'):
+            logging.warning(f"Contenu principal absent du HTML archive, page sautee: {url}")
+            self._record_failure(url, 1, 'contenu principal absent du HTML archive')
+            return {'failed': True, 'next_url': None, 'nav_links': []}
+        if extraction.get('needs_browser'):
+            logging.info(f"Contenu principal absent du HTML statique, repli navigateur: {url}")
+            self._force_browser.add(url)
+            return None
+
+        validator = dict(snapshot['validator'], content_hash=extraction['content_hash'], hash_source=snapshot['source'])
+        if self._is_unchanged(url, validator):
+            return self._reuse_page(url, validator, result)
+        self._archive_page(url, snapshot['html'], snapshot['final_url'], snapshot['source'], snapshot['validator'])
+        page_data = extraction['page_data']
+        if 'settle_ms' in snapshot:
+            page_data['settle_ms'] = snapshot['settle_ms']
+        validator['next_url'] = extraction['next_url']
+        self._count_fetch('archive' if snapshot.get('archived') else snapshot['source'])
+        result.update(page_data=page_data, next_url=extraction['next_url'],
+                      nav_links=extraction['nav_links'], validator=validator)
+        if 'visible_text' in extraction:
+            result['visible_text'] = extraction['visible_text']
+        return result
+
+    def _needs_deep_extraction(self, result):
+        """Vrai si la page, extraite sans extraction fine, ne double aucune page deja fusionnee
+
+        Meme regle que _assemble_page : un doublon reconnu garde ses
+        collections brutes, sans mots-cles ni chemins de parametres.
+        """
+        if 'visible_text' not in result:
+            return False
+        canonical = self.duplicates.match_page(result['page_data'])
+        if canonical is None:
+            return True
+        logging.info(f"Quasi-doublon de {canonical}, extraction fine sautee")
+        del result['visible_text']
+        return False
+
+    def _deepened_result(self, url, result, future, monitor):
+        """Resultat complete par la deuxieme passe d'extraction"""
+        try:
+            extraction = future.result()
+        except Exception as e:
+            logging.error(f"Erreur lors de l'extraction de {url}: {e}")
+            self._record_failure(url, 1, e)
+            return {'failed': True, 'next_url': self._recover_next_link(url), 'nav_links': []}
+        monitor.record('extraction', extraction['seconds'])
+        self.instrumentation.record('extract', extraction['seconds'], url)
+        result['page_data'] = extraction['page_data']
+        return result
+
+    def _finish_pipeline_page(self, url, result, frontier, results, follow_next):
+        """Etage de fusion : normaliser le lien Next, valider la page"""
+        next_url = self._normalize_link(result['next_url'])
+        if next_url and not self._is_docs_url(next_url):
+            logging.warning(f"Lien Next hors documentation: {next_url}")
+            next_url = None
+        result['next_url'] = next_url
+
+        results[url] = result
+        if follow_next and next_url:
+            self._push_frontier(frontier, next_url, priority=0)
+        if self.page_sink is None or result.get('failed'):
+            with self.instrumentation.phase('checkpoint', url):
+                self._checkpoint_page(url, result, next_url)
+
+    def _merge_ready(self, order, results):
+        """Fusionner les pages pretes en tete de l'ordre de navigation
+
+        Les pages arrivent dans le desordre : chacune est fusionnee des que
+        toutes celles qui la precedent (liste decouverte ou chaine Next) l'ont
+        ete. En mode flux, une page n'est ecrite (puis validee dans le point
+        de reprise) qu'a ce moment : jusque-la elle reste en memoire.
+        """
+        while len(order['merged']) < SCRAPER_CONFIG['max_pages']:
+            if order['urls'] is not None:
+                if order['index'] >= len(order['urls']) or order['urls'][order['index']] not in results:
+                    return
+                url = order['urls'][order['index']]
+                order['index'] += 1
+            else:
+                url = order['current']
+                if url not in results or url in order['merged']:
+                    return
+                order['current'] = results[url]['next_url']
+            order['merged'].add(url)
+            order['frontier'].mark_merged()
+            result = results[url]
+            if not result.get('failed'):
+                self.visited_urls.add(url)
+                written = self.page_sink is not None and not result.get('streamed')
+                with self.instrumentation.phase('merge', url):
+                    self._merge_page(url, result)
+                if written:
+                    with self.instrumentation.phase('checkpoint', url):
+                        self._checkpoint_page(url, result, result['next_url'])
+                # La page est dans les agregats (et le point de reprise) : ne garder que la suite
+                results[url] = {'next_url': result['next_url']}
+
+    def scrape_parallel(self, workers):
+        """Scrapper avec plusieurs navigateurs qui se partagent une frontiere d'URLs
+
+        Les liens Next sont prioritaires ; les liens de la navigation laterale
+        sont precharges pour occuper les autres workers. Seules les pages de la
+        chaine Next sont conservees, dans l'ordre du document, pour produire le
+        meme resultat que le mode sequentiel.
+        """
+        frontier = CrawlFrontier(SCRAPER_CONFIG['max_pages'])
+        results = {}
+        lock = threading.Lock()
+        if self.resuming:
+            self._restore_parallel(frontier, results)
+        else:
+            self._push_frontier(frontier, SCRAPER_CONFIG['start_url'], priority=0)
+
+        logging.info(f"Debut du scrapping parallele ({workers} workers) depuis: {SCRAPER_CONFIG['start_url']}")
+
+        # Chemin de navigation : la chaine Next, fusionnee au fil de l'eau
+        order = {'urls': None, 'index': 0, 'current': SCRAPER_CONFIG['start_url'], 'merged': set(),
+                 'frontier': frontier}
+        threads = [
+            threading.Thread(target=self._parallel_worker, args=(frontier, results, lock, order),
+                             name=f"scraper-{i + 1}")
+            for i in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._merge_ready(order, results)
+
+        ignored = len(results) - len(order['merged'])
+        if ignored:
+            logging.info(f"{ignored} pages prechargees hors de la chaine Next ignorees")
+
+        self.scraped_data['metadata']['total_pages'] = self._aggregate_count('pages')
+        logging.info(f"Scrapping termine: {self.scraped_data['metadata']['total_pages']} pages")
+
+    def _parallel_worker(self, frontier, results, lock, order, progress=None):
+        """Boucle d'un worker : prendre une URL, l'extraire, alimenter la frontiere
+
+        Avec progress (liste decouverte a l'avance), les liens des pages ne
+        sont pas suivis et l'avancement est journalise apres chaque page.
+        """
+        try:
+            while True:
+                url = frontier.pop()
+                if url is None:
+                    break
+                try:
+                    with self.instrumentation.page(url):
+                        self._parallel_page(url, frontier, results, lock, order, follow_links=progress is None)
+                except Exception as e:
+                    logging.error(f"Erreur lors du scrapping de {url}: {e}")
+                finally:
+                    frontier.task_done()
+                    if progress is not None:
+                        self._report_progress(progress)
+        finally:
+            self._release_driver()
+
+    def _parallel_page(self, url, frontier, results, lock, order, follow_links=True):
+        """Extraire une URL de la frontiere, y pousser ses liens et fusionner les pages pretes"""
+        logging.info(f"[{threading.current_thread().name}] Page: {url}")
+        result = self._fetch_with_retry(url, with_nav_links=follow_links)
+        if result is None:
+            result = {'failed': True, 'next_url': self._recover_next_link(url), 'nav_links': []}
+        next_url = self._normalize_link(result['next_url'])
+        if next_url and not self._is_docs_url(next_url):
+            logging.warning(f"Lien Next hors documentation: {next_url}")
+            next_url = None
+        result['next_url'] = next_url
+
+        # Liens dans la frontiere avant toute validation de la page dans le point de reprise
+        if follow_links:
+            if next_url:
+                self._push_frontier(frontier, next_url, priority=0)
+            for link in result['nav_links']:
+                link = self._normalize_link(link).split('#')[0]
+                if self._is_docs_url(link):
+                    self._push_frontier(frontier, link, priority=1)
+
+        with lock:
+            results[url] = result
+            # En mode flux, la page n'est ecrite et validee qu'a sa fusion
+            self._merge_ready(order, results)
+        if self.page_sink is None or result.get('failed'):
+            with self.instrumentation.phase('checkpoint'):
+                self._checkpoint_page(url, result, next_url)
+
+    def _report_progress(self, progress):
+        """Journaliser l'avancement et l'heure de fin estimee d'un crawl a liste connue"""
+        with self._stats_lock:
+            progress['done'] += 1
+            done, total = progress['done'], progress['total']
+            fetched = done - progress['initial']
+            elapsed = time.perf_counter() - progress['started']
+        rate = fetched / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if rate else 0.0
+        logging.info(f"Progression: {done}/{total} pages ({done / total:.0%}), {rate:.1f} pages/s, "
+                     f"fin estimee dans {eta:.0f}s")
+
+    def _fetch_with_retry(self, url, with_nav_links=False, fetch=None):
+        """Recuperer une page avec nouvelles tentatives (backoff exponentiel)
+
+        fetch remplace fetch_page (ex. capture d'un instantane du pipeline).
+        Retourne None quand la page echoue encore apres toutes les tentatives :
+        elle est alors enregistree comme echec et sautee.
+        """
+        fetch = fetch or (lambda: self.fetch_page(url, with_nav_links))
+        attempts = SCRAPER_CONFIG['retries'] + 1
+        for attempt in range(1, attempts + 1):
+            try:
+                result = fetch()
+                error = (result.get('page_data') or {}).get('error')
+                if error:
+                    raise RuntimeError(error)
+                return result
+            except Exception as e:
+                # Un driver en erreur est recree a la tentative suivante
+                try:
+                    self._release_driver()
+                except Exception:
+                    pass
+                if attempt == attempts:
+                    logging.error(f"Page abandonnee apres {attempts} tentatives: {url}: {e}")
+                    self._record_failure(url, attempts, e)
+                    return None
+                delay = jittered_backoff(SCRAPER_CONFIG['retry_backoff'], attempt)
+                logging.warning(f"Erreur sur {url} (tentative {attempt}/{attempts}), nouvel essai dans {delay:.1f}s: {e}")
+                with self.instrumentation.phase('retry_wait'):
+                    time.sleep(delay)
+
+    def _recover_next_link(self, url):
+        """Chercher le lien Next d'une page en echec dans son HTML statique"""
+        if self.replaying:
+            return None
+        try:
+            response = self._get(url)
+            raw = extract_raw_static(parse_html(response.text), response.url)
+            next_url = next_link_from_links(raw['links'])
+        except Exception as e:
+            logging.warning(f"Impossible de retrouver le lien Next de {url}: {e}")
+            return None
+        if next_url:
+            logging.info(f"Lien Next retrouve apres echec de {url}: {next_url}")
+        return next_url
+
+    def _record_failure(self, url, attempts, error):
+        with self._stats_lock:
+            self.failed_pages.append({'url': url, 'attempts': attempts, 'error': str(error)})
+        if self.checkpoint is not None:
+            self.checkpoint.record_failure(url, attempts, str(error))
+
+    def open_checkpoint(self, resume=False):
+        """Ouvrir le point de reprise ; sans --resume il est remis a zero"""
+        self.checkpoint = CrawlCheckpoint(SCRAPER_CONFIG['checkpoint_file'])
+        if resume and self.checkpoint.has_progress():
+            self.resuming = True
+            logging.info(f"Reprise depuis le point de reprise: {SCRAPER_CONFIG['checkpoint_file']}")
+        else:
+            self.checkpoint.reset()
+
+    def open_archive(self, replay=False):
+        """Ouvrir l'archive des pages brutes ; en rejeu elle remplace reseau et navigateur"""
+        path = SCRAPER_CONFIG['archive_file']
+        if replay and not (path and os.path.exists(path)):
+            raise FileNotFoundError(f"Archive introuvable: {path}")
+        self.archive = PageArchive(path)
+        if not replay:
+            logging.info(f"Pages brutes archivees dans: {path}")
+            return
+        self.replaying = True
+        self._archived = self.archive.latest()
+        if SCRAPER_CONFIG['incremental']:
+            logging.info("Mode incremental ignore: le rejeu re-extrait toutes les pages")
+            SCRAPER_CONFIG['incremental'] = False
+        logging.info(f"Rejeu hors ligne de {len(self._archived)} pages archivees: {path}")
+
+    def _checkpoint_page(self, url, result, next_url):
+        """Enregistrer durablement une page terminee (ou en echec) et la suite du crawl"""
+        if self.checkpoint is None:
+            return
+        if result is None or result.get('failed'):
+            self.checkpoint.complete_failure(url, next_url)
+            return
+        stored = {'next_url': next_url, 'validator': result['validator'], 'reused': result['reused']}
+        if self.page_sink is not None:
+            # La page elle-meme est deja dans le .jsonl
+            stored.update(summary=result.get('summary') or page_summary(result['page_data']),
+                          page_data=None, streamed=True)
+        else:
+            stored['page_data'] = result['page_data']
+        self.checkpoint.commit_page(url, stored, next_url)
+
+    def _push_frontier(self, frontier, url, priority):
+        if frontier.push(url, priority) and self.checkpoint is not None:
+            self.checkpoint.add_frontier(url, priority)
+
+    def _restore_sequential(self):
+        """Recharger les pages deja terminees et repartir de la derniere page validee"""
+        for url, stored in self.checkpoint.completed_pages():
+            self.visited_urls.add(url)
+            self._merge_page(url, stored)
+        for failure in self.checkpoint.failures():
+            self.visited_urls.add(failure['url'])
+            self.failed_pages.append({key: failure[key] for key in ('url', 'attempts', 'error')})
+        current_url = self.checkpoint.get_state('next_url', SCRAPER_CONFIG['start_url'])
+        logging.info(f"{len(self.visited_urls)} pages deja traitees, reprise a: {current_url or '(termine)'}")
+        return current_url, len(self.visited_urls)
+
+    def _restore_parallel(self, frontier, results):
+        """Recharger les resultats termines et la frontiere en attente"""
+        done = []
+        for url, stored in self.checkpoint.completed_pages():
+            results[url] = stored
+            done.append(url)
+        for failure in self.checkpoint.failures():
+            results[failure['url']] = {'failed': True, 'next_url': failure['next_url']}
+            self.failed_pages.append({key: failure[key] for key in ('url', 'attempts', 'error')})
+            done.append(failure['url'])
+        frontier.restore(done)
+        pending = self.checkpoint.pending_urls()
+        for url, priority in pending:
+            frontier.push(url, priority)
+        if not done and not pending:
+            self._push_frontier(frontier, SCRAPER_CONFIG['start_url'], priority=0)
+        logging.info(f"{len(done)} pages deja traitees, {len(pending)} URLs en attente")
+
+    def generate_knowledge_base(self):
+        """Générer la base de connaissances finale"""
+        logging.info("Generation de la base de connaissances...")
+        
+        if SCRAPER_CONFIG['incremental']:
+            self._apply_incremental_removals()
+
+        duplicates = Counter()
+        if not (SCRAPER_CONFIG['incremental'] and self._apply_page_deltas(duplicates)):
+            self._rebuild_aggregates(duplicates)
+
+        # Créer des catégories de paramètres
+        all_params = self.scraped_data['parameters']['all']
+        
+        self.scraped_data['parameters']['categories'] = {
+            'assistant': [p for p in all_params if any(keyword in p.lower() for keyword in ['assistant', 'firstmessage', 'endcall', 'prompt'])],
+            'voice': [p for p in all_params if any(keyword in p.lower() for keyword in ['voice', 'speech', 'audio', 'tts', 'sound'])],
+            'model': [p for p in all_params if any(keyword in p.lower() for keyword in ['model', 'llm', 'temperature', 'token', 'provider'])],
+            'transcription': [p for p in all_params if any(keyword in p.lower() for keyword in ['transcrib', 'stt', 'speech', 'recognition'])],
+            'tools': [p for p in all_params if any(keyword in p.lower() for keyword in ['tool', 'function', 'webhook', 'api'])],
+            'calls': [p for p in all_params if any(keyword in p.lower() for keyword in ['call', 'phone', 'number', 'dial'])],
+            'monitoring': [p for p in all_params if any(keyword in p.lower() for keyword in ['monitor', 'analys', 'observ', 'log'])]
+        }
+
+        # Statistiques finales
+        stats = {
+            'total_pages': self._aggregate_count('pages'),
+            'total_parameters': len(self.scraped_data['parameters']['all']),
+            'parameter_paths': len(self.scraped_data['parameters']['tree']),
+            'total_examples': self._aggregate_count('examples'),
+            'total_schemas': self._aggregate_count('schemas'),
+            'navigation_depth': len(self.scraped_data['navigation_path']),
+            'duplicate_pages': duplicates['duplicate_pages'],
+            'duplicate_page_ratio': round(duplicates['duplicate_pages'] / max(1, duplicates['pages']), 3),
+            'duplicate_examples': duplicates['duplicate_examples'],
+            'duplicate_schemas': duplicates['duplicate_schemas'],
+            'duplicate_block_ratio': round(
+                (duplicates['duplicate_examples'] + duplicates['duplicate_schemas'])
+                / max(1, duplicates['examples'] + duplicates['schemas']), 3)
+        }
+        
+        self.scraped_data['metadata']['statistics'] = stats
+        self.scraped_data['metadata']['fetch_paths'] = {
+            'http': self.fetch_stats['http'],
+            'browser': self.fetch_stats['browser']
+        }
+        if self.scheduler.enabled:
+            self.scraped_data['metadata']['politeness'] = self.scheduler.report()
+        if self.archive is not None:
+            self.scraped_data['metadata']['fetch_paths']['archive'] = self.fetch_stats['archive']
+            self.scraped_data['metadata']['archive'] = dict(
+                self.archive.stats(), file=SCRAPER_CONFIG['archive_file'], replay=self.replaying)
+        self.scraped_data['metadata']['failed_pages'] = self.failed_pages
+        self.scraped_data['metadata']['transfer'] = {
+            'http_bytes': self.transfer_stats['http_bytes'],
+            'browser_bytes': self.transfer_stats['browser_bytes'],
+            'browser_peak_rss_mb': round(self.transfer_stats['browser_peak_rss'] / 1024 / 1024, 1),
+            'driver_recycles': self.transfer_stats['driver_recycles'],
+            'lean_browser': SCRAPER_CONFIG['lean_browser']
+        }
+        if self.settle_times:
+            self.scraped_data['metadata']['settle'] = {
+                'pages': len(self.settle_times),
+                'mean_ms': round(sum(self.settle_times) / len(self.settle_times)),
+                'p95_ms': round(percentile(self.settle_times, 0.95)),
+                'max_ms': max(self.settle_times),
+                'timeouts': self.settle_timeouts
+            }
+        if self.instrumentation.enabled:
+            page_timings = self.instrumentation.page_timings
+            self.scraped_data['metadata']['timings'] = {
+                'pages': {url: page_timings[url] for url in self.scraped_data['navigation_path'] if url in page_timings},
+                'phases': {phase: {key: value for key, value in stats.items() if key != 'histogram'}
+                           for phase, stats in self.instrumentation.summary().items()}
+            }
+        
+        logging.info("Base de connaissances generee:")
+        logging.info(f"   {stats['total_pages']} pages")
+        logging.info(f"   {stats['total_parameters']} parametres uniques")
+        logging.info(f"   {stats['parameter_paths']} chemins de parametres")
+        logging.info(f"   {stats['total_examples']} exemples de code")
+        logging.info(f"   {stats['total_schemas']} schemas JSON")
+        if self.duplicates is not None:
+            logging.info(f"   {stats['duplicate_pages']} pages quasi identiques ({stats['duplicate_page_ratio']:.0%}), "
+                         f"{stats['duplicate_examples'] + stats['duplicate_schemas']} blocs en double "
+                         f"({stats['duplicate_block_ratio']:.0%})")
+        logging.info(f"   {self.fetch_stats['http']} pages via HTTP, {self.fetch_stats['browser']} via le navigateur")
+        for host, politeness in self.scraped_data['metadata'].get('politeness', {}).items():
+            logging.info(f"   {host}: {politeness['requests']} requetes, {politeness['throttled']} limitees, "
+                         f"debit final {politeness['rate']} req/s")
+        if self.replaying:
+            logging.info(f"   {self.fetch_stats['archive']} pages re-extraites depuis l'archive")
+        if self.failed_pages:
+            logging.warning(f"   {len(self.failed_pages)} pages sautees apres echec")
+        if SCRAPER_CONFIG['incremental']:
+            incremental = self.scraped_data['metadata']['incremental']
+            logging.info(f"   Incremental: {incremental['hits']} pages reprises, {incremental['misses']} re-extraites, "
+                         f"{incremental['removed_pages']} supprimees")
+    
+    def _rebuild_aggregates(self, duplicates):
+        """Reconstruire parametres, exemples, schemas et compteurs de doublons depuis toutes les pages
+
+        Une seule passe dans l'ordre de navigation : arbre des chemins de
+        parametres (voice.provider, tools[].name...), parametres dans l'ordre
+        de premiere apparition et blocs canoniques.
+        """
+        parameters = {}
+        in_memory = self.page_sink is None
+        if in_memory:
+            self.scraped_data['examples'], self.scraped_data['schemas'] = [], []
+
+        def pages():
+            for url, page_data, _ in self.iter_pages():
+                duplicates.update(duplicate_counts(page_data))
+                parameters.update(dict.fromkeys(page_data.get('parameters', [])))
+                if in_memory:
+                    # Les quasi-doublons restent des references dans la page
+                    self.scraped_data['examples'].extend(canonical_entries(page_data, 'examples'))
+                    self.scraped_data['schemas'].extend(canonical_entries(page_data, 'schemas'))
+                yield url, page_data
+
+        self.scraped_data['parameters']['tree'] = build_parameter_tree(pages())
+        self.scraped_data['parameters']['all'] = list(parameters)
+
+    def _apply_page_deltas(self, duplicates):
+        """Appliquer aux agregats de la base precedente les seules pages modifiees
+
+        Les pages inchangees (unchanged_pages) ne sont ni relues ni
+        retraitees : leurs chemins de parametres restent dans l'arbre et leurs
+        blocs dans les compteurs de doublons. Seules les pages modifiees,
+        ajoutees ou retirees y sont retirees puis rajoutees. Le resultat est
+        celui de _rebuild_aggregates ; retourne False (reconstruction
+        complete) quand la base precedente n'a pas ses agregats ou que les
+        pages inchangees ont change d'ordre.
+        """
+        previous = self.previous_aggregates
+        statistics = (previous or {}).get('statistics') or {}
+        if previous is None or previous['tree'] is None or 'duplicate_examples' not in statistics:
+            return False
+        urls = self.scraped_data['navigation_path']
+        order = {url: index for index, url in enumerate(urls)}
+        unchanged = [url for url in urls if url in self.unchanged_pages]
+        if [url for url in previous['navigation_path'] if url in self.unchanged_pages] != unchanged:
+            logging.info("Pages inchangees dans un autre ordre: agregats reconstruits")
+            return False
+        changed = (set(urls) | set(previous['navigation_path'])) - set(unchanged)
+
+        if self.page_sink is None:
+            pages = self.scraped_data['pages']
+        else:
+            # Pages inchangees : identiques a la base precedente, deja en memoire
+            pages_file = SCRAPER_CONFIG['pages_file']
+            modified = [url for url in urls if url in changed]
+            records = iter_page_records(pages_file, modified, index_page_records(pages_file))
+            pages = ChainMap({record['url']: record['page'] for record in records}, self.previous_versions)
+
+        # Compteurs de doublons : ceux de la base precedente, moins les anciennes versions, plus les nouvelles
+        duplicates.update({
+            'pages': statistics['total_pages'],
+            'duplicate_pages': statistics['duplicate_pages'],
+            'examples': statistics['total_examples'] + statistics['duplicate_examples'],
+            'duplicate_examples': statistics['duplicate_examples'],
+            'schemas': statistics['total_schemas'] + statistics['duplicate_schemas'],
+            'duplicate_schemas': statistics['duplicate_schemas']
+        })
+        for url in changed:
+            if url in self.previous_versions:
+                duplicates.subtract(duplicate_counts(self.previous_versions[url]))
+            if url in order:
+                duplicates.update(duplicate_counts(pages[url]))
+
+        self.scraped_data['parameters']['tree'] = update_parameter_tree(previous['tree'], changed, pages, order)
+        # Ordre de premiere apparition et blocs canoniques : simple concatenation des listes des pages
+        parameters = {}
+        for url in urls:
+            parameters.update(dict.fromkeys(pages[url].get('parameters', [])))
+        self.scraped_data['parameters']['all'] = list(parameters)
+        if self.page_sink is None:
+            self.scraped_data['examples'] = [entry for url in urls for entry in canonical_entries(pages[url], 'examples')]
+            self.scraped_data['schemas'] = [entry for url in urls for entry in canonical_entries(pages[url], 'schemas')]
+        logging.info(f"Agregats mis a jour avec {len(changed)} pages modifiees, ajoutees ou retirees "
+                     f"sur {len(urls)}")
+        return True
+
+    def _aggregate_count(self, key):
+        """Nombre de pages, exemples ou schemas consolides (en memoire ou en flux)"""
+        if self.page_sink is not None:
+            return self.stream_counts[key]
+        return len(self.scraped_data[key])
+
+    def open_page_sink(self):
+        """Ouvrir le fichier .jsonl qui recoit les pages au fil du crawl"""
+        self.page_sink = JsonlPageSink(SCRAPER_CONFIG['pages_file'], append=self.resuming)
+        logging.info(f"Pages ecrites en flux dans: {SCRAPER_CONFIG['pages_file']}")
+
+    def finalize_stream(self, output_file):
+        """Reconstruire la base agregee en relisant le .jsonl page par page
+
+        Chaque section (pages, exemples, schemas, validateurs) est ecrite en
+        relisant les enregistrements dans l'ordre de navigation : une seule
+        page est en memoire a la fois.
+        """
+        self.page_sink.close()
+        pages_file = SCRAPER_CONFIG['pages_file']
+        offsets = index_page_records(pages_file)
+        urls = self.scraped_data['navigation_path']
+
+        def dump(value):
+            return json.dumps(value, ensure_ascii=False)
+
+        def write_section(f, name, items, first=False):
+            f.write(('' if first else ',\n') + f'  {dump(name)}: ')
+            opening, closing = ('{', '}') if name in ('pages', 'validators') else ('[', ']')
+            f.write(opening)
+            separator = '\n    '
+            for item in items:
+                f.write(separator + item)
+                separator = ',\n    '
+            f.write('\n  ' + closing if separator != '\n    ' else closing)
+
+        def records():
+            return iter_page_records(pages_file, urls, offsets)
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write('{\n')
+            f.write(f"  {dump('metadata')}: {dump(self.scraped_data['metadata'])}")
+            write_section(f, 'pages', (f"{dump(r['url'])}: {dump(r['page'])}" for r in records()))
+            f.write(f",\n  {dump('navigation_path')}: {dump(urls)}")
+            f.write(f",\n  {dump('parameters')}: {dump(self.scraped_data['parameters'])}")
+            write_section(f, 'examples', (dump(e) for r in records() for e in canonical_entries(r['page'], 'examples')))
+            write_section(f, 'schemas', (dump(e) for r in records() for e in canonical_entries(r['page'], 'schemas')))
+            write_section(f, 'validators', (f"{dump(r['url'])}: {dump(r['validator'])}" for r in records()))
+            f.write('\n}\n')
+
+    def iter_pages(self):
+        """Triplets (url, page_data, validator) dans l'ordre de navigation, en memoire ou depuis le .jsonl"""
+        urls = self.scraped_data['navigation_path']
+        if self.page_sink is not None:
+            pages_file = SCRAPER_CONFIG['pages_file']
+            for record in iter_page_records(pages_file, urls, index_page_records(pages_file)):
+                yield record['url'], record['page'], record['validator']
+        else:
+            for url in urls:
+                if url in self.scraped_data['pages']:
+                    yield url, self.scraped_data['pages'][url], self.scraped_data['validators'].get(url)
+
+    def build_search_index(self):
+        """Reconstruire l'index de recherche plein texte de la base"""
+        index = KnowledgeBaseIndex(SCRAPER_CONFIG['search_index_file'])
+        try:
+            count = index.rebuild(((url, page_data) for url, page_data, _ in self.iter_pages()),
+                                  source=knowledge_base_version(SCRAPER_CONFIG['output_file']))
+        finally:
+            index.close()
+        logging.info(f"Index de recherche ({count} pages): {SCRAPER_CONFIG['search_index_file']}")
+
+    def save_store(self):
+        """Ecrire la base dans le stockage SQLite adressable par contenu
+
+        La base est ecrite dans un fichier temporaire puis substituee d'un
+        coup : les lecteurs ne voient jamais un stockage a moitie ecrit.
+        """
+        store_file = SCRAPER_CONFIG['store_file']
+        temp_file = store_file + '.tmp'
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        store = KnowledgeBaseStore(temp_file)
+        try:
+            stats = store.write(self.scraped_data['metadata'], self.scraped_data['navigation_path'],
+                                self.scraped_data['parameters'], self.iter_pages())
+        finally:
+            store.close()
+        os.replace(temp_file, store_file)
+        logging.info(f"Stockage compact ({stats['pages']} pages, {stats['blobs']}/{stats['entries']} "
+                     f"contenus uniques): {store_file}")
+
+    def save_data(self):
+        """Sauvegarder les données"""
+        try:
+            with self.instrumentation.phase('save_json'):
+                if self.page_sink is not None:
+                    self.finalize_stream(SCRAPER_CONFIG['output_file'])
+                else:
+                    with open(SCRAPER_CONFIG['output_file'], 'w', encoding='utf-8') as f:
+                        json.dump(self.scraped_data, f, indent=2, ensure_ascii=False)
+            
+            logging.info(f"Donnees sauvegardees dans: {SCRAPER_CONFIG['output_file']}")
+            
+            # Sauvegarder aussi un résumé
+            summary_file = SCRAPER_CONFIG['output_file'].replace('.json', '-summary.json')
+            summary = {
+                'metadata': self.scraped_data['metadata'],
+                'navigation_path': self.scraped_data['navigation_path'],
+                'parameters_summary': self.scraped_data['parameters']['categories']
+            }
+            
+            with open(summary_file, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2, ensure_ascii=False)
+            
+            logging.info(f"Resume sauvegarde dans: {summary_file}")
+
+            if SCRAPER_CONFIG['store']:
+                with self.instrumentation.phase('save_store'):
+                    self.save_store()
+            if SCRAPER_CONFIG['search_index']:
+                with self.instrumentation.phase('search_index'):
+                    self.build_search_index()
+            if SCRAPER_CONFIG['supabase_export']:
+                with self.instrumentation.phase('supabase_export'):
+                    export_supabase(((url, page_data) for url, page_data, _ in self.iter_pages()),
+                                    self.scraped_data['metadata'])
+            
+        except Exception as e:
+            logging.error(f"Erreur lors de la sauvegarde: {e}")
+    
+    def save_metrics(self):
+        """Ecrire les metriques agregees (JSON) et leur instantane Prometheus"""
+        metrics_file = SCRAPER_CONFIG['metrics_file']
+        metrics = {
+            'scraped_at': self.scraped_data['metadata']['scraped_at'],
+            'pages': len(self.scraped_data['navigation_path']),
+            'fetch_paths': dict(self.fetch_stats),
+            'buckets_ms': list(PHASE_BUCKETS_MS),
+            'phases': self.instrumentation.summary(),
+            'page_timings': self.instrumentation.page_timings
+        }
+        with open(metrics_file, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2, ensure_ascii=False)
+        prometheus_file = os.path.splitext(metrics_file)[0] + '.prom'
+        with open(prometheus_file, 'w', encoding='utf-8') as f:
+            f.write(self.instrumentation.to_prometheus({
+                'pages_total': ("Pages recuperees par chemin d'acces", dict(self.fetch_stats))
+            }))
+        logging.info(f"Metriques ecrites dans: {metrics_file} et {prometheus_file}")
+
+    def cleanup(self):
+        """Nettoyer les ressources"""
+        for driver in list(self._drivers):
+            driver.quit()
+            logging.info("Driver ferme")
+        self._drivers.clear()
+        self.driver = None
+        self.session.close()
+        if self.page_sink is not None:
+            self.page_sink.close()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+            self.checkpoint = None
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+    
+    def run(self):
+        """Exécuter le scrapping complet"""
+        try:
+            if SCRAPER_CONFIG['from_archive']:
+                # Le rejeu ne touche pas au point de reprise d'un crawl interrompu
+                self.open_archive(replay=True)
+            else:
+                if SCRAPER_CONFIG['checkpoint'] or SCRAPER_CONFIG['resume']:
+                    self.open_checkpoint(resume=SCRAPER_CONFIG['resume'])
+                if SCRAPER_CONFIG['archive']:
+                    self.open_archive()
+            if SCRAPER_CONFIG['stream_output']:
+                self.open_page_sink()
+            if SCRAPER_CONFIG['incremental']:
+                self.load_previous_knowledge_base()
+            discovered, source = [], None
+            if SCRAPER_CONFIG['discovery'] != 'next':
+                discovered, source = self.discover_pages()
+            if SCRAPER_CONFIG['pipeline'] or self.replaying:
+                self.scrape_pipeline(discovered or None, source)
+            elif discovered:
+                self.scrape_discovered(discovered, source, SCRAPER_CONFIG['workers'])
+            elif SCRAPER_CONFIG['workers'] > 1:
+                self.scrape_parallel(SCRAPER_CONFIG['workers'])
+            else:
+                if SCRAPER_CONFIG['fetch_mode'] == 'browser':
+                    self.setup_driver()
+                self.scrape_sequentially()
+            with self.instrumentation.phase('generate'):
+                self.generate_knowledge_base()
+            self.save_data()
+            if self.instrumentation.enabled:
+                self.save_metrics()
+            
+            logging.info("Scrapping termine avec succes !")
+            
+        except Exception as e:
+            logging.error(f"Erreur lors du scrapping: {e}")
+        finally:
+            self.cleanup()
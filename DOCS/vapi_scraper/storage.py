@@ -0,0 +1,739 @@
+"""Ecriture en flux, point de reprise, archive des pages, index et stockage de la base"""
+
+import functools
+import gzip
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+import zlib
+import logging
+from collections import Counter
+from datetime import datetime
+
+from .config import SCRAPER_CONFIG
+from .parameters import parent_parameter_path
+from .duplicates import canonical_entries
+
+
+def page_summary(page_data):
+    """Resume leger d'une page (ce qui reste en memoire en mode flux)"""
+    return {
+        'parameters': list(page_data.get('parameters', [])),
+        'examples': len(canonical_entries(page_data, 'examples')),
+        'schemas': len(canonical_entries(page_data, 'schemas')),
+        'fingerprint': page_data.get('fingerprint'),
+        'duplicate_of': page_data.get('duplicate_of')
+    }
+
+
+class JsonlPageSink:
+    """Ecriture en flux d'un enregistrement JSON compact par page"""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, url, page_data, validator):
+        line = json.dumps({'url': url, 'page': page_data, 'validator': validator},
+                          ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+_RECORD_PREFIX = b'{"url":'
+
+
+def index_page_records(path):
+    """Position du dernier enregistrement de chaque URL dans un fichier .jsonl"""
+    offsets = {}
+    decoder = json.JSONDecoder()
+    with open(path, 'rb') as f:
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            if line.startswith(_RECORD_PREFIX):
+                # Ecrit par JsonlPageSink : l'URL ouvre l'enregistrement, inutile de decoder la page
+                url = decoder.raw_decode(line[len(_RECORD_PREFIX):].decode('utf-8', 'replace'))[0]
+                offsets[url] = offset
+            elif line.strip():
+                offsets[json.loads(line)['url']] = offset
+    return offsets
+
+
+def iter_page_records(path, urls, offsets):
+    """Relire un a un les enregistrements des URLs demandees, dans leur ordre"""
+    with open(path, 'rb') as f:
+        for url in urls:
+            if url in offsets:
+                f.seek(offsets[url])
+                yield json.loads(f.readline())
+
+
+class CrawlCheckpoint:
+    """Point de reprise durable (SQLite) : frontiere, pages terminees et echecs
+
+    Chaque page est validee dans sa propre transaction : apres un crash,
+    --resume repart de la derniere page validee.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending'
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT UNIQUE NOT NULL,
+                result TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS failures (
+                url TEXT PRIMARY KEY,
+                attempts INTEGER NOT NULL,
+                error TEXT,
+                next_url TEXT
+            );
+        ''')
+
+    def has_progress(self):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT (SELECT COUNT(*) FROM pages) + (SELECT COUNT(*) FROM failures)'
+            ).fetchone()
+        return row[0] > 0
+
+    def reset(self):
+        with self._lock, self._conn:
+            for table in ('state', 'frontier', 'pages', 'failures'):
+                self._conn.execute(f'DELETE FROM {table}')
+
+    def get_state(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def add_frontier(self, url, priority):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR IGNORE INTO frontier (url, priority) VALUES (?, ?)', (url, priority))
+            # Une URL promue (lien Next deja vu dans la navigation) garde sa meilleure priorite
+            self._conn.execute('UPDATE frontier SET priority = ? WHERE url = ? AND priority > ?',
+                               (priority, url, priority))
+
+    def commit_page(self, url, result, next_url):
+        """Valider une page terminee et l'URL suivante dans une seule transaction"""
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO pages (url, result) VALUES (?, ?)',
+                               (url, json.dumps(result, ensure_ascii=False)))
+            self._mark_done(url, next_url)
+
+    def record_failure(self, url, attempts, error):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO failures (url, attempts, error) VALUES (?, ?, ?)',
+                               (url, attempts, error))
+
+    def complete_failure(self, url, next_url):
+        """Valider une page sautee avec le lien Next retrouve (ou aucun)"""
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE failures SET next_url = ? WHERE url = ?', (next_url, url))
+            self._mark_done(url, next_url)
+
+    def _mark_done(self, url, next_url):
+        self._conn.execute("UPDATE frontier SET status = 'done' WHERE url = ?", (url,))
+        self._conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('next_url', ?)", (next_url or '',))
+
+    def completed_pages(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT url, result FROM pages ORDER BY seq').fetchall()
+        return [(url, json.loads(result)) for url, result in rows]
+
+    def failures(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT url, attempts, error, next_url FROM failures').fetchall()
+        return [dict(zip(('url', 'attempts', 'error', 'next_url'), row)) for row in rows]
+
+    def pending_urls(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT url, priority FROM frontier WHERE status = 'pending' ORDER BY priority, rowid"
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PageArchive:
+    """Archive compressee en ajout seul des pages brutes, au format proche de WARC
+
+    Chaque enregistrement est un membre gzip autonome (en-tetes WARC puis
+    HTML) : il se relit par un seul seek sans decompresser le reste. Un
+    index SQLite associe URL et date a la position de chaque enregistrement ;
+    un contenu identique au dernier archive pour la meme URL n'ajoute qu'une
+    ligne d'index. 'page' designe le HTML qui a servi a l'extraction,
+    'discovery' les sources de la decouverte (sitemaps, barre laterale).
+    """
+
+    def __init__(self, path, index_path=None):
+        self.path = path
+        self.index_path = index_path or re.sub(r'(\.warc)?\.gz$', '', path) + '-index.sqlite'
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS records_by_url ON records (url, kind, fetched_at);
+        ''')
+        self._file = open(path, 'a+b')
+        self._repair()
+
+    def _repair(self):
+        """Realigner archive et index apres un arret brutal
+
+        Seule la fin de l'archive est controlee ici ; les empreintes des
+        autres enregistrements sont verifiees a la lecture (voir read).
+        """
+        size = os.path.getsize(self.path)
+        end, count = self._conn.execute('SELECT MAX(offset + length), COUNT(*) FROM records').fetchone()
+        if not count and size:
+            logging.warning(f"Index d'archive absent, reconstruction depuis {self.path}")
+            self._reindex()
+        elif count:
+            if size < end:
+                with self._conn:
+                    removed = self._conn.execute('DELETE FROM records WHERE offset + length > ?', (size,)).rowcount
+                logging.warning(f"{removed} enregistrements d'archive tronques retires de l'index")
+            self._check_tail()
+        end = self._conn.execute('SELECT MAX(offset + length) FROM records').fetchone()[0] or 0
+        if size > end:
+            logging.warning(f"Fin d'archive non indexee ignoree ({size - end} octets): {self.path}")
+            self._file.truncate(end)
+
+    def _check_tail(self):
+        """Retirer les derniers enregistrements indexes tant qu'ils sont illisibles (ecriture interrompue)"""
+        while True:
+            row = self._conn.execute('SELECT offset, length FROM records ORDER BY offset DESC LIMIT 1').fetchone()
+            if row is None or self._load(*row) is not None:
+                return
+            self._discard(*row)
+
+    def _load(self, offset, length):
+        """Decompresser un enregistrement et verifier son empreinte : (en-tetes, HTML), ou None"""
+        try:
+            self._file.seek(offset)
+            headers, payload = self._parse_record(gzip.decompress(self._file.read(length)))
+            digest = 'sha256:' + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        except (OSError, EOFError, ValueError, KeyError, zlib.error):
+            return None
+        return (headers, payload) if digest == headers.get('WARC-Payload-Digest') else None
+
+    def _discard(self, offset, length):
+        """Retirer de l'index un enregistrement illisible (toutes les lignes qui le partagent)"""
+        with self._conn:
+            self._conn.execute('DELETE FROM records WHERE offset = ? AND length = ?', (offset, length))
+        logging.warning(f"Enregistrement d'archive illisible retire de l'index (octet {offset}): {self.path}")
+
+    def _reindex(self):
+        """Reconstruire l'index en parcourant les membres gzip ; retourne la fin du dernier complet"""
+        with open(self.path, 'rb') as f:
+            data = memoryview(f.read())
+        offset = 0
+        with self._conn:
+            while offset < len(data):
+                decompressor = zlib.decompressobj(31)
+                parts, position = [], offset
+                try:
+                    while not decompressor.eof and position < len(data):
+                        chunk = data[position:position + 65536]
+                        parts.append(decompressor.decompress(chunk))
+                        position += len(chunk)
+                except zlib.error:
+                    break
+                if not decompressor.eof:
+                    break
+                length = position - len(decompressor.unused_data) - offset
+                try:
+                    headers, _ = self._parse_record(b''.join(parts))
+                except (ValueError, KeyError):
+                    logging.warning(f"Enregistrement d'archive illisible ignore a l'octet {offset}")
+                    offset += length
+                    continue
+                self._conn.execute(
+                    'INSERT INTO records (url, kind, fetched_at, digest, offset, length) VALUES (?, ?, ?, ?, ?, ?)',
+                    (headers['WARC-Target-URI'], headers['X-Record-Kind'], headers['WARC-Date'],
+                     headers['WARC-Payload-Digest'], offset, length))
+                offset += length
+        return offset
+
+    @staticmethod
+    def _parse_record(record):
+        head, _, body = record.partition(b'\r\n\r\n')
+        headers = {}
+        for line in head.decode('utf-8').split('\r\n')[1:]:
+            name, _, value = line.partition(': ')
+            headers[name] = value
+        payload = body[:int(headers['Content-Length'])].decode('utf-8')
+        return headers, payload
+
+    def append(self, url, html, final_url=None, source='http', kind='page', validator=None):
+        """Archiver le HTML d'une URL ; retourne False si le contenu n'a pas change"""
+        payload = html.encode('utf-8')
+        digest = 'sha256:' + hashlib.sha256(payload).hexdigest()
+        fetched_at = datetime.now().astimezone().isoformat(timespec='seconds')
+        validator = validator or {}
+        headers = [
+            ('WARC-Type', 'resource'),
+            ('WARC-Record-ID', f'<urn:uuid:{uuid.uuid4()}>'),
+            ('WARC-Date', fetched_at),
+            ('WARC-Target-URI', url),
+            ('WARC-Payload-Digest', digest),
+            ('Content-Type', 'text/html; charset=utf-8'),
+            ('X-Record-Kind', kind),
+            ('X-Fetch-Source', source),
+            ('X-Final-URL', final_url or url),
+            ('X-ETag', validator.get('etag') or ''),
+            ('X-Last-Modified', validator.get('last_modified') or ''),
+            ('Content-Length', str(len(payload)))
+        ]
+        head = 'WARC/1.1\r\n' + ''.join(f'{name}: {value}\r\n' for name, value in headers)
+        record = gzip.compress(head.encode('utf-8') + b'\r\n' + payload + b'\r\n\r\n')
+        with self._lock:
+            latest = self._conn.execute(
+                'SELECT digest, offset, length FROM records WHERE url = ? AND kind = ? ORDER BY id DESC LIMIT 1',
+                (url, kind)
+            ).fetchone()
+            unchanged = latest is not None and latest[0] == digest
+            if unchanged:
+                offset, length = latest[1], latest[2]
+            else:
+                self._file.seek(0, os.SEEK_END)
+                offset, length = self._file.tell(), len(record)
+                self._file.write(record)
+                self._file.flush()
+            with self._conn:
+                self._conn.execute(
+                    'INSERT INTO records (url, kind, fetched_at, digest, offset, length) VALUES (?, ?, ?, ?, ?, ?)',
+                    (url, kind, fetched_at, digest, offset, length))
+        return not unchanged
+
+    def latest(self, kind='page'):
+        """Dernier enregistrement de chaque URL : {url: (offset, length)}, par ordre de premiere archive"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT url, offset, length FROM records WHERE kind = ? '
+                'AND id IN (SELECT MAX(id) FROM records WHERE kind = ? GROUP BY url) '
+                'ORDER BY (SELECT MIN(id) FROM records AS first WHERE first.url = records.url)',
+                (kind, kind)
+            ).fetchall()
+        return {url: (offset, length) for url, offset, length in rows}
+
+    def read(self, offset, length):
+        """Relire un enregistrement : (en-tetes, HTML), ou None s'il est illisible
+
+        L'empreinte est verifiee a chaque lecture ; un enregistrement qui ne
+        se decompresse pas ou dont l'empreinte differe est retire de l'index.
+        """
+        with self._lock:
+            record = self._load(offset, length)
+            if record is None:
+                self._discard(offset, length)
+        return record
+
+    def get(self, url, kind='page'):
+        """Dernier enregistrement lisible pour une URL (versions anterieures en repli), ou None"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT DISTINCT offset, length FROM records WHERE url = ? AND kind = ? ORDER BY id DESC',
+                (url, kind)
+            ).fetchall()
+        for row in rows:
+            record = self.read(*row)
+            if record is not None:
+                return record
+        return None
+
+    def stats(self):
+        with self._lock:
+            records, urls = self._conn.execute('SELECT COUNT(*), COUNT(DISTINCT url) FROM records').fetchone()
+        return {'records': records, 'urls': urls, 'bytes': os.path.getsize(self.path)}
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._conn.close()
+
+
+class KnowledgeBaseIndex:
+    """Index plein texte (SQLite FTS5, classement BM25) de la base de connaissances
+
+    Un document par page, par exemple de code et par schema, avec les titres
+    de section comme contexte : une requete ne relit jamais le JSON complet.
+    """
+
+    # Poids BM25 par colonne : url, kind, position (non indexees), title, headings, body
+    WEIGHTS = (0.0, 0.0, 0.0, 10.0, 4.0, 1.0)
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5(
+                url UNINDEXED, kind UNINDEXED, position UNINDEXED,
+                title, headings, body,
+                tokenize = "unicode61 tokenchars '_'"
+            );
+            CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT);
+        ''')
+
+    @staticmethod
+    def _documents(url, page_data):
+        title = page_data.get('title', '')
+        page_headings = '\n'.join(heading.get('text', '') for heading in page_data.get('headings', []))
+        yield (url, 'page', 0, title, page_headings, page_data.get('content', {}).get('text', ''))
+        for kind, key in (('example', 'examples'), ('schema', 'schemas')):
+            for position, entry in enumerate(page_data.get(key, [])):
+                if 'duplicate_of' in entry:
+                    continue
+                context = entry.get('context', 'unknown')
+                yield (url, kind, position, title, '' if context == 'unknown' else context, entry.get('content', ''))
+
+    def rebuild(self, pages, source=None):
+        """Reconstruire l'index a partir de paires (url, page_data), en une transaction
+
+        source : version de la base indexee (knowledge_base_version), pour
+        reconnaitre plus tard un index perime.
+        """
+        count = 0
+        with self._conn:
+            self._conn.execute('DELETE FROM documents')
+            for url, page_data in pages:
+                self._conn.executemany(
+                    'INSERT INTO documents (url, kind, position, title, headings, body) VALUES (?, ?, ?, ?, ?, ?)',
+                    self._documents(url, page_data))
+                count += 1
+            self._conn.execute("INSERT OR REPLACE INTO info VALUES ('built_at', ?)", (datetime.now().isoformat(),))
+            self._conn.execute("INSERT OR REPLACE INTO info VALUES ('pages', ?)", (str(count),))
+            self._conn.execute("INSERT OR REPLACE INTO info VALUES ('source', ?)", (source,))
+        self._conn.execute("INSERT INTO documents (documents) VALUES ('optimize')")
+        self._conn.commit()
+        return count
+
+    def source(self):
+        """Version de la base indexee, None pour un index vide ou d'origine inconnue"""
+        row = self._conn.execute("SELECT value FROM info WHERE key = 'source'").fetchone()
+        return row[0] if row else None
+
+    def search(self, query, limit=10):
+        """Resultats classes : url, type, titre, titres de contexte, extrait et score"""
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return []
+        quoted = ['"' + term + '"' for term in terms]
+        weights = ', '.join(str(weight) for weight in self.WEIGHTS)
+        sql = f'''
+            SELECT url, kind, position, title, headings,
+                   snippet(documents, 5, '[', ']', '...', 16), bm25(documents, {weights}) AS score
+            FROM documents WHERE documents MATCH ? ORDER BY score LIMIT ?
+        '''
+        # Tous les termes d'abord, puis n'importe lequel si rien ne correspond
+        rows = self._conn.execute(sql, (' AND '.join(quoted), limit)).fetchall()
+        if not rows and len(quoted) > 1:
+            rows = self._conn.execute(sql, (' OR '.join(quoted), limit)).fetchall()
+        return [{
+            'url': url,
+            'kind': kind,
+            'position': position,
+            'title': title,
+            'headings': [heading for heading in headings.split('\n') if heading],
+            'snippet': snippet,
+            'score': round(-score, 4)
+        } for url, kind, position, title, headings, snippet, score in rows]
+
+    def close(self):
+        self._conn.close()
+
+
+class KnowledgeBaseStore:
+    """Stockage SQLite adressable par contenu de la base de connaissances
+
+    Chaque corps d'exemple ou de schema est stocke une seule fois, cle par
+    son hash ; les pages n'en gardent que la reference. Une page, un exemple,
+    une categorie ou une branche de l'arbre des parametres se lisent sans
+    charger le reste, et le JSON historique reste exportable avec export_json().
+    """
+
+    ENTRY_KINDS = (('example', 'examples'), ('schema', 'schemas'))
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, content TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                validator TEXT
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                attrs TEXT NOT NULL,
+                hash TEXT NOT NULL REFERENCES blobs (hash),
+                PRIMARY KEY (url, kind, position)
+            );
+            CREATE TABLE IF NOT EXISTS page_parameters (
+                parameter TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (parameter, url)
+            );
+            CREATE TABLE IF NOT EXISTS parameter_paths (path TEXT PRIMARY KEY, data TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS parameter_path_pages (
+                path TEXT NOT NULL,
+                url TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (path, url)
+            );
+        ''')
+
+    def write(self, metadata, navigation_path, parameters, pages):
+        """Remplacer le contenu par des triplets (url, page_data, validator)"""
+        dump = functools.partial(json.dumps, ensure_ascii=False)
+        stats = Counter()
+        parameters = dict(parameters)
+        tree = parameters.pop('tree', {})
+        categories = parameters.pop('categories', {})
+        with self._conn:
+            for table in ('meta', 'blobs', 'pages', 'entries', 'page_parameters',
+                          'parameter_paths', 'parameter_path_pages'):
+                self._conn.execute(f'DELETE FROM {table}')
+            self._conn.executemany('INSERT INTO meta VALUES (?, ?)', [
+                ('metadata', dump(metadata)),
+                ('navigation_path', dump(navigation_path)),
+                ('parameters', dump(parameters))
+            ])
+            # Une ligne par categorie : category() la lit sans charger les autres
+            self._conn.executemany('INSERT INTO meta VALUES (?, ?)',
+                                   [(f'category:{name}', dump(values)) for name, values in categories.items()])
+            for path, node in tree.items():
+                attrs = {name: value for name, value in node.items() if name not in ('sources', 'children')}
+                self._conn.execute('INSERT INTO parameter_paths VALUES (?, ?)', (path, dump(attrs)))
+                self._conn.executemany('INSERT OR IGNORE INTO parameter_path_pages VALUES (?, ?, ?)',
+                                       [(path, url, position) for position, url in enumerate(node.get('sources', []))])
+            stats['parameter_paths'] = len(tree)
+            for seq, (url, page_data, validator) in enumerate(pages):
+                page_data = dict(page_data)
+                for kind, key in self.ENTRY_KINDS:
+                    for position, entry in enumerate(page_data.pop(key, [])):
+                        attrs = {name: value for name, value in entry.items() if name != 'content'}
+                        body = entry.get('content', '')
+                        digest = hashlib.sha256(body.encode('utf-8')).hexdigest()
+                        stats['entries'] += 1
+                        stats['blobs'] += self._conn.execute(
+                            'INSERT OR IGNORE INTO blobs VALUES (?, ?)', (digest, body)).rowcount
+                        self._conn.execute('INSERT INTO entries VALUES (?, ?, ?, ?, ?)',
+                                           (url, kind, position, dump(attrs), digest))
+                self._conn.executemany('INSERT OR IGNORE INTO page_parameters VALUES (?, ?)',
+                                       [(parameter, url) for parameter in page_data.get('parameters', [])])
+                self._conn.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)',
+                                   (url, seq, dump(page_data), dump(validator) if validator else None))
+                stats['pages'] += 1
+        return stats
+
+    def _meta(self, key, default=None):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def metadata(self):
+        return self._meta('metadata', {})
+
+    def navigation_path(self):
+        return self._meta('navigation_path', [])
+
+    def parameters(self):
+        parameters = self._meta('parameters', {'all': []})
+        categories = parameters.setdefault('categories', {})
+        for key, value in self._conn.execute(
+                "SELECT key, value FROM meta WHERE key >= 'category:' AND key < 'category;' ORDER BY rowid"):
+            categories[key[len('category:'):]] = json.loads(value)
+        parameters['tree'] = self.parameter_paths()
+        return parameters
+
+    def parameter_paths(self, prefix=''):
+        """Noeuds de l'arbre des parametres sous un prefixe ('voice' -> voice, voice.provider, ...)
+
+        Les chemins etant la cle primaire, un prefixe se lit par un parcours
+        d'intervalle de l'index, sans charger le reste de l'arbre.
+        """
+        sql = 'SELECT path, data FROM parameter_paths'
+        params = []
+        if prefix:
+            sql += ' WHERE path >= ? AND path < ?'
+            params = [prefix, prefix + '\U0010ffff']
+        nodes = {}
+        for path, data in self._conn.execute(sql + ' ORDER BY path', params):
+            if prefix and path != prefix and path[len(prefix)] not in '.[':
+                continue
+            node = json.loads(data)
+            node['sources'] = [url for url, in self._conn.execute(
+                'SELECT url FROM parameter_path_pages WHERE path = ? ORDER BY position', (path,))]
+            node['children'] = []
+            nodes[path] = node
+        for path in nodes:
+            parent = parent_parameter_path(path)
+            if parent in nodes:
+                nodes[parent]['children'].append(path)
+        return nodes
+
+    def _entries(self, url, kind, position=None):
+        sql = '''
+            SELECT entries.attrs, blobs.content FROM entries JOIN blobs ON blobs.hash = entries.hash
+            WHERE entries.url = ? AND entries.kind = ?
+        '''
+        params = [url, kind]
+        if position is not None:
+            sql += ' AND entries.position = ?'
+            params.append(position)
+        entries = []
+        for attrs, body in self._conn.execute(sql + ' ORDER BY entries.position', params):
+            entry = json.loads(attrs)
+            if 'duplicate_of' not in entry:
+                entry['content'] = body
+            entries.append(entry)
+        return entries
+
+    def page(self, url):
+        """page_data complet d'une URL (exemples et schemas resolus), ou None"""
+        row = self._conn.execute('SELECT data FROM pages WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        page_data = json.loads(row[0])
+        for kind, key in self.ENTRY_KINDS:
+            page_data[key] = self._entries(url, kind)
+        return page_data
+
+    def example(self, url, position):
+        entries = self._entries(url, 'example', position)
+        return entries[0] if entries else None
+
+    def schema(self, url, position):
+        entries = self._entries(url, 'schema', position)
+        return entries[0] if entries else None
+
+    def category(self, name):
+        """Parametres d'une categorie et pages qui les mentionnent"""
+        parameters = self._meta(f'category:{name}', [])
+        urls = {}
+        for parameter in parameters:
+            urls[parameter] = [url for url, in self._conn.execute(
+                '''SELECT page_parameters.url FROM page_parameters JOIN pages ON pages.url = page_parameters.url
+                   WHERE parameter = ? ORDER BY pages.seq''', (parameter,))]
+        return {'name': name, 'parameters': parameters, 'pages': urls}
+
+    def iter_pages(self):
+        """Triplets (url, page_data, validator) dans l'ordre de navigation"""
+        for url, validator in self._conn.execute('SELECT url, validator FROM pages ORDER BY seq').fetchall():
+            yield url, self.page(url), json.loads(validator) if validator else None
+
+    def export_json(self, output_file):
+        """Reecrire le JSON historique, une page a la fois"""
+        def dump(value):
+            return json.dumps(value, ensure_ascii=False)
+
+        def write_section(f, name, items):
+            opening, closing = ('{', '}') if name in ('pages', 'validators') else ('[', ']')
+            f.write(f',\n  {dump(name)}: {opening}')
+            separator = '\n    '
+            for item in items:
+                f.write(separator + item)
+                separator = ',\n    '
+            f.write('\n  ' + closing if separator != '\n    ' else closing)
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write('{\n')
+            f.write(f"  {dump('metadata')}: {dump(self.metadata())}")
+            write_section(f, 'pages', (f"{dump(url)}: {dump(page)}" for url, page, _ in self.iter_pages()))
+            f.write(f",\n  {dump('navigation_path')}: {dump(self.navigation_path())}")
+            f.write(f",\n  {dump('parameters')}: {dump(self.parameters())}")
+            write_section(f, 'examples', (dump(e) for _, page, _ in self.iter_pages()
+                                          for e in canonical_entries(page, 'examples')))
+            write_section(f, 'schemas', (dump(e) for _, page, _ in self.iter_pages()
+                                         for e in canonical_entries(page, 'schemas')))
+            write_section(f, 'validators', (f"{dump(url)}: {dump(validator)}"
+                                            for url, _, validator in self.iter_pages() if validator))
+            f.write('\n}\n')
+
+    def close(self):
+        self._conn.close()
+
+
+def iter_knowledge_base_pages(path):
+    """Paires (url, page_data) d'une base JSON existante, dans l'ordre de navigation"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    pages = data.get('pages', {})
+    for url in data.get('navigation_path') or list(pages):
+        if url in pages:
+            yield url, pages[url]
+
+
+def knowledge_base_version(path):
+    """Version d'une base JSON (date de modification et taille) ; FileNotFoundError si elle manque"""
+    stat = os.stat(path)
+    return f'{stat.st_mtime_ns}:{stat.st_size}'
+
+
+def search(query, limit=10, index_file=None, knowledge_base_file=None):
+    """Chercher dans la base de connaissances (index reconstruit quand la base a change)"""
+    knowledge_base_file = knowledge_base_file or SCRAPER_CONFIG['output_file']
+    try:
+        version = knowledge_base_version(knowledge_base_file)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Base de connaissances introuvable (lancer un crawl): {knowledge_base_file}")
+    index = KnowledgeBaseIndex(index_file or SCRAPER_CONFIG['search_index_file'])
+    try:
+        if index.source() != version:
+            index.rebuild(iter_knowledge_base_pages(knowledge_base_file), source=version)
+        return index.search(query, limit)
+    finally:
+        index.close()
+
+
+def parameter_paths(prefix='', store_file=None):
+    """Chemins de parametres sous un prefixe, lus dans le stockage compact"""
+    store_file = store_file or SCRAPER_CONFIG['store_file']
+    if not store_file or not os.path.exists(store_file):
+        raise FileNotFoundError(f"Stockage introuvable (crawl avec --store): {store_file}")
+    store = KnowledgeBaseStore(store_file)
+    try:
+        return store.parameter_paths(prefix)
+    finally:
+        store.close()
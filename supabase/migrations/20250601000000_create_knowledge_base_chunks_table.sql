@@ -0,0 +1,44 @@
+-- Création de la table knowledge_base_chunks
+-- Passages de la documentation scrappée (vapi-sequential-scraper.py --export-supabase),
+-- bornés en tokens et rattachés à une base de connaissances
+CREATE TABLE IF NOT EXISTS public.knowledge_base_chunks (
+    id UUID PRIMARY KEY, -- Identifiant stable calculé par l'export (URL de la page + empreinte du contenu du passage)
+    knowledge_base_id UUID NOT NULL REFERENCES public.knowledge_bases(id) ON DELETE CASCADE,
+    url TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT,
+    content TEXT NOT NULL,
+    token_count INTEGER NOT NULL,
+    content_hash TEXT NOT NULL, -- Empreinte de la ligne : l'export ne renvoie que les passages modifiés
+    metadata JSONB,
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    -- Vérifiée en fin de transaction : un passage inséré décale les rangs des suivants pendant l'export
+    UNIQUE (knowledge_base_id, url, position) DEFERRABLE INITIALLY DEFERRED
+);
+
+-- Index pour améliorer les performances des requêtes par base de connaissances
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_chunks_knowledge_base_id ON public.knowledge_base_chunks(knowledge_base_id);
+
+-- Trigger pour mettre à jour updated_at automatiquement
+CREATE TRIGGER knowledge_base_chunks_updated_at_trigger
+BEFORE UPDATE ON public.knowledge_base_chunks
+FOR EACH ROW
+EXECUTE FUNCTION public.update_updated_at_column();
+
+-- Activer Row Level Security (RLS)
+ALTER TABLE public.knowledge_base_chunks ENABLE ROW LEVEL SECURITY;
+
+-- Commentaire pour la table
+COMMENT ON TABLE public.knowledge_base_chunks IS 'Passages bornés en tokens des bases de connaissances, alimentés par lots par le scraper de documentation.';
+
+-- Politiques RLS
+-- L'export écrit avec le rôle service (RLS contournée) ; les utilisateurs lisent les passages de leurs bases
+CREATE POLICY "Users can view chunks of their own knowledge bases"
+ON public.knowledge_base_chunks FOR SELECT
+TO authenticated
+USING (EXISTS (
+    SELECT 1 FROM public.knowledge_bases
+    WHERE knowledge_bases.id = knowledge_base_chunks.knowledge_base_id
+    AND knowledge_bases.user_id = auth.uid()
+));